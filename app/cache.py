@@ -0,0 +1,353 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional, Tuple, Union
+from urllib.parse import quote, unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+# Every key is "<prefix>:<namespace>:v<version>:<part>[:<part>...]".
+KEY_PREFIX = os.getenv("APP_CACHE_PREFIX", "recipe-app")
+
+
+class CacheBackend(ABC):
+    """String store with per-key TTLs; ``CacheNamespace`` handles keys and JSON."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl_s: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# In-process
+# ---------------------------------------------------------------------------
+
+class MemoryCache(CacheBackend):
+    """Per-process LRU; the default when ``APP_CACHE_URL`` is unset."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[float], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl_s: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl_s if ttl_s is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+# ---------------------------------------------------------------------------
+# Shared by every process on the node
+# ---------------------------------------------------------------------------
+
+class SQLiteCache(CacheBackend):
+    """File-backed cache shared by all workers on one node (WAL mode, one connection per thread)."""
+
+    _PURGE_EVERY = 256
+
+    def __init__(self, path: str, busy_timeout_s: float = 1.0):
+        self.path = path
+        self.busy_timeout_s = busy_timeout_s
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=self.busy_timeout_s)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return value
+
+    def set(self, key: str, value: str, ttl_s: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl_s if ttl_s is not None else None
+        with self._connection() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            self._writes += 1
+            if self._writes % self._PURGE_EVERY == 0:
+                db.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key: str) -> None:
+        with self._connection() as db:
+            db.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+
+# ---------------------------------------------------------------------------
+# Shared across nodes (any server speaking the Redis protocol)
+# ---------------------------------------------------------------------------
+
+class RedisError(Exception):
+    """Error reply from the server."""
+
+
+def _encode_command(*args: Any) -> bytes:
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(out)
+
+
+def _read_reply(reader: Any) -> Any:
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("connection closed by server")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload.decode()
+    if kind == b"-":
+        raise RedisError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2].decode()
+    if kind == b"*":
+        length = int(payload)
+        return None if length < 0 else [_read_reply(reader) for _ in range(length)]
+    raise RedisError(f"unexpected reply: {line!r}")
+
+
+class RedisCache(CacheBackend):
+    """Minimal RESP client (GET / SET PX / DEL) over one lazily reconnecting socket."""
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: Optional[str] = None,
+        timeout_s: float = 0.5,
+    ):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout_s = timeout_s
+        self._sock: Optional[socket.socket] = None
+        self._reader: Any = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout_s)
+        self._reader = self._sock.makefile("rb")
+        try:
+            if self.password:
+                self._send("AUTH", self.password)
+            if self.db:
+                self._send("SELECT", self.db)
+        except RedisError:
+            self._disconnect()
+            raise
+
+    def _send(self, *args: Any) -> Any:
+        self._sock.sendall(_encode_command(*args))
+        return _read_reply(self._reader)
+
+    def _command(self, *args: Any) -> Any:
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._send(*args)
+                except (OSError, ConnectionError):
+                    self._disconnect()
+                    if attempt:
+                        raise
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    def get(self, key: str) -> Optional[str]:
+        return self._command("GET", key)
+
+    def set(self, key: str, value: str, ttl_s: Optional[float] = None) -> None:
+        if ttl_s is None:
+            self._command("SET", key, value)
+        else:
+            self._command("SET", key, value, "PX", max(1, int(ttl_s * 1000)))
+
+    def delete(self, key: str) -> None:
+        self._command("DEL", key)
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+def open_cache(url: str) -> CacheBackend:
+    """Build a backend from a URL.
+
+    ``memory://``, ``sqlite:///relative/path.db`` or ``sqlite:////absolute/path.db``,
+    and ``redis://[:password@]host[:port][/db]``.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryCache()
+    if parsed.scheme == "sqlite":
+        path = url[len("sqlite:///"):]
+        if not path:
+            raise ValueError(f"SQLite cache URL needs a path: {url!r}")
+        return SQLiteCache(path)
+    if parsed.scheme == "redis":
+        db = parsed.path.strip("/")
+        return RedisCache(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(db) if db else 0,
+            password=unquote(parsed.password) if parsed.password else None,
+        )
+    raise ValueError(f"Unsupported cache URL: {url!r}")
+
+
+_default: Optional[CacheBackend] = None
+_default_lock = threading.Lock()
+
+
+def get_cache() -> CacheBackend:
+    """Process-wide backend from ``APP_CACHE_URL`` (default ``memory://``)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = open_cache(os.getenv("APP_CACHE_URL") or "memory://")
+        return _default
+
+
+def set_cache(backend: Optional[CacheBackend]) -> None:
+    """Replace the process-wide backend; ``None`` re-reads ``APP_CACHE_URL`` on next use."""
+    global _default
+    with _default_lock:
+        _default = backend
+
+
+Key = Union[str, int, float, Tuple[Any, ...]]
+
+
+class CacheNamespace:
+    """JSON values under one versioned key namespace with a default TTL.
+
+    Bump ``version`` when the shape of the cached values changes so old
+    entries are ignored rather than misread. Backend errors are logged and
+    treated as misses, so an unavailable cache never fails a request.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        version: int = 1,
+        ttl_s: Optional[float] = None,
+        backend: Optional[CacheBackend] = None,
+    ):
+        self.name = name
+        self.version = version
+        self.ttl_s = ttl_s
+        self._backend = backend
+
+    @property
+    def backend(self) -> CacheBackend:
+        return self._backend or get_cache()
+
+    def key(self, key: Key) -> str:
+        parts = key if isinstance(key, tuple) else (key,)
+        normalized = (quote(str(p).strip().lower(), safe="") for p in parts)
+        return f"{KEY_PREFIX}:{self.name}:v{self.version}:" + ":".join(normalized)
+
+    def get(self, key: Key) -> Optional[Any]:
+        try:
+            raw = self.backend.get(self.key(key))
+        except Exception as e:
+            logger.warning("cache get failed for %s: %s", self.name, e)
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: Key, value: Any, ttl_s: Optional[float] = None) -> None:
+        raw = json.dumps(value)
+        try:
+            self.backend.set(self.key(key), raw, ttl_s if ttl_s is not None else self.ttl_s)
+        except Exception as e:
+            logger.warning("cache set failed for %s: %s", self.name, e)
+
+    def delete(self, key: Key) -> None:
+        try:
+            self.backend.delete(self.key(key))
+        except Exception as e:
+            logger.warning("cache delete failed for %s: %s", self.name, e)
@@ -1,6 +1,31 @@
+from typing import Optional
+
 from crewai import Agent
+from crewai.agents.agent_builder.utilities.base_token_process import TokenProcess
+
+from .config import CREW_PROFILE, llm, osm_mcp, weather_mcp
+
+VERBOSE = CREW_PROFILE != "lean"
+
+
+def fresh_copy(agent: Agent, verbose: Optional[bool] = None) -> Agent:
+    """Per-request shallow copy of a shared agent (same LLM, tools and MCP servers).
 
-from .config import llm, osm_mcp, weather_mcp
+    CrewAI keeps one executor per agent and never clears its message history,
+    so the module-level agents would carry every earlier request, from any
+    session, into the next prompt and interleave concurrent requests.
+    ``model_copy`` shares private attributes, so the copy also gets its own
+    MCP client list (CrewAI disconnects and clears it after every task) and
+    token counter. ``verbose`` overrides the agent's import-time ``VERBOSE``
+    setting.
+    """
+    update = {"agent_executor": None}
+    if verbose is not None:
+        update["verbose"] = verbose
+    copy = agent.model_copy(update=update)
+    copy._mcp_clients = []
+    copy._token_process = TokenProcess()
+    return copy
 
 weather_agent = Agent(
     role="Weather Specialist",
@@ -13,7 +38,7 @@ weather_agent = Agent(
         "You always look up the city coordinates first, then fetch the current forecast."
     ),
     llm=llm,
-    verbose=True,
+    verbose=VERBOSE,
     mcps=[weather_mcp],
 )
 
@@ -29,7 +54,7 @@ recipe_agent = Agent(
         "for the season and weather."
     ),
     llm=llm,
-    verbose=True,
+    verbose=VERBOSE,
 )
 
 place_finder_agent = Agent(
@@ -43,7 +68,7 @@ place_finder_agent = Agent(
         "shops, restaurants, and markets with practical location hints."
     ),
     llm=llm,
-    verbose=True,
+    verbose=VERBOSE,
     mcps=[osm_mcp],
 )
 
@@ -58,7 +83,7 @@ supervisor_agent = Agent(
         "the request to the right specialist agent."
     ),
     llm=llm,
-    verbose=True,
+    verbose=VERBOSE,
 )
 
 extractor_agent = Agent(
@@ -69,6 +94,6 @@ extractor_agent = Agent(
         "avoid adding commentary."
     ),
     llm=llm,
-    verbose=True,
+    verbose=VERBOSE,
 )
 
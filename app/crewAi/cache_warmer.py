@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..cache import MemoryCache, get_cache
+from ..servers import weather_server
+from .config import CACHE_WARM_CALLS_PER_HOUR, CACHE_WARM_INTERVAL_S, CACHE_WARM_TOP_N
+from .llm_scheduler import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class PlacePopularity:
+    """Requests per place, decayed with a ``half_life_s`` half-life."""
+
+    def __init__(self, half_life_s: float = 6 * 3600, max_places: int = 1000, min_score: float = 0.1):
+        self.half_life_s = half_life_s
+        self.max_places = max_places
+        self.min_score = min_score
+        self._scores: Dict[str, Tuple[float, float]] = {}  # place -> (score, updated_at)
+        self._lock = threading.Lock()
+
+    def _score(self, place: str, now: float) -> float:
+        score, updated_at = self._scores[place]
+        return score * 0.5 ** ((now - updated_at) / self.half_life_s)
+
+    def record(self, place: str, now: Optional[float] = None) -> None:
+        place = place.strip().lower()
+        if not place:
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            score = self._score(place, now) if place in self._scores else 0.0
+            self._scores[place] = (score + 1.0, now)
+            if len(self._scores) > self.max_places:
+                del self._scores[min(self._scores, key=lambda p: self._score(p, now))]
+
+    def top(self, n: int, now: Optional[float] = None) -> List[str]:
+        """The ``n`` most requested places (lowercased), most popular first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            scores = {place: self._score(place, now) for place in self._scores}
+        ranked = sorted((p for p, s in scores.items() if s >= self.min_score), key=scores.get, reverse=True)
+        return ranked[:n]
+
+
+# Fed by RecipeCrew for every request.
+popularity = PlacePopularity()
+
+
+class CacheWarmer:
+    """Keeps the geocodes and forecasts of the most requested places warm in the shared cache.
+
+    Each cycle takes the ``top_n`` places from ``popularity``, geocodes those
+    whose coordinates are missing or about to age out, and refreshes every
+    forecast that would no longer be fresh by the next cycle, ``batch_size``
+    locations per upstream call. Cycles run every ``interval_s`` give or take
+    ``jitter`` so warmers in several processes drift apart. Upstream calls are
+    capped at ``calls_per_hour``; work that does not fit waits for a later cycle.
+    """
+
+    def __init__(
+        self,
+        popularity: PlacePopularity,
+        top_n: int = 20,
+        interval_s: float = 300.0,
+        jitter: float = 0.2,
+        calls_per_hour: float = 120.0,
+        batch_size: int = 50,
+        timeout_s: Optional[float] = None,
+        seed: Optional[int] = None,
+    ):
+        self.popularity = popularity
+        self.top_n = top_n
+        self.interval_s = interval_s
+        self.jitter = jitter
+        self.batch_size = batch_size
+        self.timeout_s = timeout_s
+        # One cycle's share of the hourly budget can be spent at once.
+        self.budget = TokenBucket(calls_per_hour / 60, burst_s=interval_s)
+        self._rng = random.Random(seed)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._totals: Dict[str, int] = {}
+        self._cycles = 0
+        self._last: Dict[str, int] = {}
+
+    def _spend(self) -> bool:
+        if self.budget.time_until(1, time.monotonic()) > 0:
+            return False
+        self.budget.take(1)
+        return True
+
+    async def warm(self) -> Dict[str, int]:
+        """Run one cycle; returns counts of what it did."""
+        done = {"places": 0, "geocoded": 0, "refreshed": 0, "upstream_calls": 0, "deferred": 0, "errors": 0}
+        # Anything that would age out before the latest possible next cycle is due now.
+        horizon = self.interval_s * (1 + self.jitter)
+        now = time.time()
+
+        locations: Dict[Tuple[float, float], Tuple[float, float]] = {}
+        for place in self.popularity.top(self.top_n):
+            done["places"] += 1
+            coordinates = weather_server.last_coordinates(place)
+            if coordinates is None or now - coordinates.get("fetched_at", 0) > weather_server.GEOCODE_FRESH_S - horizon:
+                if not self._spend():
+                    done["deferred"] += 1
+                else:
+                    done["upstream_calls"] += 1
+                    try:
+                        fetched = await weather_server.fetch_coordinates(place, self.timeout_s)
+                    except Exception as e:
+                        logger.warning("cache warmer: geocoding %r failed: %s", place, e)
+                        done["errors"] += 1
+                    else:
+                        if fetched:
+                            coordinates = fetched
+                            done["geocoded"] += 1
+            if coordinates:
+                location = (coordinates["latitude"], coordinates["longitude"])
+                locations.setdefault((round(location[0], 2), round(location[1], 2)), location)
+
+        due = []
+        for latitude, longitude in locations.values():
+            forecast = weather_server.last_forecast(latitude, longitude)
+            if forecast is None or now - forecast.get("fetched_at", 0) > weather_server.FORECAST_FRESH_S - horizon:
+                due.append((latitude, longitude))
+        for start in range(0, len(due), self.batch_size):
+            batch = due[start : start + self.batch_size]
+            if not self._spend():
+                done["deferred"] += len(batch)
+                continue
+            done["upstream_calls"] += 1
+            try:
+                done["refreshed"] += await weather_server.refresh_forecasts(batch, self.timeout_s)
+            except Exception as e:
+                logger.warning("cache warmer: refreshing %d forecasts failed: %s", len(batch), e)
+                done["errors"] += 1
+
+        self._cycles += 1
+        self._last = done
+        for name, count in done.items():
+            self._totals[name] = self._totals.get(name, 0) + count
+        return done
+
+    def _loop(self) -> None:
+        delay = self._rng.uniform(0, self.interval_s * self.jitter)
+        while not self._stop.wait(delay):
+            try:
+                asyncio.run(self.warm())
+            except Exception:
+                logger.exception("cache warmer cycle failed")
+            delay = self.interval_s * self._rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def start(self) -> "CacheWarmer":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="cache-warmer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, object]:
+        return {"cycles": self._cycles, "last": dict(self._last), "totals": dict(self._totals)}
+
+
+def start_cache_warmer() -> Optional[CacheWarmer]:
+    """Start the warmer configured by ``WEATHER_WARM_*``, or return None when it cannot help.
+
+    The weather server runs in its own processes, so warming a per-process
+    ``memory://`` cache would never reach it.
+    """
+    if CACHE_WARM_TOP_N <= 0:
+        return None
+    if isinstance(get_cache(), MemoryCache):
+        logger.warning("cache warmer not started: APP_CACHE_URL is not shared with the weather server")
+        return None
+    return CacheWarmer(
+        popularity,
+        top_n=CACHE_WARM_TOP_N,
+        interval_s=CACHE_WARM_INTERVAL_S,
+        calls_per_hour=CACHE_WARM_CALLS_PER_HOUR,
+    ).start()
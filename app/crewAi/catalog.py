@@ -0,0 +1,361 @@
+"""Precomputed recipe catalog: dish x weather bucket -> recipe, with a fuzzy name index.
+
+Build (or extend) the catalog offline from a dish list, one dish per line with
+optional ``|``-separated aliases (``spaghetti bolognese|spag bol``):
+
+    python -m app.crewAi.catalog data/dishes.txt --out data/recipe_catalog.json.gz
+
+Generation uses ``build_recipe_task`` at batch priority, so it yields to
+interactive traffic on the shared LLM quota.
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION = 1
+
+# Representative weather per bucket, used as the {weather} input when generating.
+WEATHER_BUCKETS: Dict[str, Dict[str, Any]] = {
+    "cold": {"temp_c": 3.0, "conditions": "Overcast"},
+    "mild": {"temp_c": 16.0, "conditions": "Partly cloudy"},
+    "hot": {"temp_c": 29.0, "conditions": "Clear sky"},
+    "wet": {"temp_c": 12.0, "conditions": "Moderate rain"},
+}
+DEFAULT_BUCKET = "mild"
+
+_WET_WORDS = ("rain", "drizzle", "shower", "snow", "sleet", "hail", "thunder")
+# Rain expected over the next hours (compact record's ``rain_next_mm``) also counts as wet.
+WET_NEXT_HOURS_MM = 1.0
+_TEMPERATURE = re.compile(r"(-?\d+(?:\.\d+)?)\s*°\s*C", re.IGNORECASE)
+
+
+def weather_bucket(weather: Optional[Dict[str, Any]]) -> str:
+    """Weather class of a ``RecipeCrew`` weather dict (compact record or prose summary)."""
+    conditions = str((weather or {}).get("conditions") or "")
+    if any(word in conditions.lower() for word in _WET_WORDS):
+        return "wet"
+    if ((weather or {}).get("rain_next_mm") or 0) >= WET_NEXT_HOURS_MM:
+        return "wet"
+    temp_c = (weather or {}).get("temp_c")
+    if temp_c is None:
+        found = _TEMPERATURE.search(conditions)
+        temp_c = float(found.group(1)) if found else None
+    if temp_c is None:
+        return DEFAULT_BUCKET
+    if temp_c < 8:
+        return "cold"
+    if temp_c > 24:
+        return "hot"
+    return "mild"
+
+
+# ---------------------------------------------------------------------------
+# Fuzzy name index
+# ---------------------------------------------------------------------------
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def _prefix_grams(token: str) -> Set[str]:
+    # Start-padded only, so a short query token shares all of its grams with any word it prefixes.
+    padded = "  " + token
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _grams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(a: str, b: str) -> float:
+    ga, gb = _grams(a), _grams(b)
+    return 2 * len(ga & gb) / (len(ga) + len(gb))
+
+
+def _token_similarity(query: str, word: str) -> float:
+    if word == query or (len(query) >= 3 and word.startswith(query)):
+        return 1.0
+    # Trigrams catch reordered fragments, the edit ratio catches single-letter typos;
+    # anything weaker counts as unmatched so extra words in the query cost the full word.
+    score = max(_dice(query, word), SequenceMatcher(None, query, word).ratio())
+    return score if score >= 0.5 else 0.0
+
+
+# Every query word must match a word of the name at least this well (typos pass, other words do not).
+MIN_WORD_MATCH = 0.8
+# Connectives a query may add or leave out ("mac n cheese", "macaroni and cheese").
+_FILLER_WORDS = {"a", "and", "n", "of", "the"}
+
+
+def _word_match(query: str, n_tokens: List[str], joined: str) -> float:
+    if len(query) >= 3 and query in joined:
+        return 1.0  # joined words ("padthai")
+    return max(_token_similarity(query, n) for n in n_tokens)
+
+
+def similarity(query: str, name: str) -> float:
+    """Token-level F1 of prefix/fuzzy word matches, or whole-string trigram Dice if higher.
+
+    ``"spag bol"`` scores 1.0 against ``"spaghetti bolognese"``; ``"spaghetti"``
+    alone scores about the same against every spaghetti dish, which ``lookup``
+    treats as ambiguous. A query word the name does not have scores 0.0:
+    ``"vegan spaghetti bolognese"`` is a different dish, not a close match.
+    """
+    q_tokens, n_tokens = query.split(), name.split()
+    if not q_tokens or not n_tokens:
+        return 0.0
+    joined = name.replace(" ", "")
+    word_matches = [_word_match(q, n_tokens, joined) for q in q_tokens]
+    if any(m < MIN_WORD_MATCH for q, m in zip(q_tokens, word_matches) if q not in _FILLER_WORDS):
+        return 0.0
+    precision = sum(word_matches) / len(q_tokens)
+    recall = sum(max(_token_similarity(q, n) for q in q_tokens) for n in n_tokens) / len(n_tokens)
+    token_score = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return max(token_score, _dice(query.replace(" ", ""), joined))
+
+
+@dataclass
+class CatalogMatch:
+    name: str
+    score: float
+    recipes: Dict[str, str]
+
+    def recipe(self, bucket: str) -> Optional[str]:
+        return self.recipes.get(bucket) or self.recipes.get(DEFAULT_BUCKET)
+
+
+class RecipeCatalog:
+    """Recipes per dish and weather bucket, looked up by fuzzy dish name.
+
+    Candidates come from a trigram index over the words of every name and alias;
+    only those are scored with ``similarity``.
+    """
+
+    def __init__(self, entries: Optional[Iterable[Dict[str, Any]]] = None):
+        self.entries: List[Dict[str, Any]] = []
+        self._by_name: Dict[str, int] = {}
+        self._keys: List[Tuple[str, int]] = []
+        self._index: Dict[str, Set[int]] = defaultdict(set)
+        self._lock = threading.Lock()
+        for entry in entries or []:
+            self.add(entry["name"], entry.get("aliases", []), entry.get("recipes", {}))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _index_key(self, key: str, entry_id: int) -> None:
+        key_id = len(self._keys)
+        self._keys.append((key, entry_id))
+        for token in key.split():
+            for gram in _prefix_grams(token):
+                self._index[gram].add(key_id)
+
+    def add(self, name: str, aliases: Iterable[str] = (), recipes: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Add a dish (or merge aliases/recipes into an existing one) and return its entry."""
+        with self._lock:
+            entry_id = self._by_name.get(normalize(name))
+            if entry_id is None:
+                entry_id = len(self.entries)
+                self.entries.append({"name": name, "aliases": [], "recipes": {}})
+                self._by_name[normalize(name)] = entry_id
+                self._index_key(normalize(name), entry_id)
+            entry = self.entries[entry_id]
+            for alias in aliases:
+                if alias not in entry["aliases"] and normalize(alias):
+                    entry["aliases"].append(alias)
+                    self._index_key(normalize(alias), entry_id)
+            entry["recipes"].update(recipes or {})
+            return entry
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        entry_id = self._by_name.get(normalize(name))
+        return self.entries[entry_id] if entry_id is not None else None
+
+    def search(self, query: str, limit: int = 5, candidates: int = 50) -> List[Tuple[float, Dict[str, Any]]]:
+        """Best-scoring entries for ``query``, highest first."""
+        query = normalize(query)
+        shared: Counter = Counter()
+        for token in query.split():
+            for gram in _prefix_grams(token):
+                shared.update(self._index.get(gram, ()))
+        best: Dict[int, float] = {}
+        for key_id, _ in shared.most_common(candidates):
+            key, entry_id = self._keys[key_id]
+            best[entry_id] = max(best.get(entry_id, 0.0), similarity(query, key))
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(score, self.entries[entry_id]) for entry_id, score in ranked]
+
+    def lookup(self, query: str, min_score: float = 0.8, margin: float = 0.1) -> Optional[CatalogMatch]:
+        """Confident match only: above ``min_score`` and ``margin`` ahead of the runner-up."""
+        ranked = self.search(query, limit=2)
+        if not ranked or ranked[0][0] < min_score:
+            return None
+        if len(ranked) > 1 and ranked[0][0] - ranked[1][0] < margin:
+            return None
+        score, entry = ranked[0]
+        if not entry["recipes"]:
+            return None
+        return CatalogMatch(name=entry["name"], score=round(score, 3), recipes=entry["recipes"])
+
+    # ---- persistence ----
+
+    @classmethod
+    def load(cls, path: str) -> "RecipeCatalog":
+        """Read a catalog written by ``save``; a missing file gives an empty catalog."""
+        if not os.path.exists(path):
+            return cls()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CATALOG_VERSION:
+            raise ValueError(f"Unsupported recipe catalog version in {path}: {data.get('version')}")
+        return cls(data["entries"])
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {"version": CATALOG_VERSION, "buckets": list(WEATHER_BUCKETS), "entries": self.entries}
+            tmp = f"{path}.tmp"
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+
+_catalogs: Dict[str, RecipeCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(path: str) -> RecipeCatalog:
+    """Catalog at ``path``, loaded once per process.
+
+    A file that cannot be read (corrupt, truncated or another version) is
+    logged and treated as an empty catalog, so requests fall back to live
+    generation instead of failing.
+    """
+    with _catalogs_lock:
+        if path not in _catalogs:
+            try:
+                _catalogs[path] = RecipeCatalog.load(path)
+            except Exception:
+                logger.exception("recipe catalog %s could not be loaded; generating recipes live", path)
+                _catalogs[path] = RecipeCatalog()
+        return _catalogs[path]
+
+
+# ---------------------------------------------------------------------------
+# Batch build
+# ---------------------------------------------------------------------------
+
+def read_dishes(lines: Iterable[str]) -> List[Tuple[str, List[str]]]:
+    """Parse ``name|alias|alias`` lines; blank lines and ``#`` comments are skipped."""
+    dishes = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        name, *aliases = [part.strip() for part in line.split("|")]
+        dishes.append((name, [a for a in aliases if a]))
+    return dishes
+
+
+def build_catalog(
+    catalog: RecipeCatalog,
+    dishes: List[Tuple[str, List[str]]],
+    generate: Callable[[str, str], str],
+    buckets: Iterable[str] = tuple(WEATHER_BUCKETS),
+    workers: int = 4,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, int]:
+    """Fill in every missing dish x bucket recipe with ``generate(name, bucket)``.
+
+    Existing recipes are kept, so an interrupted build resumes where it stopped.
+    """
+    jobs = []
+    for name, aliases in dishes:
+        entry = catalog.add(name, aliases)
+        jobs += [(name, bucket) for bucket in buckets if bucket not in entry["recipes"]]
+
+    counts = {"generated": 0, "failed": 0, "skipped": len(dishes) * len(tuple(buckets)) - len(jobs)}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(generate, name, bucket): (name, bucket) for name, bucket in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            name, bucket = futures[future]
+            try:
+                recipe = future.result()
+            except Exception as e:
+                print(f"{name} [{bucket}]: {type(e).__name__}: {e}", file=sys.stderr)
+                recipe = None
+            if recipe:
+                catalog.add(name, recipes={bucket: recipe})
+                counts["generated"] += 1
+            else:
+                counts["failed"] += 1
+            if on_progress:
+                on_progress(done, len(jobs))
+    return counts
+
+
+def generate_recipe(item_name: str, bucket: str) -> str:
+    """One recipe from ``build_recipe_task`` for a weather bucket, at batch priority."""
+    from crewai import Crew
+
+    from .agents import fresh_copy, recipe_agent
+    from .llm_scheduler import Priority, llm_priority
+    from .tasks import build_recipe_task
+
+    agent = fresh_copy(recipe_agent)
+    task = build_recipe_task(agent)
+    inputs = {
+        "item_name": item_name,
+        "place": "the user's city",
+        "weather": json.dumps(WEATHER_BUCKETS[bucket], separators=(",", ":")),
+    }
+    with llm_priority(Priority.BATCH):
+        Crew(agents=[agent], tasks=[task], verbose=False).kickoff(inputs=inputs)
+    return task.output.raw if task.output else ""
+
+
+def main(argv: List[str] = None) -> int:
+    from .config import RECIPE_CATALOG_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dishes", help="dish list, one 'name|alias|...' per line")
+    parser.add_argument("--out", default=RECIPE_CATALOG_PATH, help="catalog file (extended if it exists)")
+    parser.add_argument("--bucket", action="append", choices=list(WEATHER_BUCKETS), help="only these buckets")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent generations")
+    parser.add_argument("--save-every", type=int, default=50, help="write the catalog every N recipes")
+    args = parser.parse_args(argv)
+
+    with open(args.dishes, encoding="utf-8") as f:
+        dishes = read_dishes(f)
+    catalog = RecipeCatalog.load(args.out)
+
+    def progress(done: int, total: int) -> None:
+        if done % args.save_every == 0 or done == total:
+            catalog.save(args.out)
+            print(f"{done}/{total} recipes", flush=True)
+
+    counts = build_catalog(catalog, dishes, generate_recipe, args.bucket or tuple(WEATHER_BUCKETS), args.workers, progress)
+    catalog.save(args.out)
+    print(f"{len(catalog)} dishes in {args.out}: {counts}")
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
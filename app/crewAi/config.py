@@ -3,6 +3,8 @@ import os
 from crewai import LLM
 from crewai.mcp import MCPServerStdio
 
+from .llm_scheduler import LLMScheduler, ScheduledLLM
+
 
 def gpt_client() -> LLM:
     deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")
@@ -15,7 +17,38 @@ def gpt_client() -> LLM:
     )
 
 
-llm = gpt_client()
+# "full" (default) runs verbose crews that include the supervisor and pass weather downstream as
+# free text. "lean" leaves idle agents out, turns verbose output off and passes a compact weather record.
+CREW_PROFILE = os.getenv("RECIPE_CREW_PROFILE", "full")
+CREW_PROFILES = ("full", "lean")
+
+# All agents share one deployment, so every call goes through one scheduler
+# (AZURE_OPENAI_RPM / AZURE_OPENAI_TPM / AZURE_OPENAI_MAX_CONCURRENCY).
+llm_scheduler = LLMScheduler.from_env()
+llm = ScheduledLLM(gpt_client(), llm_scheduler)
+
+# Latency budgets (seconds). Each stage gets its own budget, capped by what is
+# left of the overall request deadline.
+REQUEST_BUDGET_S = float(os.getenv("RECIPE_CREW_REQUEST_BUDGET_S", "45"))
+STAGE_BUDGETS_S = {
+    "extract_item_place": float(os.getenv("RECIPE_CREW_EXTRACT_BUDGET_S", "10")),
+    "weather_crew": float(os.getenv("RECIPE_CREW_WEATHER_BUDGET_S", "12")),
+    "recipe_crew": float(os.getenv("RECIPE_CREW_RECIPE_BUDGET_S", "30")),
+    "places_crew": float(os.getenv("RECIPE_CREW_PLACES_BUDGET_S", "30")),
+}
+# How long a previously fetched weather summary may be served when the weather stage overruns.
+WEATHER_STALE_TTL_S = float(os.getenv("RECIPE_CREW_WEATHER_STALE_TTL_S", "10800"))
+
+# Precomputed recipes (dish x weather bucket), built with `python -m app.crewAi.catalog`.
+# "prepare" requests are served from it when the dish name matches with at least this score.
+RECIPE_CATALOG_PATH = os.getenv("RECIPE_CATALOG_PATH", "data/recipe_catalog.json.gz")
+RECIPE_CATALOG_MIN_SCORE = float(os.getenv("RECIPE_CATALOG_MIN_SCORE", "0.8"))
+
+# Background refresh of geocodes and forecasts for the most requested places (0 places disables it).
+# Only useful with a shared APP_CACHE_URL, since the weather server runs in its own processes.
+CACHE_WARM_TOP_N = int(os.getenv("WEATHER_WARM_TOP_N", "20"))
+CACHE_WARM_INTERVAL_S = float(os.getenv("WEATHER_WARM_INTERVAL_S", "300"))
+CACHE_WARM_CALLS_PER_HOUR = float(os.getenv("WEATHER_WARM_CALLS_PER_HOUR", "120"))
 
 weather_mcp = MCPServerStdio(
     command="python",
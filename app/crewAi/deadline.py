@@ -0,0 +1,84 @@
+import contextvars
+import math
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a stage does not finish within its share of the request budget."""
+
+    def __init__(self, stage: str, budget_s: float):
+        super().__init__(f"{stage} exceeded its {budget_s:.1f}s budget")
+        self.stage = stage
+        self.budget_s = budget_s
+
+
+class Deadline:
+    """Absolute per-request deadline; ``None`` means unbounded."""
+
+    def __init__(self, budget_s: Optional[float] = None):
+        self.budget_s = budget_s
+        self.expires_at = time.monotonic() + budget_s if budget_s is not None else math.inf
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def budget(self, stage_budget_s: Optional[float] = None) -> float:
+        """Time a stage may use: its own budget capped by what is left of the request."""
+        if stage_budget_s is None:
+            return self.remaining()
+        return min(stage_budget_s, self.remaining())
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline of the stage running in this context, or None outside ``call_with_timeout``."""
+    return _current_deadline.get()
+
+
+def call_with_timeout(stage: str, fn: Callable[[], Any], timeout_s: float) -> Any:
+    """Run ``fn`` on a daemon thread and stop waiting after ``timeout_s``.
+
+    The call itself cannot be cancelled; an overrunning call finishes in the
+    background and its result is discarded. Inside ``fn``, ``current_deadline()``
+    returns the stage's deadline so nested waits can stop at it.
+    """
+    if timeout_s <= 0:
+        raise DeadlineExceeded(stage, 0.0)
+    if math.isinf(timeout_s):
+        return fn()
+
+    outcome: dict = {}
+    done = threading.Event()
+    context = contextvars.copy_context()
+    deadline = Deadline(timeout_s)
+
+    def run() -> Any:
+        _current_deadline.set(deadline)
+        return fn()
+
+    def target() -> None:
+        try:
+            outcome["result"] = context.run(run)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    threading.Thread(target=target, name=f"stage-{stage}", daemon=True).start()
+    if not done.wait(timeout_s):
+        raise DeadlineExceeded(stage, timeout_s)
+    if "error" in outcome:
+        error = outcome["error"]
+        # A nested wait that gave up at the stage deadline (e.g. LLM admission) is the stage overrunning.
+        if isinstance(error, TimeoutError) and not isinstance(error, DeadlineExceeded) and deadline.expired:
+            raise DeadlineExceeded(stage, timeout_s) from error
+        raise error
+    return outcome["result"]
@@ -0,0 +1,313 @@
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from crewai.llms.base_llm import BaseLLM
+
+from .deadline import current_deadline
+from .telemetry import attribute_usage, current_span, estimate_tokens
+
+
+class Priority(IntEnum):
+    """Admission order for LLM calls; lower values go first."""
+
+    INTERACTIVE = 0
+    BATCH = 1
+    SPECULATIVE = 2
+
+
+class AdmissionTimeout(TimeoutError):
+    """Raised when a call waits longer than its admission timeout."""
+
+
+_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+@contextmanager
+def llm_priority(priority: Priority) -> Iterator[None]:
+    """Run LLM calls made inside the block (including crew kickoffs) at ``priority``."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Refills ``rate_per_min`` units per minute up to ``capacity``; may go into debt."""
+
+    def __init__(self, rate_per_min: float, burst_s: float = 10.0):
+        self.rate_per_s = rate_per_min / 60
+        self.capacity = max(1.0, self.rate_per_s * burst_s)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate_per_s)
+        self._updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` can be taken (requests above capacity wait for a full bucket)."""
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) / self.rate_per_s
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+    def drain(self) -> None:
+        self.level = min(self.level, 0.0)
+
+
+class LLMScheduler:
+    """Central admission control for LLM calls sharing one deployment quota.
+
+    Calls queue by priority (then arrival) and the head of the queue is admitted
+    once the request and token buckets allow it and a concurrency slot is free.
+    A 429 from upstream drains both buckets so every caller backs off together.
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max_concurrency
+        self._cond = threading.Condition()
+        self._queue: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._admitted: Dict[Priority, int] = defaultdict(int)
+        self._waits: Dict[Priority, Deque[float]] = defaultdict(lambda: deque(maxlen=1000))
+        self._rate_limited = 0
+
+    @classmethod
+    def from_env(cls) -> "LLMScheduler":
+        def number(name: str) -> Optional[float]:
+            value = os.getenv(name)
+            return float(value) if value else None
+
+        concurrency = number("AZURE_OPENAI_MAX_CONCURRENCY")
+        return cls(
+            rpm=number("AZURE_OPENAI_RPM"),
+            tpm=number("AZURE_OPENAI_TPM"),
+            max_concurrency=int(concurrency) if concurrency else None,
+        )
+
+    def _wait_time(self, tokens: int, now: float) -> Optional[float]:
+        if self.max_concurrency is not None and self._in_flight >= self.max_concurrency:
+            return None
+        waits = [0.0]
+        if self.requests:
+            waits.append(self.requests.time_until(1, now))
+        if self.tokens:
+            waits.append(self.tokens.time_until(tokens, now))
+        return max(waits)
+
+    def acquire(self, tokens: int, priority: Optional[Priority] = None, timeout: Optional[float] = None) -> float:
+        """Block until the call may run; returns the time spent queued in seconds."""
+        priority = current_priority() if priority is None else priority
+        ticket = (int(priority), next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_time(tokens, now) if self._queue[0] == ticket else None
+                    if wait == 0.0:
+                        heapq.heappop(self._queue)
+                        if self.requests:
+                            self.requests.take(1)
+                        if self.tokens:
+                            self.tokens.take(tokens)
+                        self._in_flight += 1
+                        break
+                    if timeout is not None:
+                        remaining = start + timeout - now
+                        if remaining <= 0:
+                            self._queue.remove(ticket)
+                            heapq.heapify(self._queue)
+                            raise AdmissionTimeout(f"LLM call not admitted within {timeout:.1f}s")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._cond.notify_all()
+            waited = time.monotonic() - start
+            self._admitted[priority] += 1
+            self._waits[priority].append(waited)
+        return waited
+
+    def release(self, estimated_tokens: int, actual_tokens: Optional[int] = None) -> None:
+        """Free the concurrency slot and settle the token bucket against actual usage."""
+        with self._cond:
+            self._in_flight -= 1
+            if self.tokens and actual_tokens is not None:
+                if actual_tokens < estimated_tokens:
+                    self.tokens.give(estimated_tokens - actual_tokens)
+                else:
+                    self.tokens.take(actual_tokens - estimated_tokens)
+            self._cond.notify_all()
+
+    def penalize(self) -> None:
+        """Record an upstream 429 and make every queued caller wait for a refill."""
+        with self._cond:
+            self._rate_limited += 1
+            for bucket in (self.requests, self.tokens):
+                if bucket:
+                    bucket.drain()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            depth: Dict[str, int] = {p.name.lower(): 0 for p in Priority}
+            for priority, _ in self._queue:
+                depth[Priority(priority).name.lower()] += 1
+            waits = {}
+            for priority, samples in self._waits.items():
+                ordered = sorted(samples)
+                waits[priority.name.lower()] = {
+                    "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+                    "p95_ms": round(ordered[max(0, int(len(ordered) * 0.95) - 1)] * 1000, 3),
+                    "max_ms": round(ordered[-1] * 1000, 3),
+                }
+            return {
+                "queue_depth": depth,
+                "in_flight": self._in_flight,
+                "admitted": {p.name.lower(): n for p, n in self._admitted.items()},
+                "wait": waits,
+                "rate_limited": self._rate_limited,
+            }
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    return status == 429 or "429" in str(error) or "ratelimit" in type(error).__name__.lower()
+
+
+class ScheduledLLM(BaseLLM):
+    """Wraps a CrewAI LLM so every call is admitted through an ``LLMScheduler``.
+
+    Everything except ``call`` is forwarded to the wrapped LLM, including writes
+    such as the executor setting ``stop``. Calls made inside a stage
+    (``call_with_timeout``) give up queueing at the stage's deadline, so an
+    abandoned stage does not spend rate limit after its request has moved on.
+    """
+
+    _own_attributes = {"inner", "scheduler", "expected_output_tokens"}
+
+    def __init__(self, inner: BaseLLM, scheduler: LLMScheduler, expected_output_tokens: int = 512):
+        object.__setattr__(self, "inner", inner)
+        object.__setattr__(self, "scheduler", scheduler)
+        object.__setattr__(self, "expected_output_tokens", expected_output_tokens)
+        attribute_usage(inner)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in ScheduledLLM._own_attributes:
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in ScheduledLLM._own_attributes:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.inner, name, value)
+
+    def _estimate(self, messages: Any) -> int:
+        max_tokens = getattr(self.inner, "max_tokens", None)
+        return estimate_tokens(messages) + (max_tokens or self.expected_output_tokens)
+
+    @staticmethod
+    def _admission_timeout() -> Optional[float]:
+        """What is left of the running stage's deadline, so a call never queues past it."""
+        deadline = current_deadline()
+        if deadline is None:
+            return None
+        if deadline.expired:
+            raise AdmissionTimeout("stage deadline passed before the LLM call was admitted")
+        return deadline.remaining()
+
+    @staticmethod
+    def _record_wait(waited: float) -> None:
+        span = current_span()
+        if span is not None:
+            span.add("llm.queue_wait_ms", round(waited * 1000, 3))
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        estimated = self._estimate(messages)
+        self._record_wait(self.scheduler.acquire(estimated, timeout=self._admission_timeout()))
+        actual = None
+        try:
+            response = self.inner.call(
+                messages,
+                tools=tools,
+                callbacks=callbacks,
+                available_functions=available_functions,
+                from_task=from_task,
+                from_agent=from_agent,
+                response_model=response_model,
+            )
+            actual = estimate_tokens(messages) + estimate_tokens(response)
+            return response
+        except Exception as e:
+            if _is_rate_limit(e):
+                self.scheduler.penalize()
+            raise
+        finally:
+            self.scheduler.release(estimated, actual)
+
+    async def acall(self, messages, **kwargs: Any) -> Any:
+        estimated = self._estimate(messages)
+        timeout = self._admission_timeout()
+        self._record_wait(await asyncio.to_thread(self.scheduler.acquire, estimated, current_priority(), timeout))
+        actual = None
+        try:
+            response = await self.inner.acall(messages, **kwargs)
+            actual = estimate_tokens(messages) + estimate_tokens(response)
+            return response
+        except Exception as e:
+            if _is_rate_limit(e):
+                self.scheduler.penalize()
+            raise
+        finally:
+            self.scheduler.release(estimated, actual)
+
+    def supports_function_calling(self) -> bool:
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+    def get_token_usage_summary(self) -> Any:
+        return self.inner.get_token_usage_summary()
@@ -1,21 +1,73 @@
 import json
-from typing import Any, Dict, Optional
+import logging
+import time
+from typing import Any, Dict, List, Optional
 
 from crewai import Crew
 
+from ..cache import CacheNamespace
 from .agents import (
     extractor_agent,
+    fresh_copy,
     place_finder_agent,
     recipe_agent,
     supervisor_agent,
     weather_agent,
 )
+from .cache_warmer import popularity
+from .catalog import get_catalog, weather_bucket
+from .config import (
+    CREW_PROFILE,
+    CREW_PROFILES,
+    RECIPE_CATALOG_MIN_SCORE,
+    RECIPE_CATALOG_PATH,
+    REQUEST_BUDGET_S,
+    STAGE_BUDGETS_S,
+    WEATHER_STALE_TTL_S,
+)
+from .deadline import Deadline, DeadlineExceeded, call_with_timeout
 from .tasks import (
     build_extract_task,
     build_places_task,
     build_recipe_task,
     build_weather_task,
 )
+from .telemetry import attribute_usage, install_listener, start_span, start_trace
+
+logger = logging.getLogger(__name__)
+
+# Last good weather summary per place, served when the weather stage overruns.
+_last_weather = CacheNamespace("weather_summary", ttl_s=WEATHER_STALE_TTL_S)
+
+# Fields of the compact weather record produced by the lean profile.
+WEATHER_FIELDS = ("temp_c", "min_c", "max_c", "humidity_pct", "wind_kmh", "rain_next_mm", "conditions")
+
+
+def _weather_record(raw: str) -> Dict[str, Any]:
+    """Parse the weather task's JSON record, falling back to the raw text as conditions."""
+    text = raw.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {"conditions": raw}
+    if not isinstance(data, dict) or not data.get("conditions"):
+        return {"conditions": raw}
+    record: Dict[str, Any] = {"conditions": str(data["conditions"])}
+    for key in WEATHER_FIELDS[:-1]:
+        value = data.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            record[key] = round(float(value), 1)
+    return record
+
+
+def _weather_input(weather: Dict[str, Any]) -> str:
+    """Weather as passed to the recipe/places prompts: the record as compact JSON, or plain text."""
+    if not weather.get("conditions"):
+        return "unknown"
+    record = {k: weather[k] for k in WEATHER_FIELDS if k in weather}
+    if len(record) == 1:
+        return str(record["conditions"])
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False)
 
 
 class RecipeCrew:
@@ -25,23 +77,158 @@ class RecipeCrew:
     - If action is missing: request clarification
     - prepare -> recipe agent
     - order -> place finder agent
+
+    Every call is traced with one span per stage plus the LLM and MCP tool
+    calls made inside it. Pass ``telemetry=True`` to attach the trace to the
+    returned dict under ``"telemetry"``.
+
+    Each request runs against a deadline (``deadline_s``, default
+    ``REQUEST_BUDGET_S``) split into per-stage budgets. When a stage overruns,
+    the request degrades instead of waiting: extraction falls back to the raw
+    text, weather falls back to a recent summary or is skipped, and the route
+    stage returns a partial result. Degradations are listed under ``"degraded"``.
+
+    ``prepare`` requests are answered from the precomputed recipe catalog when
+    the dish matches an entry confidently (``"recipe_source": "catalog"``) and
+    generated by the recipe agent otherwise (``"live"``).
+
+    ``profile`` (default ``RECIPE_CREW_PROFILE``) is ``"full"`` or ``"lean"``.
+    The lean profile leaves the idle supervisor out of the route crews, runs
+    crews without verbose output and has the weather stage return a compact
+    record instead of prose. ``verbose`` overrides the profile's console
+    output. ``run`` reports the prompt tokens of each stage under
+    ``"prompt_tokens"``.
+
+    Every weather lookup counts towards the place's popularity, which the
+    cache warmer (``start_cache_warmer``) uses to keep geocodes and forecasts
+    of the busiest places fresh in the shared cache.
     """
 
-    def extract_item_place(self, user_text: str, default_city: str = "Munich") -> Dict[str, str]:
-        extract_task = build_extract_task(extractor_agent)
+    def __init__(self, telemetry: bool = False, profile: Optional[str] = None, verbose: Optional[bool] = None):
+        profile = profile or CREW_PROFILE
+        if profile not in CREW_PROFILES:
+            raise ValueError(f"Unknown crew profile {profile!r}; expected one of {CREW_PROFILES}")
+        self.telemetry = telemetry
+        self.profile = profile
+        self.lean = profile == "lean"
+        self.verbose = not self.lean if verbose is None else verbose
+        install_listener()
+
+    def extract_item_place(
+        self,
+        user_text: str,
+        default_city: str = "Munich",
+        deadline_s: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        deadline = Deadline(deadline_s if deadline_s is not None else REQUEST_BUDGET_S)
+        with start_trace("extract_item_place") as trace:
+            result = self._extract_item_place(user_text, default_city, deadline)
+        return self._with_telemetry(result, trace)
+
+    def run(
+        self,
+        item_name: str,
+        place: str = "Munich",
+        action: Optional[str] = None,
+        deadline_s: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        deadline = Deadline(deadline_s if deadline_s is not None else REQUEST_BUDGET_S)
+        with start_trace("run", item_name=item_name, place=place, action=action or "") as trace:
+            result = self._run(item_name, place, action, deadline)
+        result["prompt_tokens"] = trace.prompt_tokens()
+        return self._with_telemetry(result, trace)
+
+    def _with_telemetry(self, result: Dict[str, Any], trace) -> Dict[str, Any]:
+        if self.telemetry:
+            result["telemetry"] = trace.to_dict()
+        return result
+
+    def _kickoff(self, stage: str, crew: Crew, inputs: Dict[str, Any], deadline: Deadline) -> Any:
+        budget_s = deadline.budget(STAGE_BUDGETS_S.get(stage))
+        for agent in crew.agents:
+            attribute_usage(agent.llm)
+        with start_span(stage, budget_s=round(budget_s, 3)):
+            return call_with_timeout(stage, lambda: crew.kickoff(inputs=inputs), budget_s)
+
+    def _route_agents(self, specialist) -> List[Any]:
+        # The supervisor has no task in the route crews; the lean profile leaves it out.
+        return [specialist] if self.lean else [fresh_copy(supervisor_agent, verbose=self.verbose), specialist]
+
+    def _catalog_recipe(self, item_name: str, weather: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # The catalog only saves a live generation; a broken one must not fail the request.
+        try:
+            with start_span("catalog_lookup") as span:
+                match = get_catalog(RECIPE_CATALOG_PATH).lookup(item_name, min_score=RECIPE_CATALOG_MIN_SCORE)
+                bucket = weather_bucket(weather)
+                recipe = match.recipe(bucket) if match else None
+                span.set(hit=recipe is not None, bucket=bucket)
+                if match:
+                    span.set(match=match.name, score=match.score)
+        except Exception:
+            logger.exception("recipe catalog lookup failed for %r; generating live", item_name)
+            return None
+        if recipe is None:
+            return None
+        return {"recipe": recipe, "catalog_match": match.name, "weather_bucket": bucket}
+
+    def _kickoff_route(
+        self, stage: str, crew: Crew, inputs: Dict[str, Any], deadline: Deadline, degraded: List[str]
+    ) -> None:
+        try:
+            self._kickoff(stage, crew, inputs, deadline)
+        except DeadlineExceeded as e:
+            degraded.append(f"{stage}: {e}")
+
+    def _fetch_weather(self, place: str, deadline: Deadline, degraded: List[str]) -> Dict[str, Any]:
+        popularity.record(place)
+        agent = fresh_copy(weather_agent, verbose=self.verbose)
+        weather_task = build_weather_task(agent, structured=self.lean)
+
+        weather_crew = Crew(
+            agents=[agent],
+            tasks=[weather_task],
+            verbose=self.verbose,
+        )
+        # MCP tool calls get a slice of the stage budget; the server caps it further.
+        tool_timeout_s = max(1.0, round(deadline.budget(STAGE_BUDGETS_S["weather_crew"]) / 3, 1))
+        try:
+            self._kickoff("weather_crew", weather_crew, {"place": place, "tool_timeout_s": tool_timeout_s}, deadline)
+        except Exception as e:
+            degraded.append(f"weather_crew: {e}")
+        else:
+            weather_summary = weather_task.output.raw if weather_task.output else None
+            if not weather_summary:
+                return {"conditions": None}
+            weather = _weather_record(weather_summary) if self.lean else {"conditions": weather_summary}
+            _last_weather.set(place, {**weather, "fetched_at": time.time()})
+            return weather
+
+        cached = _last_weather.get(place)
+        if cached:
+            fetched_at = cached.pop("fetched_at")
+            return {**cached, "stale": True, "age_s": round(time.time() - fetched_at)}
+        return {"conditions": None}
+
+    def _extract_item_place(self, user_text: str, default_city: str, deadline: Deadline) -> Dict[str, Any]:
+        agent = fresh_copy(extractor_agent, verbose=self.verbose)
+        extract_task = build_extract_task(agent)
 
         extract_crew = Crew(
-            agents=[extractor_agent],
+            agents=[agent],
             tasks=[extract_task],
-            verbose=True,
+            verbose=self.verbose,
         )
-        raw = str(extract_crew.kickoff(inputs={"user_text": user_text}))
-
+        degraded: List[str] = []
         try:
+            raw = str(self._kickoff("extract_item_place", extract_crew, {"user_text": user_text}, deadline))
             data = json.loads(raw)
             item_name = str(data.get("item_name") or "").strip()
             place_val = data.get("place")
             place = str(place_val).strip() if place_val is not None else ""
+        except DeadlineExceeded as e:
+            degraded.append(f"extract_item_place: {e}")
+            item_name = user_text.strip()
+            place = ""
         except Exception:
             item_name = user_text.strip()
             place = ""
@@ -49,21 +236,14 @@ class RecipeCrew:
         return {
             "item_name": item_name or user_text.strip(),
             "place": place or default_city,
+            "degraded": degraded,
         }
 
-    def run(self, item_name: str, place: str = "Munich", action: Optional[str] = None) -> Dict[str, Any]:
+    def _run(self, item_name: str, place: str, action: Optional[str], deadline: Deadline) -> Dict[str, Any]:
         normalized_action = (action or "").strip().lower()
 
-        weather_task = build_weather_task(weather_agent)
-
-        weather_crew = Crew(
-            agents=[weather_agent],
-            tasks=[weather_task],
-            verbose=True,
-        )
-        weather_crew.kickoff(inputs={"place": place})
-
-        weather_summary = weather_task.output.raw if weather_task.output else None
+        degraded: List[str] = []
+        weather = self._fetch_weather(place, deadline, degraded)
 
         if normalized_action not in {"order", "prepare"}:
             supervisor_prompt = (
@@ -74,47 +254,67 @@ class RecipeCrew:
                 "item_name": item_name,
                 "place": place,
                 "action": None,
-                "weather": {"conditions": weather_summary},
+                "weather": weather,
                 "clarification_needed": True,
                 "supervisor_prompt": supervisor_prompt,
+                "degraded": degraded,
             }
 
+        inputs = {"item_name": item_name, "place": place, "weather": _weather_input(weather)}
         if normalized_action == "prepare":
-            recipe_task = build_recipe_task(recipe_agent)
+            cached = self._catalog_recipe(item_name, weather)
+            if cached is not None:
+                return {
+                    "item_name": item_name,
+                    "place": place,
+                    "action": "prepare",
+                    "weather": weather,
+                    "clarification_needed": False,
+                    **cached,
+                    "recipe_source": "catalog",
+                    "degraded": degraded,
+                }
+
+            agent = fresh_copy(recipe_agent, verbose=self.verbose)
+            recipe_task = build_recipe_task(agent)
 
             route_crew = Crew(
-                agents=[supervisor_agent, recipe_agent],
+                agents=self._route_agents(agent),
                 tasks=[recipe_task],
-                verbose=True,
+                verbose=self.verbose,
             )
-            route_crew.kickoff(inputs={"item_name": item_name, "place": place})
+            self._kickoff_route("recipe_crew", route_crew, inputs, deadline, degraded)
 
             recipe_text = recipe_task.output.raw if recipe_task.output else "No recipe generated."
             return {
                 "item_name": item_name,
                 "place": place,
                 "action": "prepare",
-                "weather": {"conditions": weather_summary},
+                "weather": weather,
                 "clarification_needed": False,
                 "recipe": recipe_text,
+                "recipe_source": "live",
+                "degraded": degraded,
             }
 
-        places_task = build_places_task(place_finder_agent)
+        agent = fresh_copy(place_finder_agent, verbose=self.verbose)
+        places_task = build_places_task(agent)
 
         route_crew = Crew(
-            agents=[supervisor_agent, place_finder_agent],
+            agents=self._route_agents(agent),
             tasks=[places_task],
-            verbose=True,
+            verbose=self.verbose,
         )
-        route_crew.kickoff(inputs={"item_name": item_name, "place": place})
+        self._kickoff_route("places_crew", route_crew, inputs, deadline, degraded)
 
         places_text = places_task.output.raw if places_task.output else "No place suggestions available."
         return {
             "item_name": item_name,
             "place": place,
             "action": "order",
-            "weather": {"conditions": weather_summary},
+            "weather": weather,
             "clarification_needed": False,
             "places": places_text,
+            "degraded": degraded,
         }
 
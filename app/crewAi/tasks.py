@@ -17,18 +17,34 @@ def build_extract_task(agent) -> Task:
     )
 
 
-def build_weather_task(agent) -> Task:
+def build_weather_task(agent, structured: bool = False) -> Task:
+    if structured:
+        output = (
+            "Return ONLY compact JSON with this schema:\n"
+            '{"temp_c":number,"min_c":number,"max_c":number,"humidity_pct":number,"wind_kmh":number,"rain_next_mm":number,"conditions":"string"}\n'
+            "rain_next_mm is next_hours.precipitation_mm from the forecast. No markdown, no extra keys, no explanation."
+        )
+        expected_output = "Strict JSON weather record for {place}."
+    else:
+        output = (
+            "Return a concise summary with temperature, conditions, humidity, and wind speed. "
+            "Mention rain or a temperature swing the forecast's `next_hours` expects."
+        )
+        expected_output = (
+            "A short weather summary for {place} with temperature, conditions, humidity, and wind speed."
+        )
     return Task(
         description=(
             "Look up the current weather for **{place}**.\n"
             "Steps:\n"
             "1. Use the `get_city_coordinates` tool to get latitude and longitude for {place}.\n"
+            "   If it returns `fallback: true`, {place} could not be located: say the weather is unknown "
+            "rather than reporting the fallback city's weather.\n"
             "2. Use the `get_forecast` tool with those coordinates to get the current weather.\n"
-            "Return a concise summary with temperature, conditions, humidity, and wind speed."
-        ),
-        expected_output=(
-            "A short weather summary for {place} with temperature, conditions, humidity, and wind speed."
+            "Pass `timeout_s={tool_timeout_s}` to every tool call.\n"
+            + output
         ),
+        expected_output=expected_output,
         agent=agent,
     )
 
@@ -37,7 +53,7 @@ def build_recipe_task(agent) -> Task:
     return Task(
         description=(
             "You are given the following user request: **{item_name}**.\n"
-            "Current weather context for {place} is available from previous task output.\n\n"
+            "Current weather in {place}: {weather}\n\n"
             "Create a concise recipe including:\n"
             "- Dish name\n"
             "- Ingredients\n"
@@ -56,6 +72,7 @@ def build_places_task(agent) -> Task:
     return Task(
         description=(
             "Find places in **{place}** where the user can buy/order **{item_name}** or close matches.\n"
+            "Current weather: {weather}\n"
             "Use available OSM MCP tools to search relevant places.\n"
             "Return 3 options with: place name, area/address hint, type, and one-line match reason."
         ),
@@ -0,0 +1,465 @@
+import json
+import os
+import secrets
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from crewai.events import (
+    BaseEventListener,
+    LLMCallCompletedEvent,
+    LLMCallFailedEvent,
+    LLMCallStartedEvent,
+    MCPToolExecutionCompletedEvent,
+    MCPToolExecutionFailedEvent,
+    ToolUsageFinishedEvent,
+)
+from crewai.llms.base_llm import BaseLLM
+
+SERVICE_NAME = "recipe-crew"
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("recipe_crew_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("recipe_crew_span", default=None)
+
+
+def estimate_tokens(text: Any) -> int:
+    """Rough token estimate (~4 characters per token) for prompts and responses."""
+    if text is None:
+        return 0
+    if not isinstance(text, str):
+        text = json.dumps(text, default=str)
+    return (len(text) + 3) // 4
+
+
+def _to_ns(value: Optional[datetime]) -> int:
+    return int(value.timestamp() * 1_000_000_000) if value else time.time_ns()
+
+
+@dataclass
+class Span:
+    """A timed unit of work (crew stage, LLM call or MCP tool call)."""
+
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def add(self, key: str, amount: int = 1) -> None:
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "attributes": dict(self.attributes),
+            "error": self.error,
+        }
+
+
+class Trace:
+    """Collects the spans of a single RecipeCrew request."""
+
+    def __init__(self, name: str, **attributes: Any):
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._pending_llm: Dict[Tuple[Any, Any], Deque[Tuple[str, Any, Optional[Span]]]] = defaultdict(deque)
+        self.root = self._new_span(name, "request", None, time.time_ns(), attributes)
+
+    def _new_span(
+        self,
+        name: str,
+        kind: str,
+        parent: Optional[Span],
+        start_ns: int,
+        attributes: Dict[str, Any],
+    ) -> Span:
+        span = Span(
+            name=name,
+            kind=kind,
+            trace_id=self.trace_id,
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=start_ns,
+            attributes=dict(attributes),
+        )
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, kind: str = "stage", **attributes: Any) -> Iterator[Span]:
+        parent = _current_span.get() or self.root
+        span = self._new_span(name, kind, parent, time.time_ns(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self.finish_span(span)
+
+    def record_span(
+        self,
+        name: str,
+        kind: str,
+        start_ns: int,
+        end_ns: int,
+        parent: Optional[Span] = None,
+        error: Optional[str] = None,
+        **attributes: Any,
+    ) -> Span:
+        """Record an already-completed span, e.g. one reconstructed from CrewAI events."""
+        span = self._new_span(name, kind, parent or self.root, start_ns, attributes)
+        span.error = error
+        self.finish_span(span, end_ns)
+        return span
+
+    def finish_span(self, span: Span, end_ns: Optional[int] = None) -> None:
+        span.end_ns = end_ns if end_ns is not None else time.time_ns()
+        metrics.observe(span)
+
+    def prompt_tokens(self) -> Dict[str, int]:
+        """Prompt (input) tokens per stage span, e.g. ``{"weather_crew": 812}``."""
+        with self._lock:
+            spans = [s for s in self.spans if s.kind == "stage"]
+        totals: Dict[str, int] = {}
+        for span in spans:
+            tokens = span.attributes.get("gen_ai.usage.input_tokens")
+            if isinstance(tokens, int):
+                totals[span.name] = totals.get(span.name, 0) + tokens
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = [s.to_dict() for s in self.spans]
+        return {"trace_id": self.trace_id, "duration_ms": self.root.duration_ms, "spans": spans}
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Render the trace in the OTLP/JSON ``resourceSpans`` shape."""
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_otlp_attr("service.name", SERVICE_NAME)]},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [_otlp_span(s) for s in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+
+def _otlp_attr(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _otlp_span(span: Span) -> Dict[str, Any]:
+    data: Dict[str, Any] = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 3 if span.kind in {"llm", "tool"} else 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns or span.start_ns),
+        "attributes": [_otlp_attr("recipe_crew.kind", span.kind)]
+        + [_otlp_attr(k, v) for k, v in span.attributes.items() if v is not None],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        data["parentSpanId"] = span.parent_id
+    return data
+
+
+class MetricsRegistry:
+    """Process-wide aggregates of finished spans, rendered as Prometheus text."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._duration_sum: Dict[Tuple[str, str], float] = defaultdict(float)
+            self._duration_count: Dict[Tuple[str, str], int] = defaultdict(int)
+            self._errors: Dict[Tuple[str, str], int] = defaultdict(int)
+            self._tokens: Dict[Tuple[str, str], int] = defaultdict(int)
+            self._cache_hits: Dict[str, int] = defaultdict(int)
+
+    def observe(self, span: Span) -> None:
+        key = (span.name, span.kind)
+        with self._lock:
+            self._duration_sum[key] += (span.duration_ms or 0.0) / 1000
+            self._duration_count[key] += 1
+            if span.error:
+                self._errors[key] += 1
+            for token_type in ("input", "output"):
+                value = span.attributes.get(f"gen_ai.usage.{token_type}_tokens")
+                if isinstance(value, int):
+                    self._tokens[(span.name, token_type)] += value
+            hits = span.attributes.get("cache.hits")
+            if isinstance(hits, int):
+                self._cache_hits[span.name] += hits
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP recipe_crew_span_duration_seconds Time spent per RecipeCrew span.",
+            "# TYPE recipe_crew_span_duration_seconds summary",
+        ]
+        with self._lock:
+            for (name, kind), total in sorted(self._duration_sum.items()):
+                labels = f'name="{name}",kind="{kind}"'
+                lines.append(f"recipe_crew_span_duration_seconds_sum{{{labels}}} {total:.6f}")
+                lines.append(
+                    f"recipe_crew_span_duration_seconds_count{{{labels}}} {self._duration_count[(name, kind)]}"
+                )
+            lines += [
+                "# HELP recipe_crew_span_errors_total Spans that finished with an error.",
+                "# TYPE recipe_crew_span_errors_total counter",
+            ]
+            for (name, kind), count in sorted(self._errors.items()):
+                lines.append(f'recipe_crew_span_errors_total{{name="{name}",kind="{kind}"}} {count}')
+            lines += [
+                "# HELP recipe_crew_tokens_total LLM tokens attributed to a span.",
+                "# TYPE recipe_crew_tokens_total counter",
+            ]
+            for (name, token_type), count in sorted(self._tokens.items()):
+                lines.append(f'recipe_crew_tokens_total{{name="{name}",type="{token_type}"}} {count}')
+            lines += [
+                "# HELP recipe_crew_cache_hits_total Tool results served from the CrewAI tool cache.",
+                "# TYPE recipe_crew_cache_hits_total counter",
+            ]
+            for name, count in sorted(self._cache_hits.items()):
+                lines.append(f'recipe_crew_cache_hits_total{{name="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Trace]:
+    """Open a trace for one request; spans opened inside it attach to its root span."""
+    trace = Trace(name, **attributes)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    except Exception as e:
+        trace.root.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        trace.finish_span(trace.root)
+        _export(trace)
+
+
+@contextmanager
+def start_span(name: str, kind: str = "stage", **attributes: Any) -> Iterator[Span]:
+    """Open a span on the active trace, or a detached one when no trace is active."""
+    trace = current_trace()
+    if trace is None:
+        trace = Trace(name)
+        trace.root.kind = kind
+        trace.root.set(**attributes)
+        token = _current_span.set(trace.root)
+        try:
+            yield trace.root
+        finally:
+            _current_span.reset(token)
+            trace.finish_span(trace.root)
+        return
+    with trace.span(name, kind, **attributes) as span:
+        yield span
+
+
+def _export(trace: Trace) -> None:
+    path = os.getenv("RECIPE_CREW_TRACE_FILE")
+    if not path:
+        return
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(trace.to_otlp()) + "\n")
+    except OSError:
+        pass
+
+
+def _usage_value(usage_data: Dict[str, Any], *names: str) -> int:
+    for name in names:
+        value = usage_data.get(name)
+        if isinstance(value, int) and value:
+            return value
+    return 0
+
+
+def attribute_usage(llm: Any) -> None:
+    """Make ``llm`` add each call's reported token usage to the span active in the calling context.
+
+    CrewAI LLMs only keep cumulative counters, shared by every request using
+    the same instance, so a stage's usage cannot be read off them while other
+    requests run. Providers report each call's usage through
+    ``_track_token_usage_internal`` on the calling thread, which is hooked
+    here once per instance. A ``ScheduledLLM`` is unwrapped to its inner LLM.
+    """
+    inner = getattr(llm, "inner", None)
+    if isinstance(inner, BaseLLM):
+        llm = inner
+    if not isinstance(llm, BaseLLM) or getattr(llm._track_token_usage_internal, "attributes_usage", False):
+        return
+    track = llm._track_token_usage_internal
+
+    def track_and_attribute(usage_data: Dict[str, Any]) -> None:
+        track(usage_data)
+        span = current_span()
+        if span is None or current_trace() is None:
+            return
+        span.add("gen_ai.usage.input_tokens", _usage_value(usage_data, "prompt_tokens", "prompt_token_count", "input_tokens"))
+        span.add(
+            "gen_ai.usage.output_tokens",
+            _usage_value(usage_data, "completion_tokens", "candidates_token_count", "output_tokens"),
+        )
+        span.add("gen_ai.usage.cached_input_tokens", _usage_value(usage_data, "cached_tokens", "cached_prompt_tokens"))
+        span.add("gen_ai.requests")
+
+    track_and_attribute.attributes_usage = True
+    llm._track_token_usage_internal = track_and_attribute
+
+
+class TelemetryListener(BaseEventListener):
+    """Turns CrewAI LLM / MCP tool events into spans on the active trace."""
+
+    def setup_listeners(self, crewai_event_bus) -> None:
+        @crewai_event_bus.on(LLMCallStartedEvent)
+        def on_llm_started(source, event):
+            self._pair_llm(event, "start")
+
+        @crewai_event_bus.on(LLMCallCompletedEvent)
+        def on_llm_completed(source, event):
+            self._pair_llm(event, "end")
+
+        @crewai_event_bus.on(LLMCallFailedEvent)
+        def on_llm_failed(source, event):
+            self._pair_llm(event, "end")
+
+        @crewai_event_bus.on(MCPToolExecutionCompletedEvent)
+        def on_tool_completed(source, event):
+            self._record_tool(event, event.completed_at, None)
+
+        @crewai_event_bus.on(MCPToolExecutionFailedEvent)
+        def on_tool_failed(source, event):
+            self._record_tool(event, event.failed_at, event.error)
+
+        @crewai_event_bus.on(ToolUsageFinishedEvent)
+        def on_tool_usage(source, event):
+            span = current_span()
+            if span is not None and current_trace() is not None:
+                span.add("cache.hits" if event.from_cache else "cache.misses")
+
+    @staticmethod
+    def _pair_llm(event, phase: str) -> None:
+        # Handlers run on the event bus thread pool, so a completion can be
+        # observed before its start; pair them in FIFO order per agent/task.
+        trace = current_trace()
+        if trace is None:
+            return
+        key = (event.agent_id, event.task_id)
+        with trace._lock:
+            pending = trace._pending_llm[key]
+            if pending and pending[0][0] != phase:
+                other_phase, other, parent = pending.popleft()
+            else:
+                pending.append((phase, event, current_span()))
+                return
+        start, end = (other, event) if phase == "end" else (event, other)
+        error = getattr(end, "error", None)
+        trace.record_span(
+            "llm_call",
+            "llm",
+            _to_ns(start.timestamp),
+            _to_ns(end.timestamp),
+            parent=parent or current_span(),
+            error=error,
+            **{
+                "gen_ai.request.model": start.model,
+                "gen_ai.agent.role": start.agent_role,
+                "gen_ai.usage.input_tokens": estimate_tokens(start.messages),
+                "gen_ai.usage.output_tokens": estimate_tokens(getattr(end, "response", None)),
+                "gen_ai.usage.estimated": True,
+            },
+        )
+
+    @staticmethod
+    def _record_tool(event, finished_at: Optional[datetime], error: Optional[str]) -> None:
+        trace = current_trace()
+        if trace is None:
+            return
+        end_ns = _to_ns(finished_at)
+        start_ns = _to_ns(event.started_at) if event.started_at else end_ns
+        trace.record_span(
+            f"mcp.{event.tool_name}",
+            "tool",
+            start_ns,
+            end_ns,
+            parent=current_span(),
+            error=error,
+            **{"mcp.server": event.server_name, "mcp.tool": event.tool_name},
+        )
+
+
+_listener: Optional[TelemetryListener] = None
+_listener_lock = threading.Lock()
+
+
+def install_listener() -> TelemetryListener:
+    """Register the CrewAI event listener once per process."""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = TelemetryListener()
+        return _listener
@@ -6,12 +6,13 @@ from app.crewAi.agents import (
     supervisor_agent,
     weather_agent,
 )
-from app.crewAi.config import fetch_mcp, gpt_client, llm, osm_mcp, weather_mcp
+from app.crewAi.config import fetch_mcp, gpt_client, llm, llm_scheduler, osm_mcp, weather_mcp
 
 __all__ = [
     "RecipeCrew",
     "gpt_client",
     "llm",
+    "llm_scheduler",
     "weather_mcp",
     "fetch_mcp",
     "osm_mcp",
@@ -0,0 +1,182 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from app.cache import CacheNamespace
+
+T = TypeVar("T")
+
+# One request attempt; receives the timeout it may use.
+Request = Callable[[float], Awaitable[T]]
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+_EMPTY_STATE: Dict[str, Any] = {
+    "calls": 0,
+    "failures": 0,
+    "consecutive_failures": 0,
+    "rejected": 0,
+    "trips": 0,
+    "hedges": 0,
+    "hedge_wins": 0,
+    "opened_at": None,
+    "latencies_ms": [],
+}
+
+
+class Upstream:
+    """Hedged requests and a circuit breaker for one upstream endpoint.
+
+    A request that has not answered within the ``hedge_percentile`` of recent
+    latencies (at least ``min_hedge_delay_s``, once ``min_samples`` are known)
+    gets a second, identical request; the first success wins and the loser is
+    cancelled. After ``failure_threshold`` consecutive failures the circuit
+    opens and calls fail fast with ``CircuitOpenError``. After
+    ``reset_after_s`` one call is let through as a probe (unhedged): success
+    closes the circuit, failure keeps it open for another ``reset_after_s``.
+
+    The weather server runs in a new process for every tool call, so the
+    state lives in the shared cache (``APP_CACHE_URL``). Updates are
+    read-modify-write and may drop a count under contention.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_after_s: float = 30.0,
+        hedge_percentile: float = 95.0,
+        min_hedge_delay_s: float = 0.05,
+        min_samples: int = 20,
+        window: int = 100,
+        is_failure: Callable[[Exception], bool] = lambda e: True,
+        store: Optional[CacheNamespace] = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_after_s = reset_after_s
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay_s = min_hedge_delay_s
+        self.min_samples = min_samples
+        self.window = window
+        self.is_failure = is_failure
+        self.store = store or CacheNamespace("upstream", ttl_s=24 * 3600)
+
+    # ---- shared state ----
+
+    def _load(self) -> Dict[str, Any]:
+        return {**_EMPTY_STATE, **(self.store.get(self.name) or {})}
+
+    def _save(self, state: Dict[str, Any]) -> None:
+        self.store.set(self.name, state)
+
+    def reset(self) -> None:
+        self.store.delete(self.name)
+
+    def hedge_delay(self, latencies_ms: list) -> Optional[float]:
+        """Seconds to wait before hedging, or None while hedging is off or unmeasured."""
+        if self.hedge_percentile <= 0 or len(latencies_ms) < self.min_samples:
+            return None
+        return max(self.min_hedge_delay_s, float(np.percentile(latencies_ms, self.hedge_percentile)) / 1000)
+
+    # ---- calls ----
+
+    async def call(self, request: Request, timeout_s: float) -> Any:
+        state = self._load()
+        probing = False
+        if state["opened_at"] is not None:
+            if time.time() - state["opened_at"] < self.reset_after_s:
+                state["rejected"] += 1
+                self._save(state)
+                raise CircuitOpenError(
+                    f"{self.name} circuit open after {state['consecutive_failures']} consecutive failures"
+                )
+            # Half-open: this call probes; re-arm the timer so concurrent callers keep failing fast.
+            probing = True
+            state["opened_at"] = time.time()
+            self._save(state)
+
+        delay = None if probing else self.hedge_delay(state["latencies_ms"])
+        start = time.monotonic()
+        try:
+            result, hedged, hedge_won = await self._race(request, timeout_s, delay)
+        except Exception as e:
+            self._record(failed=self.is_failure(e), probing=probing)
+            raise
+        self._record(latency_ms=(time.monotonic() - start) * 1000, hedged=hedged, hedge_won=hedge_won)
+        return result
+
+    async def _race(self, request: Request, timeout_s: float, delay: Optional[float]) -> Tuple[Any, bool, bool]:
+        first = asyncio.ensure_future(request(timeout_s))
+        if delay is None or delay >= timeout_s:
+            return await first, False, False
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result(), False, False
+
+        # The hedge gets what is left of the caller's time budget.
+        second = asyncio.ensure_future(request(timeout_s - delay))
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result(), True, task is second
+                    error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise error
+
+    def _record(
+        self,
+        latency_ms: Optional[float] = None,
+        failed: bool = False,
+        probing: bool = False,
+        hedged: bool = False,
+        hedge_won: bool = False,
+    ) -> None:
+        state = self._load()
+        state["calls"] += 1
+        state["hedges"] += int(hedged)
+        state["hedge_wins"] += int(hedge_won)
+        if failed:
+            state["failures"] += 1
+            state["consecutive_failures"] += 1
+            if probing or state["consecutive_failures"] >= self.failure_threshold:
+                if state["opened_at"] is None:
+                    state["trips"] += 1
+                state["opened_at"] = time.time()
+        else:
+            # Any answer, even a client error, shows the endpoint is up.
+            state["consecutive_failures"] = 0
+            state["opened_at"] = None
+            if latency_ms is not None:
+                state["latencies_ms"] = (state["latencies_ms"] + [round(latency_ms, 1)])[-self.window:]
+        self._save(state)
+
+    def stats(self) -> Dict[str, Any]:
+        state = self._load()
+        latencies = state.pop("latencies_ms")
+        opened_at = state.pop("opened_at")
+        if opened_at is None:
+            circuit = "closed"
+        elif time.time() - opened_at < self.reset_after_s:
+            circuit = "open"
+        else:
+            circuit = "half_open"
+        delay = self.hedge_delay(latencies)
+        return {
+            "circuit": circuit,
+            **state,
+            "p50_ms": round(float(np.percentile(latencies, 50)), 1) if latencies else None,
+            "p95_ms": round(float(np.percentile(latencies, 95)), 1) if latencies else None,
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+        }
@@ -1,58 +1,262 @@
+import logging
+import os
+import sys
+import tempfile
+import time
 from typing import Any
 import httpx
+import numpy as np
 from mcp.server.fastmcp import FastMCP
 
-# Initialize FastMCP server
-mcp = FastMCP("weather")
+# Run as a script by the MCP client (python app/servers/weather_server.py).
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from app.cache import CacheNamespace, MemoryCache, SQLiteCache, get_cache, set_cache
+from app.servers.upstream import Upstream
+
+logger = logging.getLogger(__name__)
+
+# Initialize FastMCP server. Its log_level argument would override FASTMCP_LOG_LEVEL, so pass that through.
+mcp = FastMCP("weather", log_level=os.getenv("FASTMCP_LOG_LEVEL", "INFO"))
 
 # Constants
-OPENMETEO_API_BASE = "https://api.open-meteo.com/v1"
-GEOCODING_API_BASE = "https://geocoding-api.open-meteo.com/v1"
+OPENMETEO_API_BASE = os.getenv("OPENMETEO_API_BASE", "https://api.open-meteo.com/v1")
+GEOCODING_API_BASE = os.getenv("GEOCODING_API_BASE", "https://geocoding-api.open-meteo.com/v1")
+
+# The MCP client starts a new server process for every tool call. Without APP_CACHE_URL the
+# server keeps its caches, breaker state and latencies in this node-local SQLite file instead.
+SERVER_CACHE_PATH = os.getenv(
+    "WEATHER_SERVER_CACHE_PATH", os.path.join(tempfile.gettempdir(), "recipe-app-weather.db")
+)
+
+# Upper bounds for upstream calls; callers may ask for less via ``timeout_s``.
+FORECAST_TIMEOUT_S = float(os.getenv("WEATHER_FORECAST_TIMEOUT_S", "8"))
+GEOCODING_TIMEOUT_S = float(os.getenv("WEATHER_GEOCODING_TIMEOUT_S", "4"))
+
+def _is_outage(error: Exception) -> bool:
+    # Client errors (4xx other than 429) mean the endpoint answered; they do not count against it.
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    return True
+
+
+def _upstream(name: str) -> Upstream:
+    return Upstream(
+        name,
+        failure_threshold=int(os.getenv("WEATHER_BREAKER_FAILURES", "5")),
+        reset_after_s=float(os.getenv("WEATHER_BREAKER_RESET_S", "30")),
+        hedge_percentile=float(os.getenv("WEATHER_HEDGE_PERCENTILE", "95")),
+        min_hedge_delay_s=float(os.getenv("WEATHER_HEDGE_MIN_DELAY_S", "0.05")),
+        is_failure=_is_outage,
+    )
+
+
+# Slow requests are hedged and each endpoint has its own circuit breaker (see app/servers/upstream.py).
+_forecast_upstream = _upstream("openmeteo_forecast")
+_geocoding_upstream = _upstream("openmeteo_geocoding")
+
+# Last good responses with their fetch time. They are served as-is while younger than the fresh
+# windows below, and marked stale when an upstream call fails or times out. They live in the shared
+# cache (APP_CACHE_URL), so every server process sees them and the cache warmer can refresh them.
+_last_forecasts = CacheNamespace("forecast", ttl_s=float(os.getenv("WEATHER_STALE_TTL_S", "21600")))
+_last_coordinates = CacheNamespace("geocode", ttl_s=30 * 24 * 3600)
+FORECAST_FRESH_S = float(os.getenv("WEATHER_FORECAST_FRESH_S", "900"))
+GEOCODE_FRESH_S = float(os.getenv("WEATHER_GEOCODE_FRESH_S", str(7 * 24 * 3600)))
+
+# Hourly series per location and forecast run. Open-Meteo refreshes its models about hourly, so
+# window features for the same location within one run never need another upstream call.
+FORECAST_RUN_S = float(os.getenv("WEATHER_FORECAST_RUN_S", "3600"))
+_hourly_series = CacheNamespace("hourly", ttl_s=FORECAST_RUN_S)
+HOURLY_VARIABLES = ("temperature_2m", "precipitation", "weather_code")
+
+# Window summarised into ``get_forecast``'s ``next_hours``.
+NEXT_HOURS = int(os.getenv("WEATHER_NEXT_HOURS", "6"))
+WET_HOUR_MM = 0.1
+
+
+def _timeout(requested: float | None, cap: float) -> float:
+    if requested is None or requested <= 0:
+        return cap
+    return min(requested, cap)
+
+
+def _location_key(latitude: float, longitude: float) -> tuple:
+    return (round(latitude, 2), round(longitude, 2))
+
+
+def _hourly_key(latitude: float, longitude: float) -> tuple:
+    return (*_location_key(latitude, longitude), int(time.time() // FORECAST_RUN_S))
+
+
+def _fresh(entry: dict | None, fresh_s: float) -> bool:
+    return entry is not None and time.time() - entry.get("fetched_at", 0) < fresh_s
+
+
+def _public(entry: dict) -> dict:
+    return {k: v for k, v in entry.items() if k != "fetched_at"}
+
+
+def last_forecast(latitude: float, longitude: float) -> dict | None:
+    """Cached forecast for a location, including its ``fetched_at`` time."""
+    return _last_forecasts.get(_location_key(latitude, longitude))
+
+
+def last_coordinates(city: str) -> dict | None:
+    """Cached coordinates for a city name, including their ``fetched_at`` time."""
+    return _last_coordinates.get(city)
+
+
+async def _get_json(upstream: Upstream, url: str, params: dict, timeout_s: float) -> Any:
+    async def request(timeout: float) -> Any:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(url, params=params, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+
+    return await upstream.call(request, timeout_s)
+
+
+async def _fetch_forecasts(locations: list[tuple[float, float]], timeout_s: float | None) -> list[dict]:
+    """One upstream call for any number of locations (Open-Meteo takes comma-separated coordinates)."""
+    data = await _get_json(
+        _forecast_upstream,
+        f"{OPENMETEO_API_BASE}/forecast",
+        {
+            "latitude": ",".join(str(latitude) for latitude, _ in locations),
+            "longitude": ",".join(str(longitude) for _, longitude in locations),
+            "current": "temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m",
+            "hourly": ",".join(HOURLY_VARIABLES),
+            "daily": "weather_code,temperature_2m_max,temperature_2m_min",
+            "timezone": "auto"
+        },
+        _timeout(timeout_s, FORECAST_TIMEOUT_S),
+    )
+    # A single location comes back as an object, several as a list in request order.
+    results = data if isinstance(data, list) else [data]
+    if len(results) != len(locations):
+        raise ValueError(f"expected {len(locations)} forecasts, got {len(results)}")
+    return results
+
+
+async def _fetch_forecast(latitude: float, longitude: float, timeout_s: float | None) -> dict:
+    return (await _fetch_forecasts([(latitude, longitude)], timeout_s))[0]
+
+
+def _remember_hourly(latitude: float, longitude: float, data: dict) -> dict | None:
+    """Cache the hourly arrays of a forecast response; returns them, or None if there are none."""
+    hourly = data.get("hourly") or {}
+    if not hourly.get("time"):
+        return None
+    series = {name: hourly.get(name) or [] for name in ("time", *HOURLY_VARIABLES)}
+    series["current_time"] = (data.get("current") or {}).get("time")
+    _hourly_series.set(_hourly_key(latitude, longitude), series)
+    return series
+
+
+def _rounded(reduce: Any, values: np.ndarray) -> float | None:
+    values = values[~np.isnan(values)]
+    return round(float(reduce(values)), 1) if values.size else None
+
+
+def hourly_features(series: dict, start: str | None = None, hours: int = NEXT_HOURS) -> dict:
+    """Summarise the hourly forecast over ``hours`` hours from ``start``.
+
+    ``start`` is a local ISO time ("2026-01-01T18:00"), truncated to the hour;
+    it defaults to the forecast's current hour. Temperatures are min/max/mean,
+    precipitation is the window total, and the dominant condition is the most
+    frequent weather code (ties go to the more severe, higher code).
+    """
+    times = np.asarray(series["time"], dtype="datetime64[m]")
+    begin = np.datetime64(start or series.get("current_time") or series["time"][0], "m").astype("datetime64[h]")
+    window = (times >= begin) & (times < begin + np.timedelta64(max(1, hours), "h"))
+    if not window.any():
+        raise ValueError(f"no hourly forecast from {begin}")
+
+    def column(name: str) -> np.ndarray:
+        values = np.asarray(series[name], dtype=float)
+        if values.shape != times.shape:
+            raise ValueError(f"hourly {name} has {values.size} values for {times.size} times")
+        return values[window]
+
+    temperature = column("temperature_2m")
+    precipitation = column("precipitation")
+    codes = column("weather_code")
+    codes = codes[~np.isnan(codes)].astype(int)
+
+    dominant = None
+    if codes.size:
+        values, counts = np.unique(codes, return_counts=True)
+        dominant = int(values[len(counts) - 1 - np.argmax(counts[::-1])])
+    wet = times[window][precipitation >= WET_HOUR_MM]
+    return {
+        "start": str(begin.astype("datetime64[m]")),
+        "hours": int(window.sum()),
+        "min_temp_c": _rounded(np.min, temperature),
+        "max_temp_c": _rounded(np.max, temperature),
+        "mean_temp_c": _rounded(np.mean, temperature),
+        "precipitation_mm": round(float(np.nansum(precipitation)), 1),
+        "wet_hours": int(wet.size),
+        "first_wet_hour": str(wet[0]) if wet.size else None,
+        "conditions": interpret_weather_code(dominant),
+    }
+
+
+def _store_forecast(latitude: float, longitude: float, data: dict) -> dict:
+    """Format one forecast response and cache it (with its hourly series); returns the forecast."""
+    current = data.get("current", {})
+    daily = data.get("daily", {})
+
+    # Format the forecast
+    forecast_info = {
+        "current_temperature_c": current.get("temperature_2m"),
+        "humidity_percent": current.get("relative_humidity_2m"),
+        "weather_code": current.get("weather_code"),
+        "wind_speed_kmh": current.get("wind_speed_10m"),
+        "conditions": interpret_weather_code(current.get("weather_code")),
+        "max_temp_c": daily.get("temperature_2m_max", [None])[0],
+        "min_temp_c": daily.get("temperature_2m_min", [None])[0]
+    }
+
+    series = _remember_hourly(latitude, longitude, data)
+    if series is not None:
+        try:
+            forecast_info["next_hours"] = hourly_features(series)
+        except ValueError:
+            pass
+
+    _last_forecasts.set(_location_key(latitude, longitude), {**forecast_info, "fetched_at": time.time()})
+    return forecast_info
+
+
+async def refresh_forecasts(locations: list[tuple[float, float]], timeout_s: float | None = None) -> int:
+    """Fetch and cache the forecasts for ``locations`` in one upstream call; returns how many were cached."""
+    if not locations:
+        return 0
+    for (latitude, longitude), data in zip(locations, await _fetch_forecasts(locations, timeout_s)):
+        _store_forecast(latitude, longitude, data)
+    return len(locations)
+
 
 @mcp.tool()
-async def get_forecast(latitude: float, longitude: float) -> dict:
+async def get_forecast(latitude: float, longitude: float, timeout_s: float | None = None) -> dict:
     """Get weather forecast for a location using Open-Meteo API.
 
     Args:
         latitude: Latitude of the location
         longitude: Longitude of the location
+        timeout_s: Optional time budget in seconds for the upstream call
 
     Returns:
-        Dictionary with current weather and forecast information
+        Dictionary with current weather and forecast information, including a
+        ``next_hours`` summary of the coming hours when hourly data is available
     """
+    cached = last_forecast(latitude, longitude)
+    if _fresh(cached, FORECAST_FRESH_S):
+        return _public(cached)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{OPENMETEO_API_BASE}/forecast",
-                params={
-                    "latitude": latitude,
-                    "longitude": longitude,
-                    "current": "temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m",
-                    "hourly": "temperature_2m,precipitation,weather_code",
-                    "daily": "weather_code,temperature_2m_max,temperature_2m_min",
-                    "timezone": "auto"
-                },
-                timeout=30.0
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            current = data.get("current", {})
-            daily = data.get("daily", {})
-
-            # Format the forecast
-            forecast_info = {
-                "current_temperature_c": current.get("temperature_2m"),
-                "humidity_percent": current.get("relative_humidity_2m"),
-                "weather_code": current.get("weather_code"),
-                "wind_speed_kmh": current.get("wind_speed_10m"),
-                "conditions": interpret_weather_code(current.get("weather_code")),
-                "max_temp_c": daily.get("temperature_2m_max", [None])[0],
-                "min_temp_c": daily.get("temperature_2m_min", [None])[0]
-            }
-
-            return forecast_info
+        return _store_forecast(latitude, longitude, await _fetch_forecast(latitude, longitude, timeout_s))
     except Exception as e:
+        if cached:
+            return {**_public(cached), "stale": True, "error": f"Unable to fetch forecast: {str(e)}"}
         return {
             "error": f"Unable to fetch forecast: {str(e)}",
             "current_temperature_c": 20,
@@ -60,54 +264,115 @@ async def get_forecast(latitude: float, longitude: float) -> dict:
         }
 
 @mcp.tool()
-async def get_city_coordinates(city: str) -> dict:
+async def get_hourly_features(
+    latitude: float,
+    longitude: float,
+    start: str | None = None,
+    hours: int = NEXT_HOURS,
+    timeout_s: float | None = None,
+) -> dict:
+    """Summarise the hourly forecast for a time window (e.g. the hours around dinner).
+
+    Args:
+        latitude: Latitude of the location
+        longitude: Longitude of the location
+        start: Optional local start time such as "2026-01-01T18:00" (default: now)
+        hours: Length of the window in hours
+        timeout_s: Optional time budget in seconds for the upstream call
+
+    Returns:
+        Dictionary with min/max/mean temperature, total precipitation, wet hours
+        and the dominant conditions over the window
+    """
+    series = _hourly_series.get(_hourly_key(latitude, longitude))
+    if series is None:
+        try:
+            series = _remember_hourly(latitude, longitude, await _fetch_forecast(latitude, longitude, timeout_s))
+        except Exception as e:
+            return {"error": f"Unable to fetch hourly forecast: {str(e)}"}
+        if series is None:
+            return {"error": "No hourly forecast available"}
+    try:
+        return hourly_features(series, start, hours)
+    except ValueError as e:
+        return {"error": f"Invalid forecast window: {str(e)}"}
+
+
+# Returned when a city cannot be geocoded; ``fallback`` tells callers these are not its coordinates.
+_FALLBACK_COORDINATES = {
+    "latitude": 48.1351,
+    "longitude": 11.5820,
+    "name": "Munich",
+    "country": "Germany",
+    "fallback": True,
+}
+
+
+async def fetch_coordinates(city: str, timeout_s: float | None = None) -> dict | None:
+    """Geocode ``city`` upstream and cache the result; None when no place matches."""
+    data = await _get_json(
+        _geocoding_upstream,
+        f"{GEOCODING_API_BASE}/search",
+        {
+            "name": city,
+            "count": 1,
+            "language": "en",
+            "format": "json"
+        },
+        _timeout(timeout_s, GEOCODING_TIMEOUT_S),
+    )
+
+    if not data.get("results"):
+        return None
+    result = data["results"][0]
+    coordinates = {
+        "latitude": result["latitude"],
+        "longitude": result["longitude"],
+        "name": result.get("name"),
+        "country": result.get("country")
+    }
+    _last_coordinates.set(city, {**coordinates, "fetched_at": time.time()})
+    return coordinates
+
+
+@mcp.tool()
+async def get_city_coordinates(city: str, timeout_s: float | None = None) -> dict:
     """Get latitude and longitude for a city name.
 
     Args:
         city: Name of the city (e.g., "Munich", "New York", "Tokyo")
+        timeout_s: Optional time budget in seconds for the upstream call
 
     Returns:
-        Dictionary with latitude, longitude, and city name
+        Dictionary with latitude, longitude, and city name; Munich with
+        ``fallback: true`` and an ``error`` when the city cannot be geocoded
     """
+    cached = last_coordinates(city)
+    if _fresh(cached, GEOCODE_FRESH_S):
+        return _public(cached)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{GEOCODING_API_BASE}/search",
-                params={
-                    "name": city,
-                    "count": 1,
-                    "language": "en",
-                    "format": "json"
-                },
-                timeout=10.0
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            if data.get("results") and len(data["results"]) > 0:
-                result = data["results"][0]
-                return {
-                    "latitude": result["latitude"],
-                    "longitude": result["longitude"],
-                    "name": result.get("name"),
-                    "country": result.get("country")
-                }
-            else:
-                # Default to Munich if city not found
-                return {
-                    "latitude": 48.1351,
-                    "longitude": 11.5820,
-                    "name": "Munich",
-                    "country": "Germany"
-                }
+        coordinates = await fetch_coordinates(city, timeout_s)
+        if coordinates:
+            return coordinates
+        # Default to Munich if city not found
+        return {**_FALLBACK_COORDINATES, "error": f"No place found for {city!r}"}
     except Exception as e:
+        if cached:
+            return {**_public(cached), "stale": True}
         # Fallback to Munich
-        return {
-            "latitude": 48.1351,
-            "longitude": 11.5820,
-            "name": "Munich",
-            "country": "Germany"
-        }
+        return {**_FALLBACK_COORDINATES, "error": f"Unable to geocode {city!r}: {str(e)}"}
+
+def upstream_stats() -> dict:
+    """Hedging and circuit-breaker activity per Open-Meteo endpoint, for operators.
+
+    Not an MCP tool: the agent has no use for it, and every tool is described
+    in the prompt of each weather call.
+
+    Returns:
+        Dictionary per endpoint with circuit state, call/failure/rejection
+        counts, hedges fired and won, and recent p50/p95 latency
+    """
+    return {upstream.name: upstream.stats() for upstream in (_forecast_upstream, _geocoding_upstream)}
 
 def interpret_weather_code(code: int) -> str:
     """Convert WMO Weather interpretation codes to readable strings."""
@@ -143,6 +408,18 @@ def interpret_weather_code(code: int) -> str:
 
     return weather_codes.get(code, f"Weather code {code}")
 
+def use_server_cache() -> None:
+    """Give this server process a cache that outlives it (see ``SERVER_CACHE_PATH``)."""
+    if not os.getenv("APP_CACHE_URL"):
+        set_cache(SQLiteCache(SERVER_CACHE_PATH))
+    elif isinstance(get_cache(), MemoryCache):
+        logger.warning(
+            "APP_CACHE_URL=memory:// in the weather server: fresh/stale results, circuit breakers and "
+            "hedging latencies are lost when this tool call's process exits"
+        )
+
+
 if __name__ == "__main__":
     # Initialize and run the server
+    use_server_cache()
     mcp.run(transport='stdio')
\ No newline at end of file
@@ -0,0 +1,160 @@
+import re
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_CITY = "Munich"
+
+GREETING = "Hi! Tell me what you want and where (example: **pizza in Berlin**)."
+
+# Messages rendered in full; older ones are kept as one-line headlines (at most ARCHIVE_LIMIT).
+HISTORY_WINDOW = 20
+ARCHIVE_LIMIT = 200
+
+
+# What the user is told when a stage overran its budget (keyed by stage name).
+DEGRADED_NOTES = {
+    "extract_item_place": "Reading your request took too long, so I used it as typed.",
+    "weather_crew": "Live weather was unavailable.",
+    "recipe_crew": "The recipe took too long, please retry.",
+    "places_crew": "The place search took too long, please retry.",
+}
+
+
+# Utility: detect URL in text
+def extract_url(text: str) -> str | None:
+    url_pattern = r"https?://[\w.-]+(?:/[\w.-]*)*\??(?:[\w.=&%-]+)?"
+    match = re.search(url_pattern, text)
+    return match.group(0) if match else None
+
+
+def handle_turn(
+    recipe_crew: Any,
+    user_text: str,
+    pending: Optional[Dict[str, str]],
+    degraded: Optional[List[str]] = None,
+) -> Tuple[str, Optional[Dict[str, str]]]:
+    """Run one chat turn of the extract -> clarify -> route conversation.
+
+    Returns the assistant reply and the pending request to keep for the next turn
+    (``None`` once a request has been routed). Stages that overran their budget
+    during the turn are appended to ``degraded`` when given, and the reply ends
+    with a note saying what was cut short.
+    """
+    if degraded is None:
+        degraded = []
+    first = len(degraded)
+    url = extract_url(user_text)
+    if url:
+        return f"Detected URL: {url}. URL flow is not implemented in this mode.", pending
+
+    # Step 1: collect item + place and ask action
+    if not pending:
+        extracted = recipe_crew.extract_item_place(user_text, default_city=DEFAULT_CITY)
+        degraded.extend(extracted.get("degraded", []))
+        item_name = extracted.get("item_name", "").strip()
+        place = extracted.get("place", DEFAULT_CITY).strip() or DEFAULT_CITY
+        if not item_name:
+            return "Please tell me an item and city, for example: **ramen in Tokyo**.", None
+
+        pending = {"item_name": item_name, "place": place}
+        precheck = recipe_crew.run(item_name=item_name, place=place, action=None)
+        degraded.extend(precheck.get("degraded", []))
+        supervisor_prompt = precheck.get(
+            "supervisor_prompt",
+            f"Got it - you want '{item_name}' in {place}. Would you like to **order** or **prepare**?",
+        )
+        conditions = _conditions(precheck)
+        reply = (
+            f"**Item:** {item_name}  \n"
+            f"**City:** {place}  \n"
+            f"**Weather context:** {conditions}\n\n"
+            f"{supervisor_prompt}"
+        )
+        return reply + degraded_note(degraded[first:]), pending
+
+    # Step 2: route by action
+    action = user_text.strip().lower()
+    if action not in {"order", "prepare"}:
+        return "Please reply with exactly one option: **order** or **prepare**.", pending
+
+    item_name = pending["item_name"]
+    place = pending["place"]
+    result = recipe_crew.run(item_name=item_name, place=place, action=action)
+    degraded.extend(result.get("degraded", []))
+    conditions = _conditions(result)
+
+    if action == "prepare":
+        recipe = result.get("recipe", "No recipe generated.")
+        reply = (
+            f"**Item:** {item_name}  \n"
+            f"**City:** {place}  \n"
+            f"**Weather:** {conditions}\n\n"
+            f"**Recipe:**\n{recipe}"
+        )
+    else:
+        places = result.get("places", "No place suggestions available.")
+        reply = (
+            f"**Item:** {item_name}  \n"
+            f"**City:** {place}  \n"
+            f"**Weather:** {conditions}\n\n"
+            f"**Places to order/buy nearby:**\n{places}"
+        )
+    return reply + degraded_note(degraded[first:]), None
+
+
+def _conditions(result: Dict[str, Any]) -> str:
+    weather_info = result.get("weather", {})
+    if not isinstance(weather_info, dict) or not weather_info.get("conditions"):
+        return "Unknown"
+    conditions = weather_info["conditions"]
+    # Compact weather record (lean crew profile)
+    if weather_info.get("temp_c") is not None:
+        conditions = f"{conditions}, {weather_info['temp_c']:g}°C"
+    if weather_info.get("stale"):
+        return f"{conditions} (cached)"
+    return conditions
+
+
+def degraded_note(degraded: List[str]) -> str:
+    """Reply suffix for stages that overran their budget (``"stage: reason"`` entries), or ``""``."""
+    notes = []
+    for entry in degraded:
+        note = DEGRADED_NOTES.get(entry.split(":", 1)[0], "Part of this answer took too long, please retry.")
+        if note not in notes:
+            notes.append(note)
+    return f"\n\n_{' '.join(notes)}_" if notes else ""
+
+
+def headline(message: Dict[str, str], width: int = 80) -> str:
+    """One-line summary of a chat message for the compacted history."""
+    lines = [line.strip() for line in message["content"].replace("**", "").splitlines() if line.strip()]
+    text = " / ".join(lines[:2]) if lines else ""
+    if len(text) > width:
+        text = text[: width - 1].rstrip() + "…"
+    speaker = "You" if message["role"] == "user" else "Assistant"
+    return f"{speaker}: {text}"
+
+
+def compact_history(
+    messages: List[Dict[str, str]],
+    archive: List[str],
+    window: int = HISTORY_WINDOW,
+    archive_limit: int = ARCHIVE_LIMIT,
+) -> Tuple[List[Dict[str, str]], List[str]]:
+    """Move messages beyond the last ``window`` into ``archive`` as headlines.
+
+    Keeps the work done on every Streamlit rerun flat however long the session gets.
+    """
+    overflow = len(messages) - window
+    if overflow <= 0:
+        return messages, archive
+    archive = (archive + [headline(m) for m in messages[:overflow]])[-archive_limit:]
+    return messages[overflow:], archive
+
+
+def finish_turn(job: Future, pending: Optional[Dict[str, str]]) -> Tuple[str, Optional[Dict[str, str]]]:
+    """Result of a background ``handle_turn``; a failed turn keeps the pending request."""
+    try:
+        return job.result()
+    except Exception as e:
+        return f"Sorry, that request failed ({type(e).__name__}). Please try again.", pending
@@ -2,25 +2,43 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 from dotenv import load_dotenv
 from app.crewAi import RecipeCrew
+from app.crewAi.cache_warmer import CacheWarmer, start_cache_warmer
+from app.streamlit.conversation import GREETING, compact_history, finish_turn, handle_turn
 
 load_dotenv()
 
+# How often a running request is polled, and how many requests run at once per process.
+POLL_INTERVAL_S = float(os.getenv("STREAMLIT_POLL_INTERVAL_S", "0.5"))
+MAX_WORKERS = int(os.getenv("STREAMLIT_MAX_WORKERS", "8"))
+
 st.set_page_config(page_title="Cuisine Recommender (LLM)", page_icon="🍽️")
 st.title("Weather based Dish Recommender")
 
-# Utility: detect URL in text
-def extract_url(text: str) -> str | None:
-    url_pattern = r"https?://[\w.-]+(?:/[\w.-]*)*\??(?:[\w.=&%-]+)?"
-    match = re.search(url_pattern, text)
-    return match.group(0) if match else None
 
+# ---- Shared resources (created once per process, not on every rerun) ----
+@st.cache_resource
+def get_recipe_crew() -> RecipeCrew:
+    return RecipeCrew()
+
+
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="recipe-turn")
+
+
+@st.cache_resource
+def get_cache_warmer() -> CacheWarmer | None:
+    return start_cache_warmer()
 
-# Instantiate orchestrator
-recipe_crew = RecipeCrew()
+
+recipe_crew = get_recipe_crew()
+get_cache_warmer()
 
 
 # ---- Session state ----
@@ -28,99 +46,65 @@ if "messages" not in st.session_state:
     st.session_state.messages = [
         {
             "role": "assistant",
-            "content": "Hi! Tell me what you want and where (example: **pizza in Berlin**)."
+            "content": GREETING
         }
     ]
 
+if "archive" not in st.session_state:
+    st.session_state.archive = []
+
 if "pending_request" not in st.session_state:
     st.session_state.pending_request = None
 
+if "job" not in st.session_state:
+    st.session_state.job = None
+
+
+def add_message(role: str, content: str) -> None:
+    st.session_state.messages.append({"role": role, "content": content})
+    st.session_state.messages, st.session_state.archive = compact_history(
+        st.session_state.messages, st.session_state.archive
+    )
+
+
+# Render history: older turns as headlines, the recent window in full
+if st.session_state.archive:
+    with st.expander(f"Earlier messages ({len(st.session_state.archive)})"):
+        st.markdown("\n".join(f"- {line}" for line in st.session_state.archive))
 
-# Render history
 for m in st.session_state.messages:
     with st.chat_message(m["role"]):
         st.markdown(m["content"])
 
 
-user_text = st.chat_input("Type your request...")
-
-if user_text:
-    st.session_state.messages.append({"role": "user", "content": user_text})
-    with st.chat_message("user"):
-        st.markdown(user_text)
-
-    with st.chat_message("assistant"):
-        with st.spinner("Processing your request..."):
-            url = extract_url(user_text)
-            if url:
-                reply = f"Detected URL: {url}. URL flow is not implemented in this mode."
-                st.markdown(reply)
-                st.session_state.messages.append({"role": "assistant", "content": reply})
-            else:
-                pending = st.session_state.pending_request
-
-                # Step 1: collect item + place and ask action
-                if not pending:
-                    extracted = recipe_crew.extract_item_place(user_text, default_city="Munich")
-                    item_name = extracted.get("item_name", "").strip()
-                    place = extracted.get("place", "Munich").strip() or "Munich"
-                    if not item_name:
-                        reply = "Please tell me an item and city, for example: **ramen in Tokyo**."
-                        st.markdown(reply)
-                        st.session_state.messages.append({"role": "assistant", "content": reply})
-                    else:
-                        st.session_state.pending_request = {"item_name": item_name, "place": place}
-                        precheck = recipe_crew.run(item_name=item_name, place=place, action=None)
-                        supervisor_prompt = precheck.get(
-                            "supervisor_prompt",
-                            f"Got it - you want '{item_name}' in {place}. Would you like to **order** or **prepare**?",
-                        )
-                        weather_info = precheck.get("weather", {})
-                        conditions = weather_info.get("conditions", "Unknown") if isinstance(weather_info, dict) else "Unknown"
-                        reply = (
-                            f"**Item:** {item_name}  \n"
-                            f"**City:** {place}  \n"
-                            f"**Weather context:** {conditions}\n\n"
-                            f"{supervisor_prompt}"
-                        )
-                        st.markdown(reply)
-                        st.session_state.messages.append({"role": "assistant", "content": reply})
-
-                # Step 2: route by action
-                else:
-                    action = user_text.strip().lower()
-                    if action not in {"order", "prepare"}:
-                        reply = "Please reply with exactly one option: **order** or **prepare**."
-                        st.markdown(reply)
-                        st.session_state.messages.append({"role": "assistant", "content": reply})
-                    else:
-                        item_name = pending["item_name"]
-                        place = pending["place"]
-                        result = recipe_crew.run(item_name=item_name, place=place, action=action)
-
-                        weather_info = result.get("weather", {})
-                        conditions = weather_info.get("conditions", "Unknown") if isinstance(weather_info, dict) else "Unknown"
-
-                        if action == "prepare":
-                            recipe = result.get("recipe", "No recipe generated.")
-                            reply = (
-                                f"**Item:** {item_name}  \n"
-                                f"**City:** {place}  \n"
-                                f"**Weather:** {conditions}\n\n"
-                                f"**Recipe:**\n{recipe}"
-                            )
-                        else:
-                            places = result.get("places", "No place suggestions available.")
-                            reply = (
-                                f"**Item:** {item_name}  \n"
-                                f"**City:** {place}  \n"
-                                f"**Weather:** {conditions}\n\n"
-                                f"**Places to order/buy nearby:**\n{places}"
-                            )
-
-                        st.markdown(reply)
-                        st.session_state.messages.append({"role": "assistant", "content": reply})
-                        st.session_state.pending_request = None
+@st.fragment(run_every=POLL_INTERVAL_S)
+def show_running_turn() -> None:
+    job = st.session_state.job
+    if job is None:
+        return
+    if not job.done():
+        with st.chat_message("assistant"):
+            st.markdown(f"_Processing your request... {time.monotonic() - st.session_state.job_started:.0f}s_")
+        return
+    reply, st.session_state.pending_request = finish_turn(job, st.session_state.pending_request)
+    st.session_state.job = None
+    add_message("assistant", reply)
+    st.rerun()
+
+
+user_text = st.chat_input("Type your request...", disabled=st.session_state.job is not None)
+
+if user_text and st.session_state.job is None:
+    add_message("user", user_text)
+    st.session_state.job = get_executor().submit(
+        handle_turn, recipe_crew, user_text, st.session_state.pending_request
+    )
+    st.session_state.job_started = time.monotonic()
+    # Rerun so the message shows in the history and the input is disabled while the crew works.
+    st.rerun()
+
+if st.session_state.job is not None:
+    show_running_turn()
 
 
 st.markdown(
@@ -0,0 +1,231 @@
+"""Concurrent-session load generator for the chat flow in ``streamlit_app.py``.
+
+Each simulated user runs the two-turn conversation through
+``app.streamlit.conversation.handle_turn`` (extract -> clarify, think, route)
+against a shared ``RecipeCrew`` backed by the offline stubs.
+
+    python -m benchmarks.loadgen --users 1,2,4,8,16            # closed loop: N users with think time
+    python -m benchmarks.loadgen --arrival-rate 1,2,4,8         # open loop: Poisson session arrivals/s
+
+The fake LLM answers without tool calls, so weather-server and upstream
+(Open-Meteo) latency is covered by ``benchmarks.run`` (``run_prepare_mcp``)
+rather than here.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .stats import summarize
+from .stubs import FakeLLM, configure_offline_env, offline_agents
+
+TURNS = ("clarify", "route")
+
+# (turn, latency_ms, error, degraded): a degraded turn answered in time but skipped or cut a stage.
+TurnResult = Tuple[str, float, Optional[str], bool]
+
+
+def run_session(crew: Any, action: str, think_time_s: float, rng: random.Random, queued_at: float = None) -> List[TurnResult]:
+    """Play one conversation; latency of the first turn includes any time spent queued."""
+    from app.streamlit.conversation import handle_turn
+
+    results: List[TurnResult] = []
+    pending = None
+    for turn, text in zip(TURNS, ("pizza in Rome", action)):
+        start = queued_at if queued_at is not None and turn == TURNS[0] else time.perf_counter()
+        error = None
+        degraded: List[str] = []
+        try:
+            _, pending = handle_turn(crew, text, pending, degraded)
+            if turn == "clarify" and not pending:
+                error = "no pending request after clarify turn"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        results.append((turn, (time.perf_counter() - start) * 1000, error, bool(degraded)))
+        if error:
+            break
+        if turn == "clarify" and think_time_s > 0:
+            time.sleep(rng.expovariate(1 / think_time_s))
+    return results
+
+
+def _summarize_level(level: float, mode: str, results: List[TurnResult], sessions: int, elapsed: float) -> Dict[str, Any]:
+    errors = [r for r in results if r[2]]
+    degraded = [r for r in results if r[3]]
+    return {
+        "mode": mode,
+        "level": level,
+        "sessions": sessions,
+        "throughput_sessions_per_s": round(sessions / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(len(errors) / len(results), 4) if results else 0.0,
+        "errors": sorted({r[2] for r in errors})[:5],
+        "degraded_rate": round(len(degraded) / len(results), 4) if results else 0.0,
+        "turns": {turn: summarize(r[1] for r in results if r[0] == turn and not r[2]) for turn in TURNS},
+    }
+
+
+def closed_loop(crew: Any, users: int, duration_s: float, think_time_s: float, seed: int = 0) -> Dict[str, Any]:
+    """``users`` threads each run back-to-back sessions until ``duration_s`` elapses."""
+    results: List[TurnResult] = []
+    sessions = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration_s
+
+    def user(index: int) -> None:
+        nonlocal sessions
+        rng = random.Random(seed + index)
+        while time.perf_counter() < deadline:
+            session = run_session(crew, rng.choice(("prepare", "order")), think_time_s, rng)
+            with lock:
+                results.extend(session)
+                sessions += 1
+            if think_time_s > 0:
+                time.sleep(rng.expovariate(1 / think_time_s))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return _summarize_level(users, "closed", results, sessions, time.perf_counter() - start)
+
+
+def open_loop(
+    crew: Any,
+    arrival_rate: float,
+    duration_s: float,
+    think_time_s: float,
+    max_workers: int = 64,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Sessions arrive as a Poisson process at ``arrival_rate``/s onto ``max_workers`` threads."""
+    rng = random.Random(seed)
+    results: List[TurnResult] = []
+    lock = threading.Lock()
+
+    def session(index: int, queued_at: float) -> None:
+        session_rng = random.Random(seed + index)
+        outcome = run_session(crew, session_rng.choice(("prepare", "order")), think_time_s, session_rng, queued_at)
+        with lock:
+            results.extend(outcome)
+
+    start = time.perf_counter()
+    sessions = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        next_arrival = start
+        while next_arrival < start + duration_s:
+            time.sleep(max(0.0, next_arrival - time.perf_counter()))
+            pool.submit(session, sessions, time.perf_counter())
+            sessions += 1
+            next_arrival += rng.expovariate(arrival_rate)
+    return _summarize_level(arrival_rate, "open", results, sessions, time.perf_counter() - start)
+
+
+def find_saturation(
+    levels: List[Dict[str, Any]],
+    slo_ms: float,
+    max_error_rate: float,
+    max_degraded_rate: float = 0.05,
+) -> Optional[Dict[str, Any]]:
+    """First level that breaks the p95 SLO, error or degradation budget, or stops adding throughput.
+
+    Deadlines keep overloaded turns inside the SLO by degrading them, so the
+    degraded rate rises before p95 or errors do.
+    """
+    previous = None
+    for level in levels:
+        p95 = max(level["turns"][turn]["p95"] for turn in TURNS)
+        reason = None
+        if level["error_rate"] > max_error_rate:
+            reason = f"error rate {level['error_rate']:.1%}"
+        elif level["degraded_rate"] > max_degraded_rate:
+            reason = f"degraded rate {level['degraded_rate']:.1%}"
+        elif p95 > slo_ms:
+            reason = f"p95 {p95:.0f}ms > SLO {slo_ms:.0f}ms"
+        elif (
+            level["mode"] == "closed"
+            and previous
+            and level["throughput_sessions_per_s"] < previous["throughput_sessions_per_s"] * 1.1
+        ):
+            reason = "throughput stopped scaling"
+        if reason:
+            return {"level": level["level"], "reason": reason}
+        previous = level
+    return None
+
+
+def format_level(level: Dict[str, Any]) -> str:
+    unit = "users" if level["mode"] == "closed" else "sessions/s"
+    parts = [f"{level['level']:>6g} {unit:<10}", f"{level['throughput_sessions_per_s']:>7.2f} sess/s"]
+    for turn in TURNS:
+        stats = level["turns"][turn]
+        parts.append(f"{turn} p50/p95/p99 {stats['p50']:.0f}/{stats['p95']:.0f}/{stats['p99']:.0f}ms")
+    parts.append(f"errors {level['error_rate']:.1%}")
+    parts.append(f"degraded {level['degraded_rate']:.1%}")
+    return "  ".join(parts)
+
+
+def _levels(value: str) -> List[float]:
+    return [float(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--users", type=_levels, help="comma-separated concurrent users per level (closed loop)")
+    mode.add_argument("--arrival-rate", type=_levels, help="comma-separated sessions/s per level (open loop)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--think-time", type=float, default=0.5, help="mean think time between turns (s)")
+    parser.add_argument("--max-workers", type=int, default=64, help="worker threads in open-loop mode")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--llm-tokens-per-s", type=float, default=200.0)
+    parser.add_argument("--rpm", type=float, help="admit LLM calls through a scheduler with this requests/min quota")
+    parser.add_argument("--tpm", type=float, help="... and this tokens/min quota")
+    parser.add_argument("--llm-concurrency", type=int, help="... and at most this many calls in flight")
+    parser.add_argument("--slo-ms", type=float, default=5000.0, help="p95 latency SLO per turn")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--max-degraded-rate", type=float, default=0.05, help="share of turns that may skip a stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="also write the full report to this file")
+    args = parser.parse_args(argv)
+
+    configure_offline_env()
+    from app.crewAi import RecipeCrew
+    from app.crewAi.llm_scheduler import LLMScheduler
+
+    llm = FakeLLM(latency_s=args.llm_latency_ms / 1000, tokens_per_s=args.llm_tokens_per_s)
+    scheduler = None
+    if args.rpm or args.tpm or args.llm_concurrency:
+        scheduler = LLMScheduler(rpm=args.rpm, tpm=args.tpm, max_concurrency=args.llm_concurrency)
+    levels = []
+    with offline_agents(llm, scheduler):
+        # Console output is rendered on the event bus after each crew returns; switch it off.
+        crew = RecipeCrew(verbose=False)
+        for value in args.arrival_rate or args.users or [1, 2, 4, 8, 16]:
+            if args.arrival_rate:
+                level = open_loop(crew, value, args.duration, args.think_time, args.max_workers, args.seed)
+            else:
+                level = closed_loop(crew, int(value), args.duration, args.think_time, args.seed)
+            if scheduler is not None:
+                level["llm_scheduler"] = scheduler.stats()
+            levels.append(level)
+            print(format_level(level), flush=True)
+
+    saturation = find_saturation(levels, args.slo_ms, args.max_error_rate, args.max_degraded_rate)
+    if saturation:
+        print(f"Saturation at {saturation['level']:g}: {saturation['reason']}")
+    else:
+        print("No saturation within the tested levels.")
+    if args.json:
+        args.json.write_text(json.dumps({"levels": levels, "saturation": saturation}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
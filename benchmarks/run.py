@@ -0,0 +1,226 @@
+"""Offline benchmark suite for RecipeCrew and the weather MCP server.
+
+Runs the real code paths against ``benchmarks.stubs`` (fake LLM, local
+Open-Meteo) and compares the results with a saved baseline. The crew
+scenarios answer without tools, except ``run_prepare_mcp``: there the weather
+agent calls the real weather server over stdio, one process per call.
+
+    python -m benchmarks.run                    # run and check against baseline.json
+    python -m benchmarks.run --update-baseline  # run and overwrite the baseline
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from .stats import summarize
+from .stubs import (
+    WEATHER_TOOL_CALLS,
+    FakeLLM,
+    FakeOpenMeteo,
+    configure_offline_env,
+    offline_agents,
+    patched_weather_server,
+    weather_mcp_server,
+)
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+Stages = Dict[str, List[float]]
+
+
+def _elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
+def weather_server_scenario(upstream: FakeOpenMeteo) -> Callable[[int], Stages]:
+    def run(iterations: int) -> Stages:
+        async def loop() -> Stages:
+            stages: Stages = defaultdict(list)
+            # Measure the upstream path; fresh cache hits would hide it after the first iteration.
+            with patched_weather_server(upstream.base_url, serve_fresh=False) as weather_server:
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    coords = await weather_server.get_city_coordinates("Rome")
+                    stages["get_city_coordinates"].append(_elapsed_ms(start))
+                    start = time.perf_counter()
+                    await weather_server.get_forecast(coords["latitude"], coords["longitude"])
+                    stages["get_forecast"].append(_elapsed_ms(start))
+            return stages
+
+        return asyncio.run(loop())
+
+    return run
+
+
+def crew_scenario(call: Callable[[Any], Dict[str, Any]]) -> Callable[[int], Stages]:
+    def run(iterations: int) -> Stages:
+        from app.crewAi import RecipeCrew
+
+        # The full profile's crews, without their console output.
+        crew = RecipeCrew(telemetry=True, profile="full", verbose=False)
+        stages: Stages = defaultdict(list)
+        for _ in range(iterations):
+            trace = call(crew)["telemetry"]
+            stages["total"].append(trace["duration_ms"])
+            for span in trace["spans"]:
+                if span["kind"] in ("stage", "tool"):
+                    stages[span["name"]].append(span["duration_ms"])
+        return stages
+
+    return run
+
+
+def weather_mcp_scenario(upstream: FakeOpenMeteo, llm: FakeLLM) -> Callable[[int], Stages]:
+    """``run(action="prepare")`` with the weather agent calling the real weather server over stdio."""
+    prepare = crew_scenario(lambda crew: crew.run("pizza", place="Rome", action="prepare"))
+
+    def run(iterations: int) -> Stages:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            weather_mcp = weather_mcp_server(upstream.base_url, os.path.join(cache_dir, "weather.db"))
+            with offline_agents(llm, weather_mcp=weather_mcp):
+                return prepare(iterations)
+
+    return run
+
+
+def scenarios(upstream: FakeOpenMeteo, tool_llm: FakeLLM) -> Dict[str, Callable[[int], Stages]]:
+    return {
+        "weather_server": weather_server_scenario(upstream),
+        "extract_item_place": crew_scenario(lambda crew: crew.extract_item_place("pizza in Rome")),
+        "run_clarify": crew_scenario(lambda crew: crew.run("pizza", place="Rome", action=None)),
+        "run_prepare": crew_scenario(lambda crew: crew.run("pizza", place="Rome", action="prepare")),
+        "run_order": crew_scenario(lambda crew: crew.run("pizza", place="Rome", action="order")),
+        "run_prepare_mcp": weather_mcp_scenario(upstream, tool_llm),
+    }
+
+
+def measure(run: Callable[[int], Stages], iterations: int) -> Dict[str, Any]:
+    run(1)  # warm-up: imports, event listeners, connection setup
+    start = time.perf_counter()
+    stages = run(iterations)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    run(max(1, iterations // 4))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "throughput_per_s": round(iterations / elapsed, 2),
+        "peak_memory_kib": round(peak / 1024, 1),
+        "stages": {name: summarize(values) for name, values in sorted(stages.items())},
+    }
+
+
+def run_suite(config: Dict[str, Any], only: List[str] = None) -> Dict[str, Any]:
+    configure_offline_env()
+    llm = FakeLLM(latency_s=config["llm_latency_ms"] / 1000, tokens_per_s=config["llm_tokens_per_s"])
+    tool_llm = FakeLLM(
+        latency_s=config["llm_latency_ms"] / 1000,
+        tokens_per_s=config["llm_tokens_per_s"],
+        tool_calls=WEATHER_TOOL_CALLS,
+    )
+    results: Dict[str, Any] = {}
+    with FakeOpenMeteo(latency_s=config["upstream_latency_ms"] / 1000) as upstream, offline_agents(llm):
+        for name, run in scenarios(upstream, tool_llm).items():
+            if only and name not in only:
+                continue
+            results[name] = measure(run, config["iterations"])
+    return {"config": config, "scenarios": results}
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.5,
+    min_delta_ms: float = 2.0,
+    min_delta_kib: float = 256.0,
+) -> List[str]:
+    """Return a human-readable line per metric that regressed beyond ``tolerance``."""
+    regressions = []
+    for scenario, data in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(scenario)
+        if not base:
+            continue
+        for stage, stats in data["stages"].items():
+            base_stats = base["stages"].get(stage)
+            if not base_stats:
+                continue
+            # Tail percentiles of a short run are noisy, so p95 gets twice the slack.
+            for q, slack in (("p50", tolerance), ("p95", 2 * tolerance)):
+                now, before = stats[q], base_stats[q]
+                if now > before * (1 + slack) and now - before > min_delta_ms:
+                    regressions.append(f"{scenario}/{stage} {q}: {before:.1f}ms -> {now:.1f}ms")
+        now, before = data["throughput_per_s"], base["throughput_per_s"]
+        if now < before * (1 - tolerance):
+            regressions.append(f"{scenario} throughput: {before:.1f}/s -> {now:.1f}/s")
+        now, before = data["peak_memory_kib"], base["peak_memory_kib"]
+        if now > before * (1 + tolerance) and now - before > min_delta_kib:
+            regressions.append(f"{scenario} peak memory: {before:.0f}KiB -> {now:.0f}KiB")
+    return regressions
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'scenario/stage':<42}{'p50':>9}{'p95':>9}{'p99':>9}   (ms)"]
+    for scenario, data in report["scenarios"].items():
+        for stage, stats in data["stages"].items():
+            lines.append(f"{scenario + '/' + stage:<42}{stats['p50']:>9.2f}{stats['p95']:>9.2f}{stats['p99']:>9.2f}")
+        lines.append(
+            f"{scenario:<42}{data['throughput_per_s']:>9.1f} ops/s  peak {data['peak_memory_kib']:.0f} KiB"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0)
+    parser.add_argument("--llm-tokens-per-s", type=float, default=2000.0)
+    parser.add_argument("--upstream-latency-ms", type=float, default=5.0)
+    parser.add_argument("--scenario", action="append", help="run only this scenario (repeatable)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative regression")
+    parser.add_argument("--json", type=Path, help="also write the full report to this file")
+    args = parser.parse_args(argv)
+
+    config = {
+        "iterations": args.iterations,
+        "llm_latency_ms": args.llm_latency_ms,
+        "llm_tokens_per_s": args.llm_tokens_per_s,
+        "upstream_latency_ms": args.upstream_latency_ms,
+    }
+    report = run_suite(config, args.scenario)
+    print(format_report(report))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("config") != config:
+        print("Baseline was recorded with a different configuration; skipping comparison.")
+        return 0
+    regressions = compare(report, baseline, tolerance=args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""Local stand-ins for the Azure LLM and the Open-Meteo APIs.
+
+Nothing in here touches the network: the fake LLM answers from canned
+responses with a configurable latency / token rate, and the fake Open-Meteo
+server listens on 127.0.0.1.
+"""
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from crewai.events.types.llm_events import LLMCallType
+from crewai.llms.base_llm import BaseLLM
+from crewai.mcp import MCPServerStdio
+
+WEATHER_SERVER_SCRIPT = Path(__file__).resolve().parents[1] / "app" / "servers" / "weather_server.py"
+
+OFFLINE_ENV = {
+    "AZURE_OPENAI_DEPLOYMENT": "offline-bench",
+    "AZURE_OPENAI_API_KEY": "offline-bench",
+    "AZURE_OPENAI_API_VERSION": "2024-12-01-preview",
+    "AZURE_OPENAI_ENDPOINT": "https://offline-bench.invalid/",
+}
+
+DEFAULT_RESPONSES = {
+    "Input Extractor": '{"item_name":"pizza","place":"Rome"}',
+    "Weather Specialist": "Rome: 18.5°C, partly cloudy, humidity 60%, wind 12 km/h.",
+    "World-Class Chef": (
+        "Dish: Pizza Margherita\n"
+        "Ingredients: dough, tomato, mozzarella, basil, olive oil\n"
+        "Steps: stretch dough; add sauce and cheese; bake 8 min at 250°C; add basil.\n"
+        "Time: 20 min prep, 8 min cook\n"
+        "Weather note: a hot oven is welcome on a mild, cloudy day."
+    ),
+    "Local Place Finder": (
+        "1. Pizzeria Da Mario - Trastevere - restaurant - wood-fired margherita\n"
+        "2. Forno Campo de' Fiori - Centro Storico - bakery - pizza al taglio\n"
+        "3. Mercato Testaccio - Testaccio - market - several pizza stalls"
+    ),
+}
+
+
+def configure_offline_env() -> None:
+    """Provide dummy Azure settings, switch off CrewAI's own telemetry and quiet request logs."""
+    for key, value in OFFLINE_ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ["CREWAI_DISABLE_TELEMETRY"] = "true"
+    os.environ["OTEL_SDK_DISABLED"] = "true"
+    os.environ["CREWAI_TRACING_ENABLED"] = "false"
+    # FastMCP("weather") sets up INFO logging on import, which would log every Open-Meteo request.
+    os.environ["FASTMCP_LOG_LEVEL"] = "WARNING"
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def _estimate_tokens(text: Any) -> int:
+    if not isinstance(text, str):
+        text = json.dumps(text, default=str)
+    return (len(text) + 3) // 4
+
+
+# ReAct tool calls the weather agent makes before answering, as (tool, arguments).
+WEATHER_TOOL_CALLS = {
+    "Weather Specialist": [
+        ("get_city_coordinates", {"city": "Rome"}),
+        ("get_forecast", {"latitude": 41.9, "longitude": 12.5}),
+    ],
+}
+
+
+class FakeLLM(BaseLLM):
+    """CrewAI LLM that sleeps ``latency_s`` plus output tokens / ``tokens_per_s``.
+
+    Responses are picked by the calling agent's role and use the ReAct
+    ``Final Answer:`` format, so agents finish in a single call. Roles listed
+    in ``tool_calls`` first make those tool calls (``Action:`` /
+    ``Action Input:``), one per LLM call, and answer once they have all been
+    observed.
+    """
+
+    def __init__(
+        self,
+        latency_s: float = 0.02,
+        tokens_per_s: float = 2000.0,
+        responses: Optional[Dict[str, str]] = None,
+        tool_calls: Optional[Dict[str, List[Tuple[str, Dict[str, Any]]]]] = None,
+    ):
+        super().__init__(model="fake/offline-bench")
+        self.latency_s = latency_s
+        self.tokens_per_s = tokens_per_s
+        self.responses = {**DEFAULT_RESPONSES, **(responses or {})}
+        self.tool_calls = tool_calls or {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _tool_call(self, role: Optional[str], messages: Any) -> Optional[str]:
+        """The next scripted ``Action`` for ``role``, or None once all were made."""
+        script = self.tool_calls.get(role)
+        if not script or not isinstance(messages, list):
+            return None
+        # The executor appends one assistant message (action + observation) per tool call.
+        step = sum(1 for m in messages if isinstance(m, dict) and m.get("role") == "assistant")
+        if step >= len(script):
+            return None
+        tool, arguments = script[step]
+        # MCP tools are prefixed with their server, e.g. "python_app/servers/weather_server.py_get_forecast".
+        prompt = "\n".join(str(m.get("content", "")) for m in messages if isinstance(m, dict))
+        names = re.findall(rf"Tool Name: (\S*{re.escape(tool)})\b", prompt)
+        return f"Thought: I need to call {tool}\nAction: {names[0] if names else tool}\nAction Input: {json.dumps(arguments)}"
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        self._emit_call_started_event(messages=messages, from_task=from_task, from_agent=from_agent)
+        role = getattr(from_agent, "role", None)
+        action = self._tool_call(role, messages)
+        text = action or self.responses.get(role, "Done.")
+        completion_tokens = _estimate_tokens(text)
+        time.sleep(self.latency_s + completion_tokens / self.tokens_per_s)
+        with self._lock:
+            self.calls += 1
+            self._track_token_usage_internal(
+                {"prompt_tokens": _estimate_tokens(messages), "completion_tokens": completion_tokens}
+            )
+        response = action or f"Thought: I now know the final answer\nFinal Answer: {text}"
+        self._emit_call_completed_event(
+            response=response,
+            call_type=LLMCallType.LLM_CALL,
+            from_task=from_task,
+            from_agent=from_agent,
+            messages=messages,
+        )
+        return response
+
+
+def _forecast_payload(latitude: float, longitude: float) -> Dict[str, Any]:
+    hours = 7 * 24
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "current": {
+            "time": "2026-01-01T12:00",
+            "temperature_2m": 18.5,
+            "relative_humidity_2m": 60,
+            "weather_code": 2,
+            "wind_speed_10m": 12.0,
+        },
+        "hourly": {
+            "time": [f"2026-01-{1 + h // 24:02d}T{h % 24:02d}:00" for h in range(hours)],
+            "temperature_2m": [12.0 + (h % 24) / 2 for h in range(hours)],
+            "precipitation": [0.4 if 17 <= h % 24 <= 20 else 0.0 for h in range(hours)],
+            "weather_code": [61 if 17 <= h % 24 <= 20 else 2 for h in range(hours)],
+        },
+        "daily": {
+            "time": [f"2026-01-{d + 1:02d}" for d in range(7)],
+            "weather_code": [2] * 7,
+            "temperature_2m_max": [23.5] * 7,
+            "temperature_2m_min": [12.0] * 7,
+        },
+    }
+
+
+def _geocode_payload(name: str) -> Dict[str, Any]:
+    return {"results": [{"latitude": 41.9, "longitude": 12.5, "name": name.title(), "country": "Italy"}]}
+
+
+class FakeOpenMeteo:
+    """Threaded HTTP server answering ``/v1/forecast`` and ``/v1/search`` locally."""
+
+    def __init__(self, latency_s: float = 0.005):
+        self.latency_s = latency_s
+        self.requests: Dict[str, int] = {"forecast": 0, "search": 0}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self) -> "FakeOpenMeteo":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                endpoint = url.path.rsplit("/", 1)[-1]
+                if endpoint == "forecast":
+                    # Several comma-separated coordinates get a list, like Open-Meteo.
+                    latitudes = params.get("latitude", "0").split(",")
+                    longitudes = params.get("longitude", "0").split(",")
+                    body = [_forecast_payload(float(lat), float(lon)) for lat, lon in zip(latitudes, longitudes)]
+                    if len(body) == 1:
+                        body = body[0]
+                elif endpoint == "search":
+                    body = _geocode_payload(params.get("name", ""))
+                else:
+                    self.send_error(404)
+                    return
+                with stub._lock:
+                    stub.requests[endpoint] += 1
+                time.sleep(stub.latency_s)
+                payload = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client cancelled the request (e.g. a losing hedge)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@contextmanager
+def patched_weather_server(base_url: str, serve_fresh: bool = True) -> Iterator[Any]:
+    """Point ``app.servers.weather_server`` at a local Open-Meteo stand-in.
+
+    Pass ``serve_fresh=False`` to send every call upstream instead of serving fresh cache entries.
+    """
+    from app.servers import weather_server
+
+    names = ("OPENMETEO_API_BASE", "GEOCODING_API_BASE", "FORECAST_FRESH_S", "GEOCODE_FRESH_S")
+    saved = {name: getattr(weather_server, name) for name in names}
+    weather_server.OPENMETEO_API_BASE = base_url
+    weather_server.GEOCODING_API_BASE = base_url
+    if not serve_fresh:
+        weather_server.FORECAST_FRESH_S = weather_server.GEOCODE_FRESH_S = 0
+    try:
+        yield weather_server
+    finally:
+        for name, value in saved.items():
+            setattr(weather_server, name, value)
+
+
+def weather_mcp_server(base_url: str, cache_path: str) -> MCPServerStdio:
+    """The real ``weather_server.py`` over stdio, pointed at a local Open-Meteo stand-in.
+
+    Like in production, CrewAI starts a server process to list the tools and
+    one per tool call. Results are never served fresh from the cache, so every
+    call reaches the stand-in.
+    """
+    return MCPServerStdio(
+        command=sys.executable,
+        args=[str(WEATHER_SERVER_SCRIPT)],
+        env={
+            "OPENMETEO_API_BASE": base_url,
+            "GEOCODING_API_BASE": base_url,
+            "WEATHER_FORECAST_FRESH_S": "0",
+            "WEATHER_GEOCODE_FRESH_S": "0",
+            "WEATHER_SERVER_CACHE_PATH": cache_path,
+            "FASTMCP_LOG_LEVEL": "WARNING",
+        },
+    )
+
+
+@contextmanager
+def offline_agents(llm: BaseLLM, scheduler: Any = None, weather_mcp: Optional[MCPServerStdio] = None) -> Iterator[None]:
+    """Swap every agent onto ``llm`` and detach their MCP servers for the duration.
+
+    Pass an ``LLMScheduler`` to admit the fake LLM's calls through it, as in production,
+    and ``weather_mcp`` (see ``weather_mcp_server``) to give the weather agent its tools back.
+    """
+    from app.crewAi import agents
+    from app.crewAi.llm_scheduler import ScheduledLLM
+
+    if scheduler is not None:
+        llm = ScheduledLLM(llm, scheduler)
+
+    crew_agents = [
+        agents.extractor_agent,
+        agents.weather_agent,
+        agents.recipe_agent,
+        agents.place_finder_agent,
+        agents.supervisor_agent,
+    ]
+    saved = [(agent.llm, agent.mcps) for agent in crew_agents]
+    for agent in crew_agents:
+        agent.llm = llm
+        agent.mcps = None
+    if weather_mcp is not None:
+        agents.weather_agent.mcps = [weather_mcp]
+    try:
+        yield
+    finally:
+        for agent, (agent_llm, agent_mcps) in zip(crew_agents, saved):
+            agent.llm = agent_llm
+            agent.mcps = agent_mcps
@@ -0,0 +1,197 @@
+"""Tests for the offline benchmark harness in benchmarks/ — no network, no credentials."""
+import random
+from unittest.mock import MagicMock
+
+import pytest
+
+from benchmarks.loadgen import closed_loop, find_saturation, run_session
+from benchmarks.run import compare, run_suite
+from benchmarks.stats import percentile, summarize
+from benchmarks.stubs import WEATHER_TOOL_CALLS, FakeLLM, FakeOpenMeteo, patched_weather_server, weather_mcp_server
+
+
+# ---------------------------------------------------------------------------
+# stats
+# ---------------------------------------------------------------------------
+
+class TestStats:
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values, 99) == 99
+        assert percentile([], 95) == 0.0
+
+    def test_summarize(self):
+        summary = summarize([10.0, 20.0, 30.0, 40.0])
+        assert summary["count"] == 4
+        assert summary["mean"] == 25.0
+        assert summary["p50"] == 20.0
+        assert summary["max"] == 40.0
+
+
+# ---------------------------------------------------------------------------
+# baseline comparison
+# ---------------------------------------------------------------------------
+
+def _report(p95, throughput=10.0, memory=500.0):
+    return {
+        "scenarios": {
+            "run_prepare": {
+                "throughput_per_s": throughput,
+                "peak_memory_kib": memory,
+                "stages": {"total": {"p50": p95, "p95": p95}},
+            }
+        }
+    }
+
+
+class TestCompare:
+    def test_no_regression_within_tolerance(self):
+        assert compare(_report(110.0), _report(100.0), tolerance=0.25) == []
+
+    def test_latency_regression(self):
+        regressions = compare(_report(200.0), _report(100.0), tolerance=0.25)
+        assert any("run_prepare/total p95" in line for line in regressions)
+
+    def test_small_absolute_change_is_noise(self):
+        assert compare(_report(1.5), _report(1.0), tolerance=0.25, min_delta_ms=2.0) == []
+
+    def test_throughput_and_memory_regression(self):
+        regressions = compare(_report(100.0, throughput=4.0, memory=2000.0), _report(100.0))
+        assert any("throughput" in line for line in regressions)
+        assert any("peak memory" in line for line in regressions)
+
+
+# ---------------------------------------------------------------------------
+# stubs
+# ---------------------------------------------------------------------------
+
+class TestStubs:
+    @pytest.mark.asyncio
+    async def test_weather_server_against_fake_open_meteo(self):
+        with FakeOpenMeteo(latency_s=0) as upstream, patched_weather_server(upstream.base_url) as weather_server:
+            coords = await weather_server.get_city_coordinates("rome")
+            forecast = await weather_server.get_forecast(coords["latitude"], coords["longitude"])
+
+        assert coords["name"] == "Rome"
+        assert forecast["conditions"] == "Partly cloudy"
+        assert upstream.requests == {"forecast": 1, "search": 1}
+
+    def test_fake_llm_answers_by_agent_role(self):
+        llm = FakeLLM(latency_s=0, tokens_per_s=1e9)
+        agent = type("Agent", (), {"role": "Input Extractor", "id": "a1"})()
+        response = llm.call("extract this", from_agent=agent)
+
+        assert response.startswith("Thought:")
+        assert '"item_name":"pizza"' in response
+        assert llm.get_token_usage_summary().successful_requests == 1
+
+    def test_fake_llm_makes_scripted_tool_calls(self):
+        llm = FakeLLM(latency_s=0, tokens_per_s=1e9, tool_calls=WEATHER_TOOL_CALLS)
+        agent = type("Agent", (), {"role": "Weather Specialist", "id": "a1"})()
+        messages = [
+            {"role": "system", "content": "Tool Name: python_weather_server.py_get_city_coordinates\n"
+                                          "Tool Name: python_weather_server.py_get_forecast"},
+            {"role": "user", "content": "Weather in Rome?"},
+        ]
+
+        first = llm.call(messages, from_agent=agent)
+        messages.append({"role": "assistant", "content": first + "\nObservation: {}"})
+        second = llm.call(messages, from_agent=agent)
+        messages.append({"role": "assistant", "content": second + "\nObservation: {}"})
+        final = llm.call(messages, from_agent=agent)
+
+        assert "Action: python_weather_server.py_get_city_coordinates\nAction Input: {\"city\": \"Rome\"}" in first
+        assert "Action: python_weather_server.py_get_forecast" in second
+        assert "Final Answer: Rome" in final
+
+    def test_weather_mcp_server_points_at_stub(self):
+        server = weather_mcp_server("http://127.0.0.1:1234/v1", "/tmp/weather.db")
+        assert server.args[0].endswith("app/servers/weather_server.py")
+        assert server.env["OPENMETEO_API_BASE"] == server.env["GEOCODING_API_BASE"] == "http://127.0.0.1:1234/v1"
+        assert server.env["WEATHER_SERVER_CACHE_PATH"] == "/tmp/weather.db"
+
+    def test_run_suite_weather_only(self):
+        config = {"iterations": 2, "llm_latency_ms": 0, "llm_tokens_per_s": 1e9, "upstream_latency_ms": 0}
+        report = run_suite(config, only=["weather_server"])
+
+        stages = report["scenarios"]["weather_server"]["stages"]
+        assert stages["get_forecast"]["count"] == 2
+        assert report["scenarios"]["weather_server"]["throughput_per_s"] > 0
+
+
+# ---------------------------------------------------------------------------
+# load generator
+# ---------------------------------------------------------------------------
+
+def _level(level, p95, throughput, error_rate=0.0, degraded_rate=0.0):
+    turn = {"p50": p95, "p95": p95, "p99": p95}
+    return {
+        "mode": "closed",
+        "level": level,
+        "throughput_sessions_per_s": throughput,
+        "error_rate": error_rate,
+        "degraded_rate": degraded_rate,
+        "turns": {"clarify": turn, "route": turn},
+    }
+
+
+class TestLoadgen:
+    def _crew(self):
+        crew = MagicMock()
+        crew.extract_item_place.return_value = {"item_name": "pizza", "place": "Rome"}
+        crew.run.return_value = {"weather": {"conditions": "Sunny"}, "recipe": "r", "places": "p"}
+        return crew
+
+    def test_run_session_plays_both_turns(self):
+        results = run_session(self._crew(), "prepare", think_time_s=0, rng=random.Random(0))
+        assert [turn for turn, _, _, _ in results] == ["clarify", "route"]
+        assert all(error is None and not degraded for _, _, error, degraded in results)
+
+    def test_run_session_records_errors(self):
+        crew = self._crew()
+        crew.run.side_effect = RuntimeError("429")
+        results = run_session(crew, "order", think_time_s=0, rng=random.Random(0))
+        assert results == [("clarify", results[0][1], "RuntimeError: 429", False)]
+
+    def test_run_session_records_degraded_turns(self):
+        crew = self._crew()
+        crew.run.side_effect = [
+            {"weather": {"conditions": None}, "degraded": ["weather_crew: weather_crew exceeded its 12.0s budget"]},
+            {"weather": {"conditions": "Sunny"}, "recipe": "r", "degraded": []},
+        ]
+        results = run_session(crew, "prepare", think_time_s=0, rng=random.Random(0))
+        assert [(turn, error, degraded) for turn, _, error, degraded in results] == [
+            ("clarify", None, True),
+            ("route", None, False),
+        ]
+
+    def test_closed_loop_summary(self):
+        level = closed_loop(self._crew(), users=2, duration_s=0.05, think_time_s=0)
+        assert level["sessions"] > 0
+        assert level["error_rate"] == 0.0
+        assert level["degraded_rate"] == 0.0
+        assert level["turns"]["route"]["count"] > 0
+
+    def test_saturation_on_slo(self):
+        levels = [_level(1, 100, 1.0), _level(2, 150, 2.0), _level(4, 900, 3.5)]
+        assert find_saturation(levels, slo_ms=500, max_error_rate=0.01) == {
+            "level": 4,
+            "reason": "p95 900ms > SLO 500ms",
+        }
+
+    def test_saturation_when_throughput_flattens(self):
+        levels = [_level(1, 100, 1.0), _level(2, 120, 2.0), _level(4, 200, 2.1)]
+        assert find_saturation(levels, slo_ms=500, max_error_rate=0.01)["reason"] == "throughput stopped scaling"
+
+    def test_saturation_on_degraded_turns(self):
+        levels = [_level(1, 100, 1.0), _level(2, 120, 2.0, degraded_rate=0.3)]
+        assert find_saturation(levels, slo_ms=500, max_error_rate=0.01) == {
+            "level": 2,
+            "reason": "degraded rate 30.0%",
+        }
+
+    def test_no_saturation(self):
+        levels = [_level(1, 100, 1.0), _level(2, 120, 2.0)]
+        assert find_saturation(levels, slo_ms=500, max_error_rate=0.01) is None
@@ -0,0 +1,267 @@
+"""Tests for app/cache.py — backends, key scheme and URL configuration."""
+import socketserver
+import threading
+import time
+
+import pytest
+
+from app import cache
+from app.cache import (
+    CacheNamespace,
+    MemoryCache,
+    RedisCache,
+    RedisError,
+    SQLiteCache,
+    get_cache,
+    open_cache,
+    set_cache,
+)
+
+
+# ---------------------------------------------------------------------------
+# Local stand-in for a Redis server (RESP2: AUTH, SELECT, GET, SET [PX], DEL)
+# ---------------------------------------------------------------------------
+
+class FakeRedis:
+    def __init__(self, password=None):
+        self.password = password
+        self.data = {}
+        self.commands = []
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"redis://{host}:{port}/2"
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def read_command(self):
+                header = self.rfile.readline()
+                if not header:
+                    return None
+                args = []
+                for _ in range(int(header[1:])):
+                    length = int(self.rfile.readline()[1:])
+                    args.append(self.rfile.read(length + 2)[:-2].decode())
+                return args
+
+            def handle(self):
+                authed = stub.password is None
+                while True:
+                    args = self.read_command()
+                    if args is None:
+                        return
+                    name = args[0].upper()
+                    stub.commands.append([name] + args[1:])
+                    if name == "AUTH":
+                        authed = args[1] == stub.password
+                        self.wfile.write(b"+OK\r\n" if authed else b"-WRONGPASS invalid password\r\n")
+                    elif not authed:
+                        self.wfile.write(b"-NOAUTH Authentication required.\r\n")
+                    elif name == "SELECT":
+                        self.wfile.write(b"+OK\r\n")
+                    elif name == "GET":
+                        value, expires_at = stub.data.get(args[1], (None, None))
+                        if value is None or (expires_at and expires_at <= time.time()):
+                            self.wfile.write(b"$-1\r\n")
+                        else:
+                            data = value.encode()
+                            self.wfile.write(b"$%d\r\n%s\r\n" % (len(data), data))
+                    elif name == "SET":
+                        expires_at = time.time() + int(args[4]) / 1000 if len(args) > 3 else None
+                        stub.data[args[1]] = (args[2], expires_at)
+                        self.wfile.write(b"+OK\r\n")
+                    elif name == "DEL":
+                        self.wfile.write(b":%d\r\n" % int(stub.data.pop(args[1], None) is not None))
+                    else:
+                        self.wfile.write(b"-ERR unknown command\r\n")
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def redis_server():
+    with FakeRedis() as server:
+        yield server
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryCache()
+    elif request.param == "sqlite":
+        backend = SQLiteCache(str(tmp_path / "cache.db"))
+        yield backend
+        backend.close()
+    else:
+        with FakeRedis() as server:
+            backend = open_cache(server.url)
+            yield backend
+            backend.close()
+
+
+# ---------------------------------------------------------------------------
+# Backends share one contract
+# ---------------------------------------------------------------------------
+
+class TestBackends:
+    def test_set_get_delete(self, backend):
+        assert backend.get("k") is None
+        backend.set("k", "v")
+        assert backend.get("k") == "v"
+        backend.delete("k")
+        assert backend.get("k") is None
+
+    def test_overwrite(self, backend):
+        backend.set("k", "one")
+        backend.set("k", "two")
+        assert backend.get("k") == "two"
+
+    def test_ttl_expires(self, backend):
+        backend.set("short", "v", ttl_s=0.05)
+        backend.set("long", "v", ttl_s=60)
+        time.sleep(0.1)
+        assert backend.get("short") is None
+        assert backend.get("long") == "v"
+
+    def test_unicode_values(self, backend):
+        backend.set("k", '{"conditions": "Überall 18.5°C"}')
+        assert backend.get("k") == '{"conditions": "Überall 18.5°C"}'
+
+
+class TestMemoryCache:
+    def test_evicts_least_recently_used(self):
+        backend = MemoryCache(max_entries=2)
+        backend.set("a", "1")
+        backend.set("b", "2")
+        backend.get("a")
+        backend.set("c", "3")
+        assert backend.get("a") == "1"
+        assert backend.get("b") is None
+
+
+class TestSQLiteCache:
+    def test_shared_between_instances_on_one_file(self, tmp_path):
+        path = str(tmp_path / "nested" / "cache.db")
+        writer, reader = SQLiteCache(path), SQLiteCache(path)
+        writer.set("k", "v", ttl_s=60)
+        assert reader.get("k") == "v"
+
+    def test_usable_from_other_threads(self, tmp_path):
+        backend = SQLiteCache(str(tmp_path / "cache.db"))
+        thread = threading.Thread(target=backend.set, args=("k", "v"))
+        thread.start()
+        thread.join()
+        assert backend.get("k") == "v"
+
+
+class TestRedisCache:
+    def test_selects_db_and_sets_px(self, redis_server):
+        backend = open_cache(redis_server.url)
+        backend.set("k", "v", ttl_s=1.5)
+        assert redis_server.commands[0] == ["SELECT", "2"]
+        assert redis_server.commands[1] == ["SET", "k", "v", "PX", "1500"]
+
+    def test_authenticates(self):
+        with FakeRedis(password="s3cret") as server:
+            host, port = server._server.server_address
+            backend = open_cache(f"redis://:s3cret@{host}:{port}")
+            backend.set("k", "v")
+            assert backend.get("k") == "v"
+
+            with pytest.raises(RedisError):
+                RedisCache(host, port, password="wrong").get("k")
+
+    def test_reconnects_after_server_restart(self, redis_server):
+        backend = open_cache(redis_server.url)
+        backend.set("k", "v")
+        backend._sock.close()  # connection dropped underneath the client
+        assert backend.get("k") == "v"
+
+    def test_unreachable_server_raises(self):
+        with pytest.raises(OSError):
+            RedisCache("127.0.0.1", 1, timeout_s=0.1).get("k")
+
+
+# ---------------------------------------------------------------------------
+# CacheNamespace
+# ---------------------------------------------------------------------------
+
+class TestCacheNamespace:
+    def test_key_scheme(self):
+        ns = CacheNamespace("forecast", version=3)
+        assert ns.key((48.14, 11.58)) == f"{cache.KEY_PREFIX}:forecast:v3:48.14:11.58"
+        assert ns.key(" New York ") == f"{cache.KEY_PREFIX}:forecast:v3:new%20york"
+        assert ns.key("a:b") != ns.key(("a", "b"))
+
+    def test_json_round_trip_with_default_ttl(self):
+        backend = MemoryCache()
+        ns = CacheNamespace("geocode", ttl_s=0.05, backend=backend)
+        ns.set("Tokyo", {"latitude": 35.68, "name": "Tokyo"})
+        assert ns.get("tokyo") == {"latitude": 35.68, "name": "Tokyo"}
+        time.sleep(0.1)
+        assert ns.get("tokyo") is None
+
+    def test_version_bump_ignores_old_entries(self):
+        backend = MemoryCache()
+        CacheNamespace("geocode", version=1, backend=backend).set("rome", {"old": True})
+        assert CacheNamespace("geocode", version=2, backend=backend).get("rome") is None
+
+    def test_backend_errors_are_misses(self):
+        ns = CacheNamespace("geocode", backend=RedisCache("127.0.0.1", 1, timeout_s=0.1))
+        ns.set("rome", {"name": "Rome"})
+        assert ns.get("rome") is None
+
+    def test_unserializable_value_raises(self):
+        with pytest.raises(TypeError):
+            CacheNamespace("geocode", backend=MemoryCache()).set("rome", object())
+
+    def test_uses_process_default_backend(self):
+        backend = MemoryCache()
+        set_cache(backend)
+        try:
+            CacheNamespace("geocode").set("rome", {"name": "Rome"})
+            assert backend.get(CacheNamespace("geocode").key("rome")) == '{"name": "Rome"}'
+        finally:
+            set_cache(None)
+
+
+# ---------------------------------------------------------------------------
+# open_cache / get_cache
+# ---------------------------------------------------------------------------
+
+class TestOpenCache:
+    def test_memory(self):
+        assert isinstance(open_cache("memory://"), MemoryCache)
+
+    def test_sqlite_relative_and_absolute(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        assert open_cache("sqlite:///cache.db").path == "cache.db"
+        assert open_cache(f"sqlite:///{tmp_path}/abs.db").path == f"{tmp_path}/abs.db"
+
+    def test_redis(self):
+        backend = open_cache("redis://:pw@cache.internal:6380/3")
+        assert (backend.host, backend.port, backend.db, backend.password) == ("cache.internal", 6380, 3, "pw")
+
+    def test_unknown_scheme(self):
+        with pytest.raises(ValueError):
+            open_cache("memcached://localhost")
+
+    def test_get_cache_reads_env(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("APP_CACHE_URL", f"sqlite:///{tmp_path}/app.db")
+        set_cache(None)
+        try:
+            assert isinstance(get_cache(), SQLiteCache)
+            assert get_cache() is get_cache()
+        finally:
+            set_cache(None)
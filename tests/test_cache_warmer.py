@@ -0,0 +1,162 @@
+"""Tests for app/crewAi/cache_warmer.py — popularity tracking and background refresh."""
+import asyncio
+import time
+
+import pytest
+
+from app.cache import MemoryCache, SQLiteCache, set_cache
+from app.crewAi import cache_warmer
+from app.crewAi.cache_warmer import CacheWarmer, PlacePopularity, start_cache_warmer
+from benchmarks.stubs import FakeOpenMeteo, patched_weather_server
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache():
+    set_cache(MemoryCache())
+    yield
+    set_cache(None)
+
+
+@pytest.fixture
+def upstream():
+    with FakeOpenMeteo(latency_s=0) as stub, patched_weather_server(stub.base_url) as weather_server:
+        yield stub, weather_server
+
+
+def _popular(*places):
+    popularity = PlacePopularity()
+    for place in places:
+        popularity.record(place)
+    return popularity
+
+
+# ---------------------------------------------------------------------------
+# PlacePopularity
+# ---------------------------------------------------------------------------
+
+class TestPlacePopularity:
+    def test_ranks_by_request_count(self):
+        popularity = _popular("Rome", "Berlin", "rome ", "Oslo", "Rome", "Berlin")
+        assert popularity.top(2) == ["rome", "berlin"]
+
+    def test_old_requests_decay(self):
+        popularity = PlacePopularity(half_life_s=3600)
+        now = 1_000_000.0
+        for _ in range(4):
+            popularity.record("Rome", now=now)
+        popularity.record("Berlin", now=now + 3 * 3600)
+        popularity.record("Berlin", now=now + 3 * 3600)
+        # Rome: 4 requests three half-lives ago are worth 0.5 now.
+        assert popularity.top(2, now=now + 3 * 3600) == ["berlin", "rome"]
+
+    def test_forgotten_places_drop_out(self):
+        popularity = PlacePopularity(half_life_s=60)
+        popularity.record("Rome", now=0.0)
+        assert popularity.top(5, now=600.0) == []
+
+    def test_evicts_least_popular_place(self):
+        popularity = PlacePopularity(max_places=2)
+        for place in ("Rome", "Rome", "Berlin", "Berlin", "Oslo"):
+            popularity.record(place)
+        assert sorted(popularity.top(5)) == ["berlin", "rome"]
+
+
+# ---------------------------------------------------------------------------
+# CacheWarmer
+# ---------------------------------------------------------------------------
+
+class TestCacheWarmer:
+    def test_geocodes_and_batches_forecasts(self, upstream):
+        stub, weather_server = upstream
+        warmer = CacheWarmer(_popular("Rome", "Berlin", "Oslo"), batch_size=2, calls_per_hour=3600)
+
+        done = asyncio.run(warmer.warm())
+
+        # The stub geocodes every city to the same point, so only one forecast is needed.
+        assert done == {"places": 3, "geocoded": 3, "refreshed": 1, "upstream_calls": 4, "deferred": 0, "errors": 0}
+        assert stub.requests == {"search": 3, "forecast": 1}
+
+    def test_user_requests_hit_warm_cache(self, upstream):
+        stub, weather_server = upstream
+        asyncio.run(CacheWarmer(_popular("Rome"), calls_per_hour=3600).warm())
+
+        async def user_request():
+            coordinates = await weather_server.get_city_coordinates("Rome")
+            return await weather_server.get_forecast(coordinates["latitude"], coordinates["longitude"])
+
+        forecast = asyncio.run(user_request())
+
+        assert forecast["conditions"] == "Partly cloudy"
+        assert stub.requests == {"search": 1, "forecast": 1}
+
+    def test_skips_entries_that_stay_fresh(self, upstream):
+        stub, _ = upstream
+        warmer = CacheWarmer(_popular("Rome"), calls_per_hour=3600)
+        asyncio.run(warmer.warm())
+
+        done = asyncio.run(warmer.warm())
+
+        assert done["upstream_calls"] == 0
+        assert stub.requests == {"search": 1, "forecast": 1}
+
+    def test_refreshes_forecasts_about_to_age_out(self, upstream, monkeypatch):
+        stub, weather_server = upstream
+        warmer = CacheWarmer(_popular("Rome"), interval_s=300, calls_per_hour=3600)
+        asyncio.run(warmer.warm())
+        monkeypatch.setattr(weather_server, "FORECAST_FRESH_S", 300)
+
+        done = asyncio.run(warmer.warm())
+
+        assert (done["geocoded"], done["refreshed"]) == (0, 1)
+        assert stub.requests == {"search": 1, "forecast": 2}
+
+    def test_respects_upstream_budget(self, upstream):
+        stub, _ = upstream
+        # 24 calls/hour over a 300s cycle leaves two calls per cycle.
+        warmer = CacheWarmer(_popular("Rome", "Berlin", "Oslo"), interval_s=300, calls_per_hour=24)
+
+        done = asyncio.run(warmer.warm())
+
+        assert done["upstream_calls"] == 2
+        assert done["deferred"] == 2
+        assert sum(stub.requests.values()) == 2
+
+    def test_upstream_errors_are_counted(self):
+        with patched_weather_server("http://127.0.0.1:9/v1"):
+            done = asyncio.run(CacheWarmer(_popular("Rome"), calls_per_hour=3600, timeout_s=0.5).warm())
+
+        assert done["errors"] == 1
+        assert done["refreshed"] == 0
+
+    def test_background_thread_runs_cycles(self, upstream):
+        stub, _ = upstream
+        warmer = CacheWarmer(_popular("Rome"), interval_s=0.05, calls_per_hour=3600, seed=1).start()
+        try:
+            deadline = time.monotonic() + 5
+            while warmer.stats()["cycles"] < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            warmer.stop(timeout=5)
+
+        stats = warmer.stats()
+        assert stats["cycles"] >= 2
+        assert stats["totals"]["geocoded"] == 1
+
+
+class TestStartCacheWarmer:
+    def test_not_started_with_per_process_cache(self):
+        assert start_cache_warmer() is None
+
+    def test_not_started_when_disabled(self, monkeypatch, tmp_path):
+        set_cache(SQLiteCache(str(tmp_path / "cache.db")))
+        monkeypatch.setattr(cache_warmer, "CACHE_WARM_TOP_N", 0)
+        assert start_cache_warmer() is None
+
+    def test_started_with_shared_cache(self, tmp_path):
+        set_cache(SQLiteCache(str(tmp_path / "cache.db")))
+        warmer = start_cache_warmer()
+        try:
+            assert warmer is not None
+            assert warmer.popularity is cache_warmer.popularity
+        finally:
+            warmer.stop(timeout=5)
@@ -0,0 +1,174 @@
+"""Tests for app/crewAi/catalog.py — fuzzy index, persistence and batch build."""
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from app.crewAi.catalog import (
+    RecipeCatalog,
+    build_catalog,
+    get_catalog,
+    normalize,
+    read_dishes,
+    similarity,
+    weather_bucket,
+)
+
+DISHES = Path(__file__).resolve().parents[1] / "data" / "dishes.txt"
+
+
+@pytest.fixture
+def catalog():
+    with open(DISHES, encoding="utf-8") as f:
+        dishes = read_dishes(f)
+    catalog = RecipeCatalog()
+    for name, aliases in dishes:
+        catalog.add(name, aliases, {"mild": f"{name} (mild)", "wet": f"{name} (wet)"})
+    return catalog
+
+
+# ---------------------------------------------------------------------------
+# weather_bucket
+# ---------------------------------------------------------------------------
+
+class TestWeatherBucket:
+    def test_compact_record(self):
+        assert weather_bucket({"conditions": "Clear sky", "temp_c": 30.0}) == "hot"
+        assert weather_bucket({"conditions": "Overcast", "temp_c": 2.0}) == "cold"
+        assert weather_bucket({"conditions": "Partly cloudy", "temp_c": 15.0}) == "mild"
+
+    def test_precipitation_wins(self):
+        assert weather_bucket({"conditions": "Slight rain showers", "temp_c": 30.0}) == "wet"
+
+    def test_rain_expected_in_next_hours_is_wet(self):
+        assert weather_bucket({"conditions": "Clear sky", "temp_c": 20.0, "rain_next_mm": 2.4}) == "wet"
+        assert weather_bucket({"conditions": "Clear sky", "temp_c": 20.0, "rain_next_mm": 0.2}) == "mild"
+
+    def test_temperature_from_prose(self):
+        assert weather_bucket({"conditions": "Berlin: -3.5 °C, overcast, wind 10 km/h"}) == "cold"
+
+    def test_unknown_weather_is_default(self):
+        assert weather_bucket({"conditions": None}) == "mild"
+        assert weather_bucket(None) == "mild"
+
+
+# ---------------------------------------------------------------------------
+# Fuzzy matching
+# ---------------------------------------------------------------------------
+
+class TestSimilarity:
+    def test_normalize(self):
+        assert normalize("  Crème Brûlée! ") == "creme brulee"
+        assert normalize("Penne all'Arrabbiata") == "penne all arrabbiata"
+
+    def test_prefix_abbreviations(self):
+        assert similarity("spag bol", "spaghetti bolognese") == 1.0
+
+    def test_joined_words(self):
+        assert similarity("padthai", "pad thai") == 1.0
+
+    def test_extra_query_word_is_no_match(self):
+        assert similarity("vegan spaghetti bolognese", "spaghetti bolognese") == 0.0
+        assert similarity("mac n cheese", "mac and cheese") > 0.8
+
+
+class TestLookup:
+    @pytest.mark.parametrize(
+        "query",
+        ["spag bol", "Spaghetti Bolognese", "spagetti bolognaise", "spaghetti bolognese"],
+    )
+    def test_variants_resolve_to_one_entry(self, catalog, query):
+        assert catalog.lookup(query).name == "Spaghetti Bolognese"
+
+    @pytest.mark.parametrize(
+        "query, name",
+        [("chicken tika masala", "Chicken Tikka Masala"), ("kasespatzle", "Kaesespaetzle"), ("paela", "Paella")],
+    )
+    def test_typos_and_aliases(self, catalog, query, name):
+        assert catalog.lookup(query).name == name
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "spaghetti",
+            "pasta",
+            "sushi burrito",
+            "lobster thermidor",
+            "",
+            "vegan spaghetti bolognese",
+            "vegetarian spaghetti carbonara",
+            "chicken ramen",
+        ],
+    )
+    def test_ambiguous_or_unknown_is_a_miss(self, catalog, query):
+        assert catalog.lookup(query) is None
+
+    def test_entry_without_recipes_is_a_miss(self):
+        catalog = RecipeCatalog()
+        catalog.add("Ramen")
+        assert catalog.lookup("ramen") is None
+
+    def test_recipe_falls_back_to_default_bucket(self, catalog):
+        match = catalog.lookup("ramen")
+        assert match.recipe("wet") == "Ramen (wet)"
+        assert match.recipe("hot") == "Ramen (mild)"
+
+
+# ---------------------------------------------------------------------------
+# Persistence
+# ---------------------------------------------------------------------------
+
+class TestPersistence:
+    def test_round_trip(self, catalog, tmp_path):
+        path = str(tmp_path / "catalog.json.gz")
+        catalog.save(path)
+        loaded = RecipeCatalog.load(path)
+        assert len(loaded) == len(catalog)
+        assert loaded.lookup("spag bol").recipe("wet") == "Spaghetti Bolognese (wet)"
+
+    def test_missing_file_is_empty(self, tmp_path):
+        assert len(RecipeCatalog.load(str(tmp_path / "none.json.gz"))) == 0
+
+    def test_rejects_other_versions(self, tmp_path):
+        path = tmp_path / "catalog.json.gz"
+        with gzip.open(path, "wt") as f:
+            json.dump({"version": 99, "entries": []}, f)
+        with pytest.raises(ValueError):
+            RecipeCatalog.load(str(path))
+
+    def test_get_catalog_treats_unreadable_file_as_empty(self, tmp_path, caplog):
+        path = tmp_path / "catalog.json.gz"
+        with gzip.open(path, "wt") as f:
+            json.dump({"version": 2, "entries": []}, f)
+
+        assert len(get_catalog(str(path))) == 0
+        assert "could not be loaded" in caplog.text
+
+
+# ---------------------------------------------------------------------------
+# Batch build
+# ---------------------------------------------------------------------------
+
+class TestBuildCatalog:
+    def test_read_dishes(self):
+        dishes = read_dishes(["# comment", "", "Spaghetti Bolognese | spag bol |", "Ramen"])
+        assert dishes == [("Spaghetti Bolognese", ["spag bol"]), ("Ramen", [])]
+
+    def test_generates_missing_recipes_and_resumes(self):
+        catalog = RecipeCatalog()
+        catalog.add("Ramen", recipes={"cold": "existing"})
+        calls = []
+
+        def generate(name, bucket):
+            calls.append((name, bucket))
+            if name == "Pho" and bucket == "hot":
+                raise RuntimeError("rate limited")
+            return f"{name}/{bucket}"
+
+        counts = build_catalog(catalog, [("Ramen", []), ("Pho", ["pho bo"])], generate, buckets=("cold", "hot"))
+
+        assert sorted(calls) == [("Pho", "cold"), ("Pho", "hot"), ("Ramen", "hot")]
+        assert counts == {"generated": 2, "failed": 1, "skipped": 1}
+        assert catalog.get("ramen")["recipes"] == {"cold": "existing", "hot": "Ramen/hot"}
+        assert catalog.lookup("pho bo").recipe("cold") == "Pho/cold"
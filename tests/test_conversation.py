@@ -0,0 +1,147 @@
+"""Tests for app/streamlit/conversation.py — the chat flow without Streamlit."""
+from concurrent.futures import Future
+from unittest.mock import MagicMock
+
+from app.streamlit.conversation import compact_history, extract_url, finish_turn, handle_turn, headline
+
+
+def _crew(item_name="pizza", place="Rome", run_result=None):
+    crew = MagicMock()
+    crew.extract_item_place.return_value = {"item_name": item_name, "place": place}
+    crew.run.return_value = run_result or {
+        "weather": {"conditions": "Sunny"},
+        "supervisor_prompt": "Order or prepare?",
+        "recipe": "Recipe text",
+        "places": "Place list",
+    }
+    return crew
+
+
+class TestExtractUrl:
+    def test_detects_url(self):
+        assert extract_url("see https://example.com/menu please") == "https://example.com/menu"
+
+    def test_no_url(self):
+        assert extract_url("pizza in Rome") is None
+
+
+class TestHandleTurn:
+    def test_first_turn_asks_for_action(self):
+        crew = _crew()
+        reply, pending = handle_turn(crew, "pizza in Rome", None)
+
+        assert pending == {"item_name": "pizza", "place": "Rome"}
+        assert "**Weather context:** Sunny" in reply
+        assert "Order or prepare?" in reply
+        crew.run.assert_called_once_with(item_name="pizza", place="Rome", action=None)
+
+    def test_weather_record_shows_temperature(self):
+        crew = _crew(run_result={"weather": {"conditions": "Partly cloudy", "temp_c": 18.5, "stale": True}})
+        reply, _ = handle_turn(crew, "pizza in Rome", None)
+        assert "**Weather context:** Partly cloudy, 18.5°C (cached)" in reply
+
+    def test_first_turn_without_item(self):
+        reply, pending = handle_turn(_crew(item_name=""), "hello", None)
+        assert pending is None
+        assert "ramen in Tokyo" in reply
+
+    def test_invalid_action_keeps_pending(self):
+        pending = {"item_name": "pizza", "place": "Rome"}
+        reply, new_pending = handle_turn(_crew(), "maybe", pending)
+        assert new_pending == pending
+        assert "exactly one option" in reply
+
+    def test_prepare_routes_and_clears_pending(self):
+        crew = _crew()
+        reply, pending = handle_turn(crew, "Prepare", {"item_name": "pizza", "place": "Rome"})
+
+        assert pending is None
+        assert "**Recipe:**\nRecipe text" in reply
+        crew.run.assert_called_once_with(item_name="pizza", place="Rome", action="prepare")
+
+    def test_order_routes_to_places(self):
+        reply, pending = handle_turn(_crew(), "order", {"item_name": "pizza", "place": "Rome"})
+        assert pending is None
+        assert "Place list" in reply
+
+    def test_collects_degraded_stages(self):
+        crew = _crew(run_result={"weather": {"conditions": "Sunny"}, "degraded": ["recipe_crew: timed out"]})
+        crew.extract_item_place.return_value = {
+            "item_name": "pizza",
+            "place": "Rome",
+            "degraded": ["extract_item_place: timed out"],
+        }
+        degraded = []
+
+        _, pending = handle_turn(crew, "pizza in Rome", None, degraded)
+        handle_turn(crew, "prepare", pending, degraded)
+
+        assert degraded == ["extract_item_place: timed out", "recipe_crew: timed out", "recipe_crew: timed out"]
+
+    def test_reply_notes_what_was_cut_short(self):
+        crew = _crew(run_result={"weather": {"conditions": None}, "degraded": ["weather_crew: timed out"]})
+        degraded = ["extract_item_place: timed out"]  # from an earlier turn
+
+        reply, _ = handle_turn(crew, "pizza in Rome", None, degraded)
+        assert reply.endswith("_Live weather was unavailable._")
+
+        crew.run.return_value = {"weather": {"conditions": "Sunny"}, "degraded": ["recipe_crew: timed out"]}
+        reply, _ = handle_turn(crew, "prepare", {"item_name": "pizza", "place": "Rome"})
+        assert "No recipe generated." in reply
+        assert reply.endswith("_The recipe took too long, please retry._")
+
+    def test_no_note_without_degradation(self):
+        reply, _ = handle_turn(_crew(), "prepare", {"item_name": "pizza", "place": "Rome"})
+        assert reply.endswith("Recipe text")
+
+    def test_url_short_circuits(self):
+        crew = _crew()
+        reply, pending = handle_turn(crew, "https://example.com", None)
+        assert "Detected URL" in reply
+        crew.extract_item_place.assert_not_called()
+
+
+class TestHeadline:
+    def test_strips_markdown_and_joins_first_lines(self):
+        message = {"role": "assistant", "content": "**Item:** pizza  \n**City:** Rome  \n\n**Recipe:** long"}
+        assert headline(message) == "Assistant: Item: pizza / City: Rome"
+
+    def test_truncates(self):
+        line = headline({"role": "user", "content": "x" * 200}, width=10)
+        assert line == "You: " + "x" * 9 + "…"
+
+
+class TestCompactHistory:
+    def _messages(self, n):
+        return [{"role": "user" if i % 2 else "assistant", "content": f"m{i}"} for i in range(n)]
+
+    def test_within_window_unchanged(self):
+        messages = self._messages(3)
+        assert compact_history(messages, [], window=5) == (messages, [])
+
+    def test_moves_overflow_to_archive(self):
+        recent, archive = compact_history(self._messages(7), ["Assistant: old"], window=5)
+        assert [m["content"] for m in recent] == ["m2", "m3", "m4", "m5", "m6"]
+        assert archive == ["Assistant: old", "Assistant: m0", "You: m1"]
+
+    def test_archive_is_bounded(self):
+        messages, archive = [], []
+        for message in self._messages(100):
+            messages, archive = compact_history(messages + [message], archive, window=4, archive_limit=10)
+        assert len(messages) == 4
+        assert len(archive) == 10
+        assert archive[-1] == "You: m95"
+
+
+class TestFinishTurn:
+    def test_returns_result(self):
+        job = Future()
+        job.set_result(("reply", None))
+        assert finish_turn(job, {"item_name": "pizza"}) == ("reply", None)
+
+    def test_failure_keeps_pending(self):
+        job = Future()
+        job.set_exception(RuntimeError("boom"))
+        reply, pending = finish_turn(job, {"item_name": "pizza"})
+        assert "RuntimeError" in reply
+        assert pending == {"item_name": "pizza"}
@@ -0,0 +1,62 @@
+"""Tests for app/crewAi/deadline.py — request deadlines and stage timeouts."""
+import time
+
+import pytest
+
+from app.crewAi.deadline import Deadline, DeadlineExceeded, call_with_timeout, current_deadline
+
+
+class TestDeadline:
+    def test_unbounded(self):
+        deadline = Deadline(None)
+        assert deadline.remaining() == float("inf")
+        assert deadline.budget(5.0) == 5.0
+        assert not deadline.expired
+
+    def test_stage_budget_capped_by_remaining(self):
+        deadline = Deadline(1.0)
+        assert deadline.budget(30.0) <= 1.0
+        assert deadline.budget(0.5) == 0.5
+
+    def test_expired(self):
+        deadline = Deadline(0.0)
+        assert deadline.expired
+        assert deadline.remaining() == 0.0
+
+
+class TestCallWithTimeout:
+    def test_returns_result(self):
+        assert call_with_timeout("stage", lambda: 42, 1.0) == 42
+
+    def test_propagates_errors(self):
+        def boom():
+            raise ValueError("bad")
+
+        with pytest.raises(ValueError):
+            call_with_timeout("stage", boom, 1.0)
+
+    def test_raises_when_budget_exceeded(self):
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded) as excinfo:
+            call_with_timeout("weather_crew", lambda: time.sleep(1.0), 0.05)
+
+        assert time.monotonic() - start < 0.5
+        assert excinfo.value.stage == "weather_crew"
+        assert isinstance(excinfo.value, TimeoutError)
+
+    def test_no_budget_left(self):
+        with pytest.raises(DeadlineExceeded):
+            call_with_timeout("stage", lambda: 1, 0)
+
+    def test_stage_deadline_visible_inside_call(self):
+        deadline = call_with_timeout("stage", current_deadline, 1.0)
+        assert 0 < deadline.remaining() <= 1.0
+        assert current_deadline() is None
+
+    def test_nested_timeout_at_deadline_is_deadline_exceeded(self):
+        def wait_until_deadline():
+            time.sleep(current_deadline().remaining())
+            raise TimeoutError("gave up at the stage deadline")
+
+        with pytest.raises(DeadlineExceeded):
+            call_with_timeout("recipe_crew", wait_until_deadline, 0.05)
@@ -0,0 +1,224 @@
+"""Tests for app/crewAi/llm_scheduler.py — admission control for the shared LLM."""
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.crewAi.deadline import DeadlineExceeded, call_with_timeout
+from app.crewAi.llm_scheduler import (
+    AdmissionTimeout,
+    LLMScheduler,
+    Priority,
+    ScheduledLLM,
+    TokenBucket,
+    current_priority,
+    llm_priority,
+)
+
+
+# ---------------------------------------------------------------------------
+# TokenBucket
+# ---------------------------------------------------------------------------
+
+class TestTokenBucket:
+    def test_starts_full_with_ten_second_burst(self):
+        bucket = TokenBucket(rate_per_min=600)
+        assert bucket.capacity == 100
+        assert bucket.time_until(100, time.monotonic()) == 0.0
+
+    def test_wait_proportional_to_deficit(self):
+        bucket = TokenBucket(rate_per_min=600)
+        bucket.take(100)
+        assert bucket.time_until(10, bucket._updated) == pytest.approx(1.0)
+
+    def test_oversized_request_waits_for_full_bucket_only(self):
+        bucket = TokenBucket(rate_per_min=600)
+        assert bucket.time_until(10_000, time.monotonic()) == 0.0
+
+    def test_drain(self):
+        bucket = TokenBucket(rate_per_min=600)
+        bucket.drain()
+        assert bucket.level == 0.0
+
+
+# ---------------------------------------------------------------------------
+# LLMScheduler
+# ---------------------------------------------------------------------------
+
+def _hold_slot(scheduler):
+    scheduler.acquire(10)
+    return lambda: scheduler.release(10)
+
+
+class TestLLMScheduler:
+    def test_unlimited_admits_immediately(self):
+        scheduler = LLMScheduler()
+        assert scheduler.acquire(1000) < 0.05
+        scheduler.release(1000)
+        assert scheduler.stats()["admitted"] == {"interactive": 1}
+
+    def test_concurrency_limit_and_timeout(self):
+        scheduler = LLMScheduler(max_concurrency=1)
+        release = _hold_slot(scheduler)
+        with pytest.raises(AdmissionTimeout):
+            scheduler.acquire(10, timeout=0.05)
+        release()
+        assert scheduler.stats()["queue_depth"]["interactive"] == 0
+        scheduler.acquire(10, timeout=0.05)
+
+    def test_interactive_admitted_before_batch(self):
+        scheduler = LLMScheduler(max_concurrency=1)
+        release = _hold_slot(scheduler)
+        order = []
+
+        def worker(priority):
+            scheduler.acquire(10, priority=priority)
+            order.append(priority)
+            scheduler.release(10)
+
+        batch = threading.Thread(target=worker, args=(Priority.BATCH,))
+        batch.start()
+        time.sleep(0.05)
+        interactive = threading.Thread(target=worker, args=(Priority.INTERACTIVE,))
+        interactive.start()
+        time.sleep(0.05)
+        assert scheduler.stats()["queue_depth"] == {"interactive": 1, "batch": 1, "speculative": 0}
+
+        release()
+        batch.join(1)
+        interactive.join(1)
+        assert order == [Priority.INTERACTIVE, Priority.BATCH]
+
+    def test_rpm_limit_delays_calls(self):
+        scheduler = LLMScheduler(rpm=60)  # burst capacity of 10 requests
+        for _ in range(10):
+            scheduler.acquire(1)
+            scheduler.release(1)
+        with pytest.raises(AdmissionTimeout):
+            scheduler.acquire(1, timeout=0.05)
+
+    def test_release_refunds_overestimated_tokens(self):
+        scheduler = LLMScheduler(tpm=6000)  # capacity 1000 tokens
+        scheduler.acquire(800)
+        scheduler.release(800, actual_tokens=200)
+        assert scheduler.tokens.level == pytest.approx(800, abs=5)
+
+    def test_penalize_drains_buckets(self):
+        scheduler = LLMScheduler(rpm=600, tpm=60000)
+        scheduler.penalize()
+        assert scheduler.requests.level <= 0
+        assert scheduler.tokens.level <= 0
+        assert scheduler.stats()["rate_limited"] == 1
+
+    def test_wait_metrics(self):
+        scheduler = LLMScheduler()
+        scheduler.acquire(1, priority=Priority.BATCH)
+        scheduler.release(1)
+        wait = scheduler.stats()["wait"]["batch"]
+        assert set(wait) == {"mean_ms", "p95_ms", "max_ms"}
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv("AZURE_OPENAI_RPM", "120")
+        monkeypatch.setenv("AZURE_OPENAI_TPM", "30000")
+        monkeypatch.setenv("AZURE_OPENAI_MAX_CONCURRENCY", "4")
+        scheduler = LLMScheduler.from_env()
+        assert scheduler.requests.rate_per_s == 2
+        assert scheduler.tokens.rate_per_s == 500
+        assert scheduler.max_concurrency == 4
+
+
+class TestPriorityContext:
+    def test_default_is_interactive(self):
+        assert current_priority() is Priority.INTERACTIVE
+
+    def test_context_manager(self):
+        with llm_priority(Priority.BATCH):
+            assert current_priority() is Priority.BATCH
+        assert current_priority() is Priority.INTERACTIVE
+
+
+# ---------------------------------------------------------------------------
+# ScheduledLLM
+# ---------------------------------------------------------------------------
+
+class TestScheduledLLM:
+    def _inner(self):
+        inner = MagicMock()
+        inner.max_tokens = None
+        inner.stop = []
+        inner.call.return_value = "Final Answer: ok"
+        return inner
+
+    def test_call_is_admitted_and_released(self):
+        scheduler = LLMScheduler(max_concurrency=1)
+        llm = ScheduledLLM(self._inner(), scheduler)
+
+        assert llm.call("hello") == "Final Answer: ok"
+        assert llm.call("again") == "Final Answer: ok"
+        assert scheduler.stats()["in_flight"] == 0
+        assert scheduler.stats()["admitted"] == {"interactive": 2}
+
+    def test_attribute_writes_reach_inner_llm(self):
+        inner = self._inner()
+        llm = ScheduledLLM(inner, LLMScheduler())
+        llm.stop = ["\nObservation:"]
+        assert inner.stop == ["\nObservation:"]
+        assert llm.model is inner.model
+
+    def test_rate_limit_error_penalizes(self):
+        inner = self._inner()
+        inner.call.side_effect = RuntimeError("Error code: 429 - rate limit")
+        scheduler = LLMScheduler(rpm=600)
+        llm = ScheduledLLM(inner, scheduler)
+
+        with pytest.raises(RuntimeError):
+            llm.call("hello")
+        assert scheduler.stats()["rate_limited"] == 1
+        assert scheduler.stats()["in_flight"] == 0
+
+    def test_uses_priority_from_context(self):
+        scheduler = LLMScheduler()
+        llm = ScheduledLLM(self._inner(), scheduler)
+        with llm_priority(Priority.SPECULATIVE):
+            llm.call("prefetch")
+        assert scheduler.stats()["admitted"] == {"speculative": 1}
+
+    def test_admission_stops_at_stage_deadline(self):
+        scheduler = LLMScheduler(max_concurrency=1)
+        inner = self._inner()
+        llm = ScheduledLLM(inner, scheduler)
+        release = _hold_slot(scheduler)
+        errors = []
+
+        def stage():
+            try:
+                return llm.call("hello")
+            except AdmissionTimeout as e:
+                errors.append(e)
+                raise
+
+        with pytest.raises(DeadlineExceeded):
+            call_with_timeout("recipe_crew", stage, 0.05)
+        deadline = time.monotonic() + 2
+        while not errors and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release()
+
+        # The abandoned stage left the queue instead of calling the LLM once the slot freed up.
+        assert len(errors) == 1
+        assert inner.call.call_count == 0
+        assert scheduler.stats()["queue_depth"]["interactive"] == 0
+
+    def test_expired_stage_deadline_is_not_admitted(self):
+        inner = self._inner()
+        llm = ScheduledLLM(inner, LLMScheduler())
+
+        def late_stage():
+            time.sleep(0.06)
+            return llm.call("hello")
+
+        with pytest.raises(DeadlineExceeded):
+            call_with_timeout("recipe_crew", late_stage, 0.05)
+        time.sleep(0.1)
+        assert inner.call.call_count == 0
@@ -1,5 +1,10 @@
 """Tests for app/crewAi/recipe_crew.py — CrewAI calls are fully mocked."""
+import gzip
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -18,6 +23,8 @@ _place_agent_patch.start()
 _supervisor_patch.start()
 
 from app.crewAi.recipe_crew import RecipeCrew  # noqa: E402
+from app.crewAi.cache_warmer import PlacePopularity  # noqa: E402
+from benchmarks.stubs import FakeLLM  # noqa: E402
 
 
 def _make_task_output(raw: str) -> MagicMock:
@@ -26,6 +33,11 @@ def _make_task_output(raw: str) -> MagicMock:
     return out
 
 
+def _copy_update(agent: MagicMock) -> dict:
+    """The ``update`` passed to the latest ``fresh_copy`` of a patched agent."""
+    return agent.model_copy.call_args.kwargs["update"]
+
+
 def _mock_crew(kickoff_return=None, task_output_raw="mock output"):
     """Return a mock Crew class whose kickoff sets task.output."""
     crew_instance = MagicMock()
@@ -34,6 +46,28 @@ def _mock_crew(kickoff_return=None, task_output_raw="mock output"):
     return crew_cls
 
 
+# ---------------------------------------------------------------------------
+# fresh_copy
+# ---------------------------------------------------------------------------
+
+class TestFreshCopy:
+    def test_copies_do_not_share_per_run_state(self):
+        from app.crewAi.agents import fresh_copy, weather_agent
+
+        first, second = fresh_copy(weather_agent), fresh_copy(weather_agent, verbose=False)
+
+        assert first.mcps == weather_agent.mcps and first.llm is weather_agent.llm
+        assert first._mcp_clients is not second._mcp_clients
+        assert first._mcp_clients is not weather_agent._mcp_clients
+        assert first._token_process is not second._token_process
+        assert (first.agent_executor, second.verbose) == (None, False)
+
+        # CrewAI clears a copy's clients after its task; another copy's stay connected.
+        second._mcp_clients.append("client")
+        first._cleanup_mcp_clients()
+        assert second._mcp_clients == ["client"]
+
+
 # ---------------------------------------------------------------------------
 # extract_item_place
 # ---------------------------------------------------------------------------
@@ -75,7 +109,16 @@ class TestExtractItemPlace:
 # ---------------------------------------------------------------------------
 
 class TestRecipeCrewRun:
-    def _run_with_mocks(self, action, weather_raw="Sunny 20°C", extra_task_raw="result text"):
+    def _run_with_mocks(
+        self,
+        action,
+        weather_raw="Sunny 20°C",
+        extra_task_raw="result text",
+        telemetry=False,
+        kickoff=None,
+        place="Munich",
+        deadline_s=None,
+    ):
         weather_task_mock = MagicMock()
         weather_task_mock.output = _make_task_output(weather_raw)
 
@@ -87,14 +130,14 @@ class TestRecipeCrewRun:
         build_places = MagicMock(return_value=other_task_mock)
 
         crew_instance = MagicMock()
-        crew_instance.kickoff = MagicMock()
+        crew_instance.kickoff = MagicMock(side_effect=kickoff)
         crew_cls = MagicMock(return_value=crew_instance)
 
         with patch("app.crewAi.recipe_crew.Crew", crew_cls), \
              patch("app.crewAi.recipe_crew.build_weather_task", build_weather), \
              patch("app.crewAi.recipe_crew.build_recipe_task", build_recipe), \
              patch("app.crewAi.recipe_crew.build_places_task", build_places):
-            return RecipeCrew().run("pizza", place="Munich", action=action)
+            return RecipeCrew(telemetry=telemetry).run("pizza", place=place, action=action, deadline_s=deadline_s)
 
     def test_no_action_returns_clarification(self):
         result = self._run_with_mocks(action=None)
@@ -123,3 +166,278 @@ class TestRecipeCrewRun:
     def test_action_case_insensitive(self):
         result = self._run_with_mocks(action="PREPARE")
         assert result["action"] == "prepare"
+
+    def test_weather_lookup_counts_towards_popularity(self):
+        popularity = PlacePopularity()
+        with patch("app.crewAi.recipe_crew.popularity", popularity):
+            self._run_with_mocks(action=None, place="Lisbon")
+            self._run_with_mocks(action="order", place="Lisbon")
+            self._run_with_mocks(action="order", place="Porto")
+        assert popularity.top(2) == ["lisbon", "porto"]
+
+    def test_telemetry_not_attached_by_default(self):
+        result = self._run_with_mocks(action="prepare")
+        assert "telemetry" not in result
+
+    def test_telemetry_has_stage_spans(self):
+        result = self._run_with_mocks(action="prepare", telemetry=True)
+        spans = result["telemetry"]["spans"]
+        names = [s["name"] for s in spans]
+        assert names[0] == "run"
+        assert "weather_crew" in names
+        assert "recipe_crew" in names
+        root_id = spans[0]["span_id"]
+        assert all(s["parent_id"] == root_id for s in spans[1:])
+        assert all(s["duration_ms"] is not None for s in spans)
+
+
+# ---------------------------------------------------------------------------
+# run — crew profiles
+# ---------------------------------------------------------------------------
+
+class TestRecipeCrewProfiles:
+    def _run(self, profile, action="prepare", weather_raw="Sunny 20°C", llm=None, verbose=None):
+        from app.crewAi import recipe_crew
+
+        weather_task = MagicMock()
+        weather_task.output = _make_task_output(weather_raw)
+        route_task = MagicMock()
+        route_task.output = _make_task_output("result text")
+        build_weather = MagicMock(return_value=weather_task)
+
+        crew_cls = MagicMock()
+        if llm is not None:
+            # Each stage's crew makes one LLM call with a 400-character prompt.
+            crew_cls.return_value.agents = [SimpleNamespace(llm=llm)]
+            crew_cls.return_value.kickoff.side_effect = lambda inputs: llm.call("x" * 400)
+        with patch("app.crewAi.recipe_crew.Crew", crew_cls), \
+             patch("app.crewAi.recipe_crew.build_weather_task", build_weather), \
+             patch("app.crewAi.recipe_crew.build_recipe_task", return_value=route_task), \
+             patch("app.crewAi.recipe_crew.build_places_task", return_value=route_task):
+            result = RecipeCrew(profile=profile, verbose=verbose).run("pizza", place="Rome", action=action)
+        return result, crew_cls, build_weather, recipe_crew.supervisor_agent.model_copy.return_value
+
+    def test_full_profile_keeps_supervisor_and_verbose(self):
+        from app.crewAi import recipe_crew
+
+        _, crew_cls, build_weather, supervisor = self._run("full")
+        route_kwargs = crew_cls.call_args_list[-1].kwargs
+        assert route_kwargs["agents"][0] is supervisor
+        assert route_kwargs["verbose"] is True
+        assert _copy_update(recipe_crew.supervisor_agent)["verbose"] is True
+        assert _copy_update(recipe_crew.weather_agent)["verbose"] is True
+        assert build_weather.call_args.kwargs == {"structured": False}
+
+    def test_lean_profile_drops_idle_agents_and_verbose(self):
+        from app.crewAi import recipe_crew
+
+        _, crew_cls, build_weather, supervisor = self._run("lean", action="order")
+        for call in crew_cls.call_args_list:
+            assert supervisor not in call.kwargs["agents"]
+            assert call.kwargs["verbose"] is False
+        # The agent copies follow the crew's profile, not the import-time default.
+        assert _copy_update(recipe_crew.weather_agent)["verbose"] is False
+        assert _copy_update(recipe_crew.place_finder_agent)["verbose"] is False
+        assert build_weather.call_args.kwargs == {"structured": True}
+
+    def test_verbose_override(self):
+        from app.crewAi import recipe_crew
+
+        _, crew_cls, _, supervisor = self._run("full", verbose=False)
+        assert crew_cls.call_args_list[-1].kwargs["agents"][0] is supervisor
+        assert all(call.kwargs["verbose"] is False for call in crew_cls.call_args_list)
+        assert _copy_update(recipe_crew.recipe_agent)["verbose"] is False
+
+    def test_lean_profile_passes_compact_weather_record(self):
+        raw = '```json\n{"temp_c": 18.46, "humidity_pct": 60, "wind_kmh": 12, "conditions": "Partly cloudy", "extra": 1}\n```'
+        result, crew_cls, _, _ = self._run("lean", weather_raw=raw)
+
+        assert result["weather"] == {"conditions": "Partly cloudy", "temp_c": 18.5, "humidity_pct": 60.0, "wind_kmh": 12.0}
+        inputs = crew_cls.return_value.kickoff.call_args_list[-1].kwargs["inputs"]
+        assert json.loads(inputs["weather"]) == result["weather"]
+        assert " " not in inputs["weather"].replace("Partly cloudy", "")
+
+    def test_lean_profile_falls_back_to_text_weather(self):
+        result, crew_cls, _, _ = self._run("lean", weather_raw="Sunny 20°C")
+        assert result["weather"] == {"conditions": "Sunny 20°C"}
+        assert crew_cls.return_value.kickoff.call_args_list[-1].kwargs["inputs"]["weather"] == "Sunny 20°C"
+
+    def test_reports_prompt_tokens_per_stage(self):
+        result, _, _, _ = self._run("lean", llm=FakeLLM(latency_s=0))
+        assert result["prompt_tokens"] == {"weather_crew": 100, "recipe_crew": 100}
+
+    def test_prompt_tokens_are_per_request_under_concurrency(self):
+        llm = FakeLLM(latency_s=0)
+        prompt_chars = {"Rome": 400, "Oslo": 4000}
+        overlap = threading.Barrier(2, timeout=5)
+
+        def prompt(inputs):
+            # Both requests sit inside the same stage before either calls the shared LLM.
+            overlap.wait()
+            return llm.call("x" * prompt_chars[inputs["place"]])
+
+        task = MagicMock()
+        task.output = _make_task_output("Sunny 20°C")
+        with patch("app.crewAi.recipe_crew.Crew") as crew_cls, \
+             patch("app.crewAi.recipe_crew.build_weather_task", return_value=task), \
+             patch("app.crewAi.recipe_crew.build_recipe_task", return_value=task):
+            crew_cls.return_value.agents = [SimpleNamespace(llm=llm)]
+            crew_cls.return_value.kickoff.side_effect = prompt
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                rome, oslo = pool.map(
+                    lambda place: RecipeCrew(profile="lean").run("pizza", place=place, action="prepare"),
+                    ["Rome", "Oslo"],
+                )
+
+        assert rome["prompt_tokens"] == {"weather_crew": 100, "recipe_crew": 100}
+        assert oslo["prompt_tokens"] == {"weather_crew": 1000, "recipe_crew": 1000}
+
+    def test_stages_run_fresh_agent_copies(self):
+        from app.crewAi import recipe_crew
+
+        _, crew_cls, build_weather, _ = self._run("lean")
+        weather_copy = recipe_crew.weather_agent.model_copy.return_value
+        recipe_crew.weather_agent.model_copy.assert_called_with(update={"agent_executor": None, "verbose": False})
+        assert build_weather.call_args.args == (weather_copy,)
+        assert crew_cls.call_args_list[0].kwargs["agents"] == [weather_copy]
+        assert crew_cls.call_args_list[1].kwargs["agents"] == [recipe_crew.recipe_agent.model_copy.return_value]
+
+    def test_unknown_profile_rejected(self):
+        with pytest.raises(ValueError):
+            RecipeCrew(profile="tiny")
+
+
+# ---------------------------------------------------------------------------
+# run — recipe catalog
+# ---------------------------------------------------------------------------
+
+class TestRecipeCrewCatalog:
+    _run_with_mocks = TestRecipeCrewRun._run_with_mocks
+
+    def _catalog(self):
+        from app.crewAi.catalog import RecipeCatalog
+
+        return RecipeCatalog([
+            {"name": "Pizza Margherita", "aliases": ["pizza"], "recipes": {"mild": "Mild pizza", "wet": "Rainy-day pizza"}},
+        ])
+
+    def test_confident_match_served_from_catalog(self):
+        with patch("app.crewAi.recipe_crew.get_catalog", return_value=self._catalog()):
+            result = self._run_with_mocks(action="prepare", weather_raw="Light drizzle, 11°C", telemetry=True)
+
+        assert result["recipe"] == "Rainy-day pizza"
+        assert result["recipe_source"] == "catalog"
+        assert result["catalog_match"] == "Pizza Margherita"
+        assert result["weather_bucket"] == "wet"
+        names = [s["name"] for s in result["telemetry"]["spans"]]
+        assert "catalog_lookup" in names
+        assert "recipe_crew" not in names
+
+    def test_miss_generates_live(self):
+        from app.crewAi.catalog import RecipeCatalog
+
+        with patch("app.crewAi.recipe_crew.get_catalog", return_value=RecipeCatalog()):
+            result = self._run_with_mocks(action="prepare", extra_task_raw="Live recipe")
+
+        assert result["recipe"] == "Live recipe"
+        assert result["recipe_source"] == "live"
+
+    def test_broken_catalog_falls_back_to_live(self, tmp_path):
+        path = tmp_path / "catalog.json.gz"
+        with gzip.open(path, "wt") as f:
+            json.dump({"version": 2, "entries": []}, f)
+
+        with patch("app.crewAi.recipe_crew.RECIPE_CATALOG_PATH", str(path)):
+            result = self._run_with_mocks(action="prepare", extra_task_raw="Live recipe")
+
+        assert result["recipe"] == "Live recipe"
+        assert result["recipe_source"] == "live"
+
+    def test_catalog_lookup_error_falls_back_to_live(self):
+        catalog = MagicMock()
+        catalog.lookup.side_effect = KeyError("recipes")
+        with patch("app.crewAi.recipe_crew.get_catalog", return_value=catalog):
+            result = self._run_with_mocks(action="prepare", extra_task_raw="Live recipe", telemetry=True)
+
+        assert result["recipe_source"] == "live"
+        lookup = next(s for s in result["telemetry"]["spans"] if s["name"] == "catalog_lookup")
+        assert lookup["error"] == "KeyError: 'recipes'"
+
+    def test_order_does_not_use_catalog(self):
+        with patch("app.crewAi.recipe_crew.get_catalog", return_value=self._catalog()) as get_catalog:
+            result = self._run_with_mocks(action="order")
+
+        get_catalog.assert_not_called()
+        assert "recipe_source" not in result
+
+
+# ---------------------------------------------------------------------------
+# run — deadlines and degradation
+# ---------------------------------------------------------------------------
+
+def _slow_stage(stage_input_key, delay_s):
+    """kickoff side effect that stalls only the stage whose inputs contain ``stage_input_key``."""
+    def kickoff(inputs=None):
+        if stage_input_key in (inputs or {}):
+            time.sleep(delay_s)
+    return kickoff
+
+
+class TestRecipeCrewDeadlines:
+    _run_with_mocks = TestRecipeCrewRun._run_with_mocks
+
+    def test_no_degradation_within_budget(self):
+        result = self._run_with_mocks(action="prepare", deadline_s=5)
+        assert result["degraded"] == []
+        assert "stale" not in result["weather"]
+
+    def test_slow_weather_is_skipped(self):
+        with patch.dict("app.crewAi.recipe_crew.STAGE_BUDGETS_S", {"weather_crew": 0.05}):
+            start = time.monotonic()
+            result = self._run_with_mocks(
+                action="prepare", place="Nowhere", kickoff=_slow_stage("tool_timeout_s", 0.5), deadline_s=5
+            )
+
+        assert time.monotonic() - start < 0.4
+        assert result["weather"] == {"conditions": None}
+        assert result["degraded"][0].startswith("weather_crew")
+        assert result["recipe"] == "result text"
+
+    def test_slow_weather_serves_stale_summary(self):
+        self._run_with_mocks(action=None, place="Lisbon", weather_raw="Windy 15°C")
+        with patch.dict("app.crewAi.recipe_crew.STAGE_BUDGETS_S", {"weather_crew": 0.05}):
+            result = self._run_with_mocks(
+                action=None, place="Lisbon", kickoff=_slow_stage("tool_timeout_s", 0.5), deadline_s=5
+            )
+
+        assert result["weather"]["conditions"] == "Windy 15°C"
+        assert result["weather"]["stale"] is True
+
+    def test_slow_route_returns_partial_result(self):
+        with patch.dict("app.crewAi.recipe_crew.STAGE_BUDGETS_S", {"recipe_crew": 0.05}):
+            result = self._run_with_mocks(action="prepare", kickoff=_slow_stage("item_name", 0.5), deadline_s=5)
+
+        assert result["action"] == "prepare"
+        assert result["degraded"][0].startswith("recipe_crew")
+
+    def test_overall_deadline_caps_stages(self):
+        start = time.monotonic()
+        result = self._run_with_mocks(action="order", kickoff=_slow_stage("place", 0.5), deadline_s=0.1)
+
+        assert time.monotonic() - start < 0.4
+        assert len(result["degraded"]) == 2
+
+
+class TestExtractItemPlaceDeadline:
+    def test_slow_extraction_falls_back_to_raw_text(self):
+        crew_instance = MagicMock()
+        crew_instance.kickoff = MagicMock(side_effect=lambda inputs=None: time.sleep(0.5))
+        crew_cls = MagicMock(return_value=crew_instance)
+
+        with patch("app.crewAi.recipe_crew.Crew", crew_cls), \
+             patch("app.crewAi.recipe_crew.build_extract_task", return_value=MagicMock()):
+            result = RecipeCrew().extract_item_place("ramen", default_city="Tokyo", deadline_s=0.05)
+
+        assert (result["item_name"], result["place"]) == ("ramen", "Tokyo")
+        assert len(result["degraded"]) == 1
+        assert result["degraded"][0].startswith("extract_item_place: ")
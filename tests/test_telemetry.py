@@ -0,0 +1,182 @@
+"""Tests for app/crewAi/telemetry.py — spans, exporters and CrewAI event pairing."""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.crewAi.telemetry import (
+    MetricsRegistry,
+    TelemetryListener,
+    attribute_usage,
+    current_span,
+    estimate_tokens,
+    metrics,
+    start_span,
+    start_trace,
+)
+from benchmarks.stubs import FakeLLM
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+# ---------------------------------------------------------------------------
+# Trace / spans
+# ---------------------------------------------------------------------------
+
+class TestTrace:
+    def test_stage_spans_nest_under_root(self):
+        with start_trace("run", place="Rome") as trace:
+            with start_span("weather_crew") as outer:
+                with start_span("inner") as inner:
+                    assert current_span() is inner
+
+        assert trace.root.attributes["place"] == "Rome"
+        assert outer.parent_id == trace.root.span_id
+        assert inner.parent_id == outer.span_id
+        assert all(s.end_ns is not None for s in trace.spans)
+
+    def test_error_is_recorded_and_reraised(self):
+        with pytest.raises(RuntimeError):
+            with start_trace("run") as trace:
+                with start_span("weather_crew"):
+                    raise RuntimeError("boom")
+
+        stage = trace.spans[1]
+        assert stage.error == "RuntimeError: boom"
+        assert trace.root.error == "RuntimeError: boom"
+
+    def test_span_without_trace_is_detached(self):
+        with start_span("orphan") as span:
+            assert current_span() is span
+        assert current_span() is None
+        assert span.duration_ms is not None
+
+    def test_otlp_export_shape(self):
+        with start_trace("run") as trace:
+            with start_span("weather_crew", cached=True):
+                pass
+
+        otlp = trace.to_otlp()
+        spans = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert [s["name"] for s in spans] == ["run", "weather_crew"]
+        assert spans[1]["parentSpanId"] == spans[0]["spanId"]
+        assert {"key": "cached", "value": {"boolValue": True}} in spans[1]["attributes"]
+
+
+# ---------------------------------------------------------------------------
+# Token usage / metrics
+# ---------------------------------------------------------------------------
+
+class TestMetrics:
+    def test_attribute_usage_adds_each_call_to_current_span(self):
+        llm = FakeLLM(latency_s=0)
+        attribute_usage(llm)
+        attribute_usage(llm)  # hooked once
+
+        with start_trace("run") as trace:
+            llm.call("warm-up")
+            with start_span("weather_crew") as span:
+                llm.call("x" * 400)
+                llm.call("x" * 400)
+
+        assert span.attributes["gen_ai.usage.input_tokens"] == 200
+        assert span.attributes["gen_ai.usage.output_tokens"] == 4
+        assert span.attributes["gen_ai.requests"] == 2
+        assert trace.root.attributes["gen_ai.requests"] == 1
+        assert llm.get_token_usage_summary().successful_requests == 3
+
+    def test_attribute_usage_unwraps_scheduled_llm(self):
+        from app.crewAi.llm_scheduler import LLMScheduler, ScheduledLLM
+
+        inner = FakeLLM(latency_s=0)
+        scheduled = ScheduledLLM(inner, LLMScheduler())
+        attribute_usage(scheduled)
+
+        with start_trace("run"):
+            with start_span("recipe_crew") as span:
+                scheduled.call("x" * 40)
+
+        assert span.attributes["gen_ai.usage.input_tokens"] == 10
+        assert span.attributes["gen_ai.requests"] == 1
+
+    def test_attribute_usage_outside_trace_only_tracks_counters(self):
+        llm = FakeLLM(latency_s=0)
+        attribute_usage(llm)
+        with start_span("orphan") as span:
+            llm.call("x" * 40)
+        assert "gen_ai.usage.input_tokens" not in span.attributes
+        assert llm.get_token_usage_summary().prompt_tokens == 10
+
+    def test_attribute_usage_ignores_non_llms(self):
+        attribute_usage(None)
+        attribute_usage(SimpleNamespace(inner=None))
+
+    def test_prometheus_rendering(self):
+        registry = MetricsRegistry()
+        with start_trace("run") as trace:
+            with start_span("weather_crew") as span:
+                span.set(**{"gen_ai.usage.input_tokens": 50})
+                span.add("cache.hits")
+        for s in trace.spans:
+            registry.observe(s)
+
+        text = registry.render_prometheus()
+        assert 'recipe_crew_span_duration_seconds_count{name="weather_crew",kind="stage"} 1' in text
+        assert 'recipe_crew_tokens_total{name="weather_crew",type="input"} 50' in text
+        assert 'recipe_crew_cache_hits_total{name="weather_crew"} 1' in text
+
+    def test_estimate_tokens(self):
+        assert estimate_tokens(None) == 0
+        assert estimate_tokens("abcd") == 1
+        assert estimate_tokens([{"role": "user", "content": "x" * 40}]) > 10
+
+
+# ---------------------------------------------------------------------------
+# CrewAI event pairing
+# ---------------------------------------------------------------------------
+
+def _llm_event(ts, **extra):
+    return SimpleNamespace(agent_id="a1", task_id="t1", agent_role="Chef", timestamp=ts, **extra)
+
+
+class TestEventPairing:
+    def test_llm_span_from_start_and_end(self):
+        t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        with start_trace("run") as trace:
+            with start_span("recipe_crew") as stage:
+                TelemetryListener._pair_llm(_llm_event(t0, model="gpt", messages="x" * 400), "start")
+                TelemetryListener._pair_llm(_llm_event(t0 + timedelta(milliseconds=250), response="ok"), "end")
+
+        llm = [s for s in trace.spans if s.kind == "llm"]
+        assert len(llm) == 1
+        assert llm[0].parent_id == stage.span_id
+        assert llm[0].duration_ms == pytest.approx(250)
+        assert llm[0].attributes["gen_ai.usage.input_tokens"] == 100
+
+    def test_llm_span_when_completion_observed_first(self):
+        t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        with start_trace("run") as trace:
+            TelemetryListener._pair_llm(_llm_event(t0 + timedelta(seconds=1), response="ok"), "end")
+            TelemetryListener._pair_llm(_llm_event(t0, model="gpt", messages="hi"), "start")
+
+        llm = [s for s in trace.spans if s.kind == "llm"]
+        assert llm[0].duration_ms == pytest.approx(1000)
+
+    def test_mcp_tool_span(self):
+        t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        event = SimpleNamespace(server_name="weather", tool_name="get_forecast", started_at=t0)
+        with start_trace("run") as trace:
+            TelemetryListener._record_tool(event, t0 + timedelta(milliseconds=40), "timeout")
+
+        tool = trace.spans[-1]
+        assert tool.name == "mcp.get_forecast"
+        assert tool.duration_ms == pytest.approx(40)
+        assert tool.error == "timeout"
+
+    def test_events_outside_trace_are_ignored(self):
+        TelemetryListener._pair_llm(_llm_event(datetime.now(timezone.utc)), "start")
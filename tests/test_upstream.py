@@ -0,0 +1,184 @@
+"""Tests for app/servers/upstream.py — hedged requests and circuit breaking."""
+import asyncio
+
+import pytest
+
+from app.cache import CacheNamespace, MemoryCache
+from app.servers import upstream as upstream_module
+from app.servers.upstream import CircuitOpenError, Upstream
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(upstream_module.time, "time", fake)
+    return fake
+
+
+def _upstream(**kwargs):
+    options = {"failure_threshold": 3, "reset_after_s": 30.0, "min_samples": 5, "min_hedge_delay_s": 0.01}
+    options.update(kwargs)
+    return Upstream("test", store=CacheNamespace("upstream", backend=MemoryCache()), **options)
+
+
+def _seed_latencies(upstream, latency_ms, count=10):
+    upstream._save({**upstream._load(), "latencies_ms": [latency_ms] * count})
+
+
+def _requests(*behaviours):
+    """Request function whose n-th attempt sleeps, then returns or raises ``behaviours[n]``."""
+    calls = []
+
+    async def request(timeout):
+        delay, outcome = behaviours[len(calls)]
+        calls.append(timeout)
+        await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return request, calls
+
+
+# ---------------------------------------------------------------------------
+# hedging
+# ---------------------------------------------------------------------------
+
+class TestHedging:
+    def test_no_hedge_until_latency_is_known(self):
+        upstream = _upstream()
+        request, calls = _requests((0.05, "slow"))
+
+        assert asyncio.run(upstream.call(request, 5.0)) == "slow"
+        assert len(calls) == 1
+        assert upstream.hedge_delay([10.0] * 4) is None
+
+    def test_hedge_delay_is_recent_percentile(self):
+        upstream = _upstream(hedge_percentile=95)
+        assert upstream.hedge_delay([10.0] * 19 + [1000.0]) == pytest.approx(0.0595)
+        assert upstream.hedge_delay([1.0] * 10) == 0.01  # floor
+        assert _upstream(hedge_percentile=0).hedge_delay([10.0] * 10) is None
+
+    def test_slow_request_is_hedged_and_hedge_wins(self):
+        upstream = _upstream()
+        _seed_latencies(upstream, 20.0)
+        request, calls = _requests((1.0, "first"), (0.0, "hedge"))
+
+        assert asyncio.run(upstream.call(request, 5.0)) == "hedge"
+        assert calls[0] == 5.0
+        assert calls[1] == pytest.approx(5.0 - 0.02)
+        stats = upstream.stats()
+        assert (stats["hedges"], stats["hedge_wins"]) == (1, 1)
+
+    def test_first_request_can_still_win(self):
+        upstream = _upstream()
+        _seed_latencies(upstream, 20.0)
+        request, calls = _requests((0.05, "first"), (1.0, "hedge"))
+
+        assert asyncio.run(upstream.call(request, 5.0)) == "first"
+        assert len(calls) == 2
+        assert (upstream.stats()["hedges"], upstream.stats()["hedge_wins"]) == (1, 0)
+
+    def test_failed_attempt_falls_back_to_the_other(self):
+        upstream = _upstream()
+        _seed_latencies(upstream, 20.0)
+        request, _ = _requests((0.05, ConnectionError("reset")), (0.1, "hedge"))
+
+        assert asyncio.run(upstream.call(request, 5.0)) == "hedge"
+
+    def test_both_attempts_failing_raises(self):
+        upstream = _upstream()
+        _seed_latencies(upstream, 20.0)
+        request, _ = _requests((0.05, ConnectionError("a")), (0.0, ConnectionError("b")))
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(upstream.call(request, 5.0))
+        assert upstream.stats()["failures"] == 1
+
+
+# ---------------------------------------------------------------------------
+# circuit breaker
+# ---------------------------------------------------------------------------
+
+class TestCircuitBreaker:
+    def _fail(self, upstream, times=1):
+        for _ in range(times):
+            request, _ = _requests((0.0, ConnectionError("down")))
+            with pytest.raises(ConnectionError):
+                asyncio.run(upstream.call(request, 1.0))
+
+    def test_opens_after_consecutive_failures(self, clock):
+        upstream = _upstream()
+        self._fail(upstream, 3)
+        request, calls = _requests((0.0, "ok"))
+
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(upstream.call(request, 1.0))
+        assert calls == []
+        stats = upstream.stats()
+        assert (stats["circuit"], stats["trips"], stats["rejected"]) == ("open", 1, 1)
+
+    def test_success_resets_failure_count(self, clock):
+        upstream = _upstream()
+        self._fail(upstream, 2)
+        asyncio.run(upstream.call(_requests((0.0, "ok"))[0], 1.0))
+        self._fail(upstream, 2)
+        assert upstream.stats()["circuit"] == "closed"
+
+    def test_probe_success_closes_circuit(self, clock):
+        upstream = _upstream()
+        self._fail(upstream, 3)
+        clock.now += 31
+        assert upstream.stats()["circuit"] == "half_open"
+
+        assert asyncio.run(upstream.call(_requests((0.0, "ok"))[0], 1.0)) == "ok"
+        assert upstream.stats()["circuit"] == "closed"
+
+    def test_probe_failure_keeps_circuit_open(self, clock):
+        upstream = _upstream()
+        self._fail(upstream, 3)
+        clock.now += 31
+        self._fail(upstream)
+
+        stats = upstream.stats()
+        assert (stats["circuit"], stats["trips"]) == ("open", 1)
+
+    def test_only_one_probe_at_a_time(self, clock):
+        upstream = _upstream()
+        self._fail(upstream, 3)
+        clock.now += 31
+
+        async def concurrent():
+            probe = asyncio.ensure_future(upstream.call(_requests((0.05, "ok"))[0], 1.0))
+            await asyncio.sleep(0)
+            with pytest.raises(CircuitOpenError):
+                await upstream.call(_requests((0.0, "ok"))[0], 1.0)
+            return await probe
+
+        assert asyncio.run(concurrent()) == "ok"
+
+    def test_errors_that_are_not_outages_do_not_count(self, clock):
+        upstream = _upstream(is_failure=lambda e: not isinstance(e, ValueError))
+        for _ in range(5):
+            request, _ = _requests((0.0, ValueError("bad request")))
+            with pytest.raises(ValueError):
+                asyncio.run(upstream.call(request, 1.0))
+        stats = upstream.stats()
+        assert (stats["circuit"], stats["failures"]) == ("closed", 0)
+
+    def test_state_shared_through_store(self, clock):
+        store = CacheNamespace("upstream", backend=MemoryCache())
+        first = Upstream("shared", failure_threshold=1, store=store)
+        self._fail(first)
+
+        second = Upstream("shared", failure_threshold=1, store=store)
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(second.call(_requests((0.0, "ok"))[0], 1.0))
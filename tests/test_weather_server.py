@@ -1,9 +1,29 @@
 """Tests for app/servers/weather_server.py — pure logic, no network calls."""
+import json
+
 import pytest
 import pytest_asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from app.servers.weather_server import interpret_weather_code, get_city_coordinates, get_forecast
+from app.cache import MemoryCache, SQLiteCache, set_cache
+from app.servers import weather_server
+from app.servers.weather_server import (
+    get_city_coordinates,
+    get_forecast,
+    get_hourly_features,
+    hourly_features,
+    interpret_weather_code,
+    refresh_forecasts,
+    upstream_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache():
+    # Results are now served from the cache while fresh, so tests must not see each other's entries.
+    set_cache(MemoryCache())
+    yield
+    set_cache(None)
 
 
 # ---------------------------------------------------------------------------
@@ -73,6 +93,8 @@ class TestGetCityCoordinates:
         # Should fall back to Munich defaults
         assert result["name"] == "Munich"
         assert "latitude" in result
+        assert result["fallback"] is True
+        assert "NonExistentCity" in result["error"]
 
     @pytest.mark.asyncio
     async def test_fallback_on_exception(self):
@@ -85,6 +107,71 @@ class TestGetCityCoordinates:
             result = await get_city_coordinates("Anywhere")
 
         assert result["name"] == "Munich"
+        assert result["fallback"] is True
+        assert "network error" in result["error"]
+
+    @pytest.mark.asyncio
+    async def test_serves_last_known_coordinates_on_failure(self, monkeypatch):
+        monkeypatch.setattr(weather_server, "GEOCODE_FRESH_S", 0)
+        mock_response = MagicMock()
+        mock_response.raise_for_status = MagicMock()
+        mock_response.json.return_value = {
+            "results": [{"latitude": 35.68, "longitude": 139.69, "name": "Tokyo", "country": "Japan"}]
+        }
+
+        with patch("app.servers.weather_server.httpx.AsyncClient") as mock_client_cls:
+            mock_client = AsyncMock()
+            mock_client.get = AsyncMock(side_effect=[mock_response, Exception("network error")])
+            mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
+            mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+
+            await get_city_coordinates("Tokyo")
+            result = await get_city_coordinates("tokyo")
+
+        assert result["name"] == "Tokyo"
+        assert result["stale"] is True
+
+    @pytest.mark.asyncio
+    async def test_last_known_coordinates_shared_through_cache_backend(self, tmp_path):
+        # Another server process on the node wrote the entry to the same SQLite file.
+        SQLiteCache(str(tmp_path / "cache.db")).set(
+            weather_server._last_coordinates.key("Oslo"),
+            json.dumps({"latitude": 59.91, "longitude": 10.75, "name": "Oslo", "country": "Norway"}),
+        )
+        set_cache(SQLiteCache(str(tmp_path / "cache.db")))
+        try:
+            with patch("app.servers.weather_server.httpx.AsyncClient") as mock_client_cls:
+                mock_client = AsyncMock()
+                mock_client.get = AsyncMock(side_effect=Exception("network error"))
+                mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
+                mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+
+                result = await get_city_coordinates("Oslo")
+        finally:
+            set_cache(None)
+
+        assert result["name"] == "Oslo"
+        assert result["stale"] is True
+
+    @pytest.mark.asyncio
+    async def test_fresh_coordinates_served_from_cache(self):
+        mock_response = MagicMock()
+        mock_response.raise_for_status = MagicMock()
+        mock_response.json.return_value = {
+            "results": [{"latitude": 41.9, "longitude": 12.5, "name": "Rome", "country": "Italy"}]
+        }
+
+        with patch("app.servers.weather_server.httpx.AsyncClient") as mock_client_cls:
+            mock_client = AsyncMock()
+            mock_client.get = AsyncMock(return_value=mock_response)
+            mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
+            mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+
+            first = await get_city_coordinates("Rome")
+            second = await get_city_coordinates("rome")
+
+        assert mock_client.get.call_count == 1
+        assert first == second == {"latitude": 41.9, "longitude": 12.5, "name": "Rome", "country": "Italy"}
 
 
 # ---------------------------------------------------------------------------
@@ -135,3 +222,335 @@ class TestGetForecast:
 
         assert "error" in result
         assert result["current_temperature_c"] == 20  # fallback value
+
+    @pytest.mark.asyncio
+    async def test_timeout_capped_by_server_limit(self, monkeypatch):
+        monkeypatch.setattr(weather_server, "FORECAST_FRESH_S", 0)
+        mock_response = MagicMock()
+        mock_response.raise_for_status = MagicMock()
+        mock_response.json.return_value = {"current": {}, "daily": {}}
+
+        with patch("app.servers.weather_server.httpx.AsyncClient") as mock_client_cls:
+            mock_client = AsyncMock()
+            mock_client.get = AsyncMock(return_value=mock_response)
+            mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
+            mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+
+            await get_forecast(1.0, 1.0, timeout_s=2.5)
+            await get_forecast(1.0, 1.0, timeout_s=600)
+
+        timeouts = [c.kwargs["timeout"] for c in mock_client.get.call_args_list]
+        assert timeouts == [2.5, weather_server.FORECAST_TIMEOUT_S]
+
+    @pytest.mark.asyncio
+    async def test_serves_stale_forecast_on_failure(self, monkeypatch):
+        monkeypatch.setattr(weather_server, "FORECAST_FRESH_S", 0)
+        mock_response = MagicMock()
+        mock_response.raise_for_status = MagicMock()
+        mock_response.json.return_value = {
+            "current": {"temperature_2m": 9.0, "weather_code": 3},
+            "daily": {"temperature_2m_max": [11.0], "temperature_2m_min": [4.0]},
+        }
+
+        with patch("app.servers.weather_server.httpx.AsyncClient") as mock_client_cls:
+            mock_client = AsyncMock()
+            mock_client.get = AsyncMock(side_effect=[mock_response, Exception("timeout")])
+            mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
+            mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+
+            fresh = await get_forecast(52.52, 13.405)
+            stale = await get_forecast(52.52, 13.405)
+
+        assert "stale" not in fresh
+        assert stale["stale"] is True
+        assert stale["current_temperature_c"] == 9.0
+        assert stale["conditions"] == "Overcast"
+        assert "fetched_at" not in stale
+
+    @pytest.mark.asyncio
+    async def test_fresh_forecast_served_from_cache(self, monkeypatch):
+        mock_response = MagicMock()
+        mock_response.raise_for_status = MagicMock()
+        mock_response.json.return_value = {"current": {"temperature_2m": 21.0, "weather_code": 0}, "daily": {}}
+        now = [1_000_000.0]
+        monkeypatch.setattr(weather_server.time, "time", lambda: now[0])
+
+        with patch("app.servers.weather_server.httpx.AsyncClient") as mock_client_cls:
+            mock_client = AsyncMock()
+            mock_client.get = AsyncMock(return_value=mock_response)
+            mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
+            mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+
+            first = await get_forecast(41.9, 12.5)
+            now[0] += weather_server.FORECAST_FRESH_S - 1
+            second = await get_forecast(41.9, 12.5)
+            now[0] += 2
+            await get_forecast(41.9, 12.5)
+
+        assert first == second
+        assert mock_client.get.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_refresh_forecasts_batches_locations(self):
+        mock_response = MagicMock()
+        mock_response.raise_for_status = MagicMock()
+        mock_response.json.return_value = [
+            {"current": {"temperature_2m": 5.0, "weather_code": 3}, "daily": {}},
+            {"current": {"temperature_2m": 25.0, "weather_code": 0}, "daily": {}},
+        ]
+
+        with patch("app.servers.weather_server.httpx.AsyncClient") as mock_client_cls:
+            mock_client = AsyncMock()
+            mock_client.get = AsyncMock(return_value=mock_response)
+            mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
+            mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+
+            assert await refresh_forecasts([(52.52, 13.41), (41.9, 12.5)]) == 2
+            berlin = await get_forecast(52.52, 13.41)
+            rome = await get_forecast(41.9, 12.5)
+
+        params = mock_client.get.call_args.kwargs["params"]
+        assert (params["latitude"], params["longitude"]) == ("52.52,41.9", "13.41,12.5")
+        assert mock_client.get.call_count == 1
+        assert berlin["conditions"] == "Overcast"
+        assert rome["current_temperature_c"] == 25.0
+
+    @pytest.mark.asyncio
+    async def test_refresh_forecasts_rejects_mismatched_response(self):
+        mock_response = MagicMock()
+        mock_response.raise_for_status = MagicMock()
+        mock_response.json.return_value = {"current": {}, "daily": {}}
+
+        with patch("app.servers.weather_server.httpx.AsyncClient") as mock_client_cls:
+            mock_client = AsyncMock()
+            mock_client.get = AsyncMock(return_value=mock_response)
+            mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
+            mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+
+            with pytest.raises(ValueError):
+                await refresh_forecasts([(52.52, 13.41), (41.9, 12.5)])
+
+
+# ---------------------------------------------------------------------------
+# hourly features
+# ---------------------------------------------------------------------------
+
+def _hourly_payload():
+    hours = 48
+    return {
+        "current": {"time": "2026-01-01T12:15", "temperature_2m": 15.0, "weather_code": 2},
+        "daily": {"temperature_2m_max": [20.0], "temperature_2m_min": [8.0]},
+        "hourly": {
+            "time": [f"2026-01-{1 + h // 24:02d}T{h % 24:02d}:00" for h in range(hours)],
+            "temperature_2m": [8.0 + (h % 24) / 2 for h in range(hours)],
+            "precipitation": [1.5 if 17 <= h % 24 <= 19 else 0.0 for h in range(hours)],
+            "weather_code": [63 if 17 <= h % 24 <= 19 else 2 for h in range(hours)],
+        },
+    }
+
+
+def _series(payload=None):
+    payload = payload or _hourly_payload()
+    return {**payload["hourly"], "current_time": payload["current"]["time"]}
+
+
+class TestHourlyFeatures:
+    def test_defaults_to_window_from_current_hour(self):
+        features = hourly_features(_series(), hours=6)
+        assert features["start"] == "2026-01-01T12:00"
+        assert features["hours"] == 6
+        assert features["min_temp_c"] == 14.0
+        assert features["max_temp_c"] == 16.5
+        assert features["mean_temp_c"] == 15.2
+        assert features["precipitation_mm"] == 1.5
+        assert features["wet_hours"] == 1
+        assert features["first_wet_hour"] == "2026-01-01T17:00"
+        assert features["conditions"] == "Partly cloudy"
+
+    def test_explicit_window(self):
+        features = hourly_features(_series(), start="2026-01-01T17:30", hours=3)
+        assert features["start"] == "2026-01-01T17:00"
+        assert features["precipitation_mm"] == 4.5
+        assert features["wet_hours"] == 3
+        assert features["conditions"] == "Moderate rain"
+
+    def test_tie_goes_to_more_severe_code(self):
+        features = hourly_features(_series(), start="2026-01-01T16:00", hours=2)
+        assert features["conditions"] == "Moderate rain"
+
+    def test_missing_values_are_skipped(self):
+        payload = _hourly_payload()
+        payload["hourly"]["temperature_2m"][12] = None
+        payload["hourly"]["weather_code"][12] = None
+        features = hourly_features(_series(payload), hours=1)
+        assert features["min_temp_c"] is None
+        assert features["conditions"] == "Unknown"
+
+    def test_window_outside_forecast_raises(self):
+        with pytest.raises(ValueError):
+            hourly_features(_series(), start="2026-02-01T00:00")
+
+
+class TestGetHourlyFeatures:
+    @staticmethod
+    def _client(mock_client_cls, **get_kwargs):
+        mock_client = AsyncMock()
+        mock_client.get = AsyncMock(**get_kwargs)
+        mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
+        mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+        return mock_client
+
+    @pytest.mark.asyncio
+    async def test_cached_per_location_and_forecast_run(self):
+        mock_response = MagicMock()
+        mock_response.raise_for_status = MagicMock()
+        mock_response.json.return_value = _hourly_payload()
+
+        with patch("app.servers.weather_server.httpx.AsyncClient") as mock_client_cls:
+            mock_client = self._client(mock_client_cls, return_value=mock_response)
+            first = await get_hourly_features(40.42, -3.7, hours=6)
+            dinner = await get_hourly_features(40.42, -3.7, start="2026-01-01T18:00", hours=3)
+
+        assert mock_client.get.call_count == 1
+        assert first["precipitation_mm"] == 1.5
+        assert dinner["wet_hours"] == 2
+
+    @pytest.mark.asyncio
+    async def test_get_forecast_includes_next_hours_and_fills_cache(self):
+        mock_response = MagicMock()
+        mock_response.raise_for_status = MagicMock()
+        mock_response.json.return_value = _hourly_payload()
+
+        with patch("app.servers.weather_server.httpx.AsyncClient") as mock_client_cls:
+            mock_client = self._client(mock_client_cls, return_value=mock_response)
+            forecast = await get_forecast(59.33, 18.07)
+            features = await get_hourly_features(59.33, 18.07, start="2026-01-02T17:00", hours=1)
+
+        assert mock_client.get.call_count == 1
+        assert forecast["next_hours"] == hourly_features(_series())
+        assert features["conditions"] == "Moderate rain"
+
+    @pytest.mark.asyncio
+    async def test_new_forecast_run_fetches_again(self, monkeypatch):
+        mock_response = MagicMock()
+        mock_response.raise_for_status = MagicMock()
+        mock_response.json.return_value = _hourly_payload()
+        now = [1_000_000.0]
+        monkeypatch.setattr(weather_server.time, "time", lambda: now[0])
+
+        with patch("app.servers.weather_server.httpx.AsyncClient") as mock_client_cls:
+            mock_client = self._client(mock_client_cls, return_value=mock_response)
+            await get_hourly_features(45.46, 9.19)
+            now[0] += weather_server.FORECAST_RUN_S
+            await get_hourly_features(45.46, 9.19)
+
+        assert mock_client.get.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_error_dict_on_failure(self):
+        with patch("app.servers.weather_server.httpx.AsyncClient") as mock_client_cls:
+            self._client(mock_client_cls, side_effect=Exception("timeout"))
+            result = await get_hourly_features(-33.87, 151.21)
+
+        assert result == {"error": "Unable to fetch hourly forecast: timeout"}
+
+    @pytest.mark.asyncio
+    async def test_invalid_window_is_reported(self):
+        mock_response = MagicMock()
+        mock_response.raise_for_status = MagicMock()
+        mock_response.json.return_value = _hourly_payload()
+
+        with patch("app.servers.weather_server.httpx.AsyncClient") as mock_client_cls:
+            self._client(mock_client_cls, return_value=mock_response)
+            result = await get_hourly_features(35.68, 139.69, start="2027-01-01T00:00")
+
+        assert result["error"].startswith("Invalid forecast window")
+
+
+# ---------------------------------------------------------------------------
+# hedging and circuit breaking
+# ---------------------------------------------------------------------------
+
+class TestUpstreamResilience:
+    @pytest.mark.asyncio
+    async def test_forecast_circuit_opens_and_fails_fast(self, monkeypatch):
+        monkeypatch.setattr(weather_server, "FORECAST_FRESH_S", 0)
+        threshold = weather_server._forecast_upstream.failure_threshold
+
+        with patch("app.servers.weather_server.httpx.AsyncClient") as mock_client_cls:
+            mock_client = AsyncMock()
+            mock_client.get = AsyncMock(side_effect=Exception("timeout"))
+            mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
+            mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+
+            for _ in range(threshold):
+                await get_forecast(10.0, 10.0)
+            result = await get_forecast(10.0, 10.0)
+
+        assert mock_client.get.call_count == threshold
+        assert "circuit open" in result["error"]
+        stats = upstream_stats()
+        assert stats["openmeteo_forecast"]["circuit"] == "open"
+        assert stats["openmeteo_forecast"]["rejected"] == 1
+        assert stats["openmeteo_geocoding"]["circuit"] == "closed"
+
+    @pytest.mark.asyncio
+    async def test_client_errors_do_not_open_circuit(self):
+        request = weather_server.httpx.Request("GET", "https://geocoding.example/search")
+        not_found = weather_server.httpx.Response(404, request=request)
+        mock_response = MagicMock()
+        mock_response.raise_for_status = MagicMock(
+            side_effect=weather_server.httpx.HTTPStatusError("404", request=request, response=not_found)
+        )
+
+        with patch("app.servers.weather_server.httpx.AsyncClient") as mock_client_cls:
+            mock_client = AsyncMock()
+            mock_client.get = AsyncMock(return_value=mock_response)
+            mock_client_cls.return_value.__aenter__ = AsyncMock(return_value=mock_client)
+            mock_client_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+
+            for i in range(weather_server._geocoding_upstream.failure_threshold + 1):
+                result = await get_city_coordinates(f"Nowhere {i}")
+
+        assert result["fallback"] is True
+        stats = upstream_stats()
+        assert stats["openmeteo_geocoding"]["circuit"] == "closed"
+        assert stats["openmeteo_geocoding"]["failures"] == 0
+
+    @pytest.mark.asyncio
+    async def test_upstream_stats_is_not_an_agent_tool(self):
+        tools = await weather_server.mcp.list_tools()
+        assert "get_upstream_stats" not in {tool.name for tool in tools}
+
+
+# ---------------------------------------------------------------------------
+# server process cache
+# ---------------------------------------------------------------------------
+
+class TestServerCache:
+    def test_defaults_to_node_local_sqlite(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("APP_CACHE_URL", raising=False)
+        monkeypatch.setattr(weather_server, "SERVER_CACHE_PATH", str(tmp_path / "weather.db"))
+
+        weather_server.use_server_cache()
+        weather_server._last_coordinates.set("rome", {"latitude": 41.9})
+        # A later tool call runs in a new process and opens the same file.
+        set_cache(SQLiteCache(str(tmp_path / "weather.db")))
+
+        assert weather_server._last_coordinates.get("rome") == {"latitude": 41.9}
+
+    def test_configured_cache_is_kept(self, monkeypatch, tmp_path):
+        backend = SQLiteCache(str(tmp_path / "shared.db"))
+        set_cache(backend)
+        monkeypatch.setenv("APP_CACHE_URL", f"sqlite:///{tmp_path}/shared.db")
+
+        weather_server.use_server_cache()
+
+        assert weather_server.get_cache() is backend
+
+    def test_warns_about_per_process_memory_cache(self, monkeypatch, caplog):
+        monkeypatch.setenv("APP_CACHE_URL", "memory://")
+
+        weather_server.use_server_cache()
+
+        assert "lost when this tool call's process exits" in caplog.text